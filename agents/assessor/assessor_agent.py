@@ -1,15 +1,37 @@
+from typing import Any
 from langchain_core.messages import AIMessage
 from langchain.prompts import PromptTemplate
 from models import AgentState
 from agents.assessor import assessor_prompts
 from utils import colors
 from utils.general import print_colored, initialize_llm, get_parser_requirements
-from utils.multi_agent import invoke_agent
+from utils.multi_agent import invoke_agent, ainvoke_agent
 
 
 
 def assessor_node(state: AgentState) -> AgentState:
     """Assessor agent that evaluates parser code."""
+    assessor_executor, assessor_input = __prepare_assessor(state)
+
+    # Invoke the agent
+    assessor_event = {}
+    assessor_outcome, assessor_response = invoke_agent(assessor_executor, assessor_input, event=assessor_event)
+    state["benchmark_metrics"].record_event("Assessor", state["iteration_count"], "llm", success=assessor_outcome, **assessor_event)
+    
+    return __finish_assessor(state, assessor_outcome, assessor_response)
+
+async def aassessor_node(state: AgentState) -> AgentState:
+    """Assessor agent that evaluates parser code (asynchronously)."""
+    assessor_executor, assessor_input = __prepare_assessor(state)
+
+    # Invoke the agent
+    assessor_event = {}
+    assessor_outcome, assessor_response = await ainvoke_agent(assessor_executor, assessor_input, event=assessor_event)
+    state["benchmark_metrics"].record_event("Assessor", state["iteration_count"], "llm", success=assessor_outcome, **assessor_event)
+    
+    return __finish_assessor(state, assessor_outcome, assessor_response)
+
+def __prepare_assessor(state: AgentState) -> tuple[Any, dict[str, str]]:
     supervisor_specifications = state["supervisor_specifications"]
     generator_code = state["generator_code"]
     iteration_count = state["iteration_count"]
@@ -30,7 +52,7 @@ def assessor_node(state: AgentState) -> AgentState:
     assessor_prompt = PromptTemplate.from_template(assessor_template)
 
     # Initialize model for assessor
-    assessor_llm = initialize_llm(model_source, 0.4)
+    assessor_llm = initialize_llm(model_source, 0.4, retries=0)
 
     # Create a normal LLM chain (no ReAct needed)
     assessor_executor = assessor_prompt | assessor_llm
@@ -39,9 +61,13 @@ def assessor_node(state: AgentState) -> AgentState:
     assessor_prompt_rendered = assessor_prompt.format(**assessor_input)
     print_colored(f"Assessor PROMPT (Iteration {iteration_count}/{max_iterations}):", colors.GREEN, bold=True)
     print_colored(assessor_prompt_rendered, colors.GREEN)
-    
-    # Invoke the agent
-    assessor_outcome, assessor_response = invoke_agent(assessor_executor, assessor_input)
+
+    return assessor_executor, assessor_input
+
+def __finish_assessor(state: AgentState, assessor_outcome: bool, assessor_response: str) -> AgentState:
+    iteration_count = state["iteration_count"]
+    max_iterations = state["max_iterations"]
+
     if assessor_outcome:
         assessor_response_color = colors.CYAN
         code_assessment = assessor_response
@@ -58,15 +84,15 @@ def assessor_node(state: AgentState) -> AgentState:
         "user_action": state["user_action"],
         "user_request": state["user_request"],
         "file_format": state["file_format"],
-        "supervisor_specifications": supervisor_specifications,
-        "generator_code": generator_code,
+        "supervisor_specifications": state["supervisor_specifications"],
+        "generator_code": state["generator_code"],
         "compiler_result": None,
         "tester_result": None,
         "code_assessment": code_assessment,
         "round": state["round"],
         "iteration_count": iteration_count,
         "max_iterations": max_iterations,
-        "model_source": model_source,
+        "model_source": state["model_source"],
         "session_dir": state["session_dir"],
         "next_step": "Orchestrator",
         "benchmark_metrics": state["benchmark_metrics"]
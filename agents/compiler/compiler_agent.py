@@ -1,39 +1,56 @@
+from pathlib import Path
+from time import perf_counter
 from langchain_core.messages import AIMessage
 from models import AgentState
 from utils import colors
-from utils.general import print_colored, compile_c_code, get_parser_dir
+from utils.general import print_colored, compile_c_code_profiles, acompile_c_code_profiles, get_parser_dir
 
 
 
 def compiler_node(state: AgentState) -> AgentState:
     """Compiler agent that compiles parser code."""
-    file_format = state["file_format"]
+    parser_dir, generator_code = __prepare_compiler(state)
+
+    # Compile the code
+    # NB: buildtime flags first, then runtime flags for the tester
+    start = perf_counter()
+    compilation_result, compilation_flags = compile_c_code_profiles(parser_dir, generator_code)
+    state["benchmark_metrics"].record_event("Compiler", state["iteration_count"], "compile", perf_counter() - start, bool(compilation_result["success"]))
+
+    return __finish_compiler(state, compilation_result, compilation_flags)
+
+async def acompiler_node(state: AgentState) -> AgentState:
+    """Compiler agent that compiles parser code (asynchronously, both profiles in parallel with PARALLEL_COMPILATION)."""
+    parser_dir, generator_code = __prepare_compiler(state)
+
+    # Compile the code
+    start = perf_counter()
+    compilation_result, compilation_flags = await acompile_c_code_profiles(parser_dir, generator_code)
+    state["benchmark_metrics"].record_event("Compiler", state["iteration_count"], "compile", perf_counter() - start, bool(compilation_result["success"]))
+
+    return __finish_compiler(state, compilation_result, compilation_flags)
+
+def __prepare_compiler(state: AgentState) -> tuple[Path, str]:
     generator_code = state["generator_code"]
-    round = state["round"]
-    iteration_count = state["iteration_count"]
-    max_iterations = state["max_iterations"]
-    session_dir = state["session_dir"]
 
     # NB: here it can't be None
     if not generator_code:
         raise Exception("Something goes wrong :(")
 
     # Create the parser dir
-    parser_dir = get_parser_dir(session_dir, round, iteration_count)
+    parser_dir = get_parser_dir(state["session_dir"], state["round"], state["iteration_count"])
     parser_dir.mkdir()
-    
-    # Compile the code
+
     print_colored("\n--- Parser Compilation ---", colors.YELLOW, bold=True)
-    compilation_result = compile_c_code(parser_dir, generator_code, runtime=False)
-    
+
+    return parser_dir, generator_code
+
+def __finish_compiler(state: AgentState, compilation_result: dict[str, bool | str], compilation_flags: str) -> AgentState:
+    iteration_count = state["iteration_count"]
+    max_iterations = state["max_iterations"]
+
     # Check if code has been compiled with success
     is_compiled = compilation_result["success"]
-    compilation_flags = "buildtime"
-    if is_compiled:
-        # Recompile the code for the tester (runtime flags)
-        compilation_result = compile_c_code(parser_dir, generator_code)
-        is_compiled = compilation_result["success"]
-        compilation_flags = "runtime"
     
     compilation_status = "✅ Compilation successful" if is_compiled else f"❌ Compilation failed with the following errors:\n{compilation_result["stderr"]}"
     
@@ -49,17 +66,17 @@ def compiler_node(state: AgentState) -> AgentState:
         "messages": [AIMessage(content=compiler_response, name="Compiler")],
         "user_action": state["user_action"],
         "user_request": state["user_request"],
-        "file_format": file_format,
+        "file_format": state["file_format"],
         "supervisor_specifications": state["supervisor_specifications"],
-        "generator_code": generator_code,
+        "generator_code": state["generator_code"],
         "compiler_result": compilation_result,
         "tester_result": None,
         "code_assessment": None,
-        "round": round,
+        "round": state["round"],
         "iteration_count": iteration_count,
         "max_iterations": max_iterations,
         "model_source": state["model_source"],
-        "session_dir": session_dir,
+        "session_dir": state["session_dir"],
         "next_step": "Orchestrator",
         "benchmark_metrics": state["benchmark_metrics"]
     }
\ No newline at end of file
@@ -1,21 +1,251 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import Context, copy_context
+from threading import Event
+from time import perf_counter
+from typing import Any, Literal
 from langchain_core.messages import AIMessage
 from langchain.prompts import PromptTemplate
 from models import AgentState
 from agents.generator import generator_prompts
 from utils import colors
-from utils.general import print_colored, extract_c_code, initialize_llm, get_parser_requirements
-from utils.multi_agent import invoke_agent
+from utils.general import (
+    print_colored, extract_c_code, apply_edit_blocks, initialize_llm, get_parser_requirements, get_llm_cache, get_setting, is_setting_enabled,
+    get_parser_dir, compile_c_code_profiles, acompile_c_code_profiles, execute_c_code, aexecute_c_code, 
+    execute_c_code_suite, aexecute_c_code_suite, save_testing_output
+)
+from utils.context import get_code_context
+from utils.llm_cache import get_llm_cache_namespace, set_llm_cache_namespace
+from utils.multi_agent import invoke_agent, ainvoke_agent
 
 
 
 def generator_node(state: AgentState) -> AgentState:
     """Generator agent that creates C code."""
+    generator_prompt, generator_input = __prepare_generator(state, __is_editing(state))
+    candidates = __get_candidates(state)
+    if len(candidates) > 1:
+        return __finish_generator(state, *__run_candidates(state, generator_prompt, generator_input, candidates))
+
+    # Invoke the agent
+    generator_outcome, generator_response, generator_response_code = __generate(state, generator_prompt, generator_input, state["model_source"])
+
+    return __finish_generator(state, generator_outcome, generator_response, generator_response_code)
+
+async def agenerator_node(state: AgentState) -> AgentState:
+    """Generator agent that creates C code (asynchronously)."""
+    generator_prompt, generator_input = __prepare_generator(state, __is_editing(state))
+    candidates = __get_candidates(state)
+    if len(candidates) > 1:
+        return __finish_generator(state, *await __arun_candidates(state, generator_prompt, generator_input, candidates))
+
+    # Invoke the agent
+    generator_outcome, generator_response, generator_response_code = await __agenerate(state, generator_prompt, generator_input, state["model_source"])
+
+    return __finish_generator(state, generator_outcome, generator_response, generator_response_code)
+
+def __is_editing(state: AgentState) -> bool:
+    """Check if the generator repairs the previous code with edit blocks instead of rewriting it."""
+    return is_setting_enabled("EDIT_REPAIR") and bool(state["generator_code"] and state["code_assessment"])
+
+def __get_code(state: AgentState, generator_response: str) -> str | None:
+    """Get the code of a response: the previous code with its edit blocks applied, or the clean code."""
+    if __is_editing(state):
+        return apply_edit_blocks(state["generator_code"] or "", generator_response)
+    return extract_c_code(generator_response)
+
+def __generate(state: AgentState, generator_prompt: PromptTemplate, generator_input: dict[str, str], source: str, temp: float = 0.5) -> tuple[bool, str, str | None]:
+    """Invoke the model, falling back to the full code when its edit blocks don't apply."""
+    editing = __is_editing(state)
+    generator_executor = generator_prompt | initialize_llm(source, temp, retries=0)
+    # NB: edit blocks aren't a code block, so their stream can't stop early
+    generator_event = {}
+    generator_outcome, generator_response = invoke_agent(generator_executor, generator_input, until_code=__is_streaming() and not editing, event=generator_event)
+    state["benchmark_metrics"].record_event("Generator", state["iteration_count"], "llm", success=generator_outcome, **generator_event)
+    generator_response_code = __get_code(state, generator_response) if generator_outcome else None
+    if generator_outcome and editing and generator_response_code is None:
+        print_colored("Generator edit blocks don't apply to the code, asking for the full code", colors.YELLOW, bold=True)
+        generator_prompt, generator_input = __prepare_generator(state, False)
+        generator_executor = generator_prompt | initialize_llm(source, temp, retries=0)
+        generator_outcome, generator_response = invoke_agent(generator_executor, generator_input, until_code=__is_streaming(), event=generator_event)
+        state["benchmark_metrics"].record_event("Generator", state["iteration_count"], "llm", success=generator_outcome, **generator_event)
+        generator_response_code = extract_c_code(generator_response) if generator_outcome else None
+    
+    return generator_outcome, generator_response, generator_response_code
+
+async def __agenerate(state: AgentState, generator_prompt: PromptTemplate, generator_input: dict[str, str], source: str, temp: float = 0.5) -> tuple[bool, str, str | None]:
+    """Same as __generate, but the event loop is free while waiting for the model."""
+    editing = __is_editing(state)
+    generator_executor = generator_prompt | initialize_llm(source, temp, retries=0)
+    generator_event = {}
+    generator_outcome, generator_response = await ainvoke_agent(generator_executor, generator_input, until_code=__is_streaming() and not editing, event=generator_event)
+    state["benchmark_metrics"].record_event("Generator", state["iteration_count"], "llm", success=generator_outcome, **generator_event)
+    generator_response_code = __get_code(state, generator_response) if generator_outcome else None
+    if generator_outcome and editing and generator_response_code is None:
+        print_colored("Generator edit blocks don't apply to the code, asking for the full code", colors.YELLOW, bold=True)
+        generator_prompt, generator_input = __prepare_generator(state, False)
+        generator_executor = generator_prompt | initialize_llm(source, temp, retries=0)
+        generator_outcome, generator_response = await ainvoke_agent(generator_executor, generator_input, until_code=__is_streaming(), event=generator_event)
+        state["benchmark_metrics"].record_event("Generator", state["iteration_count"], "llm", success=generator_outcome, **generator_event)
+        generator_response_code = extract_c_code(generator_response) if generator_outcome else None
+    
+    return generator_outcome, generator_response, generator_response_code
+
+def __get_candidates(state: AgentState) -> list[tuple[str, float]]:
+    """Get the (source, temperature) of each best-of-N candidate (just one without best-of-N)."""
+    n = int(get_setting("BEST_OF_N", "1"))
+    sources = [ source.strip() for source in get_setting("BEST_OF_N_SOURCES", state["model_source"]).split(",") if source.strip() ]
+    temperatures = [ float(temp) for temp in get_setting("BEST_OF_N_TEMPERATURES", "0.5,0.8,1.0,0.3").split(",") if temp.strip() ]
+    return [ (sources[i % len(sources)], temperatures[i % len(temperatures)]) for i in range(max(n, 1)) ]
+
+def __get_candidate_context(candidates: list[tuple[str, float]], index: int) -> Context:
+    """Get a copy of the context for a candidate, with its own LLM cache namespace if the same source and temperature come before it."""
+    context = copy_context()
+    repeat = candidates[:index].count(candidates[index])
+    if repeat:
+        # NB: otherwise it would get the same cached response of the previous one (e.g. more candidates than temperatures)
+        context.run(set_llm_cache_namespace, f"{get_llm_cache_namespace()}|candidate_{repeat}")
+    return context
+
+def __get_candidate(state: AgentState, index: int, source: str, temp: float, outcome: bool, response: str, code: str | None) -> dict[str, Any]:
+    parser_dir = get_parser_dir(state["session_dir"], state["round"], state["iteration_count"])
+    return {
+        "index": index,
+        "source": source,
+        "temperature": temp,
+        "outcome": outcome,
+        "response": response,
+        "code": code,
+        "parser_dir": parser_dir.with_name(f"{parser_dir.name}_candidate_{index}"),
+        "compiler_result": None,
+        "compilation_flags": None,
+        "tester_result": None
+    }
+
+def __get_candidate_rank(candidate: dict[str, Any]) -> int:
+    """Rank a candidate: tested, compiled, generated or failed."""
+    if candidate["tester_result"] and candidate["tester_result"]["success"]:
+        return 3
+    if candidate["compiler_result"] and candidate["compiler_result"]["success"]:
+        return 2
+    return 1 if candidate["code"] else 0
+
+def __record_candidate_event(state: AgentState, kind: Literal["compile", "execute"], start: float, result: dict[str, bool | str]) -> None:
+    node = "Compiler" if kind == "compile" else "Tester"
+    state["benchmark_metrics"].record_event(node, state["iteration_count"], kind, perf_counter() - start, bool(result["success"]))
+
+def __run_candidate(state: AgentState, generator_prompt: PromptTemplate, generator_input: dict[str, str], index: int, source: str, temp: float, stop: Event) -> dict[str, Any]:
+    """Generate, compile and test a candidate (stopping at the next step when another one has already passed)."""
+    outcome, response, code = __generate(state, generator_prompt, generator_input, source, temp)
+    candidate = __get_candidate(state, index, source, temp, outcome, response, code)
+    if not candidate["code"] or stop.is_set():
+        return candidate
+
+    candidate["parser_dir"].mkdir()
+    start = perf_counter()
+    candidate["compiler_result"], candidate["compilation_flags"] = compile_c_code_profiles(candidate["parser_dir"], candidate["code"])
+    __record_candidate_event(state, "compile", start, candidate["compiler_result"])
+    if not candidate["compiler_result"]["success"] or stop.is_set():
+        return candidate
+
+    start = perf_counter()
+    if is_setting_enabled("TEST_SUITE"):
+        candidate["tester_result"] = execute_c_code_suite(candidate["parser_dir"], state["file_format"])
+    else:
+        candidate["tester_result"] = execute_c_code(candidate["parser_dir"], state["file_format"])
+    __record_candidate_event(state, "execute", start, candidate["tester_result"])
+    save_testing_output(candidate["parser_dir"], candidate["tester_result"])
+    return candidate
+
+async def __arun_candidate(state: AgentState, generator_prompt: PromptTemplate, generator_input: dict[str, str], index: int, source: str, temp: float) -> dict[str, Any]:
+    """Same as __run_candidate, but cancelling the task stops it right away."""
+    outcome, response, code = await __agenerate(state, generator_prompt, generator_input, source, temp)
+    candidate = __get_candidate(state, index, source, temp, outcome, response, code)
+    if not candidate["code"]:
+        return candidate
+
+    candidate["parser_dir"].mkdir()
+    start = perf_counter()
+    candidate["compiler_result"], candidate["compilation_flags"] = await acompile_c_code_profiles(candidate["parser_dir"], candidate["code"])
+    __record_candidate_event(state, "compile", start, candidate["compiler_result"])
+    if not candidate["compiler_result"]["success"]:
+        return candidate
+
+    start = perf_counter()
+    if is_setting_enabled("TEST_SUITE"):
+        candidate["tester_result"] = await aexecute_c_code_suite(candidate["parser_dir"], state["file_format"])
+    else:
+        candidate["tester_result"] = await aexecute_c_code(candidate["parser_dir"], state["file_format"])
+    __record_candidate_event(state, "execute", start, candidate["tester_result"])
+    save_testing_output(candidate["parser_dir"], candidate["tester_result"])
+    return candidate
+
+def __run_candidates(state: AgentState, generator_prompt: PromptTemplate, generator_input: dict[str, str], candidates: list[tuple[str, float]]) -> tuple[bool, str, str | None, dict[str, Any]]:
+    """Best-of-N: generate, compile and test the candidates in parallel, the first one that passes wins."""
+    stop = Event()
+    best = None
+    executor = ThreadPoolExecutor(max_workers=len(candidates))
+    try:
+        # NB: each candidate in a copy of the context (e.g. the LLM cache namespace of the benchmark)
+        futures = [
+            executor.submit(__get_candidate_context(candidates, i).run, __run_candidate, state, generator_prompt, generator_input, i, source, temp, stop)
+            for i, (source, temp) in enumerate(candidates)
+        ]
+        for future in as_completed(futures):
+            candidate = future.result()
+            if best is None or __get_candidate_rank(candidate) > __get_candidate_rank(best):
+                best = candidate
+            if __get_candidate_rank(best) == 3:
+                break
+    finally:
+        # NB: threads can't be killed, the other candidates stop at their next step (a running request or gcc ends anyway)
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return __select_candidate(state, best)
+
+async def __arun_candidates(state: AgentState, generator_prompt: PromptTemplate, generator_input: dict[str, str], candidates: list[tuple[str, float]]) -> tuple[bool, str, str | None, dict[str, Any]]:
+    """Same as __run_candidates, but the other candidates are cancelled (requests and processes included)."""
+    best = None
+    tasks = [
+        asyncio.create_task(__arun_candidate(state, generator_prompt, generator_input, i, source, temp), context=__get_candidate_context(candidates, i))
+        for i, (source, temp) in enumerate(candidates)
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            candidate = await task
+            if best is None or __get_candidate_rank(candidate) > __get_candidate_rank(best):
+                best = candidate
+            if __get_candidate_rank(best) == 3:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    return __select_candidate(state, best)
+
+def __select_candidate(state: AgentState, best: dict[str, Any] | None) -> tuple[bool, str, str | None, dict[str, Any]]:
+    # NB: here it can't be None
+    if not best:
+        raise Exception("Something goes wrong :(")
+
+    print_colored(f"Best-of-N: candidate {best["index"]} ({best["source"]}, temperature {best["temperature"]}) selected", colors.YELLOW, bold=True)
+    if best["compiler_result"]:
+        # NB: the selected candidate becomes the parser of the iteration, the others stay for reference
+        best["parser_dir"] = best["parser_dir"].rename(get_parser_dir(state["session_dir"], state["round"], state["iteration_count"]))
+    return best["outcome"], best["response"], best["code"], best
+
+def __is_streaming() -> bool:
+    # NB: streamed responses skip the LLM cache, so the cache wins
+    return is_setting_enabled("STREAM_GENERATION") and get_llm_cache() is None
+
+def __prepare_generator(state: AgentState, editing: bool) -> tuple[PromptTemplate, dict[str, str]]:
     supervisor_specifications = state["supervisor_specifications"]
     generator_code = state["generator_code"]
     code_assessment = state["code_assessment"]
     iteration_count = state["iteration_count"]
     max_iterations = state["max_iterations"]
-    model_source = state["model_source"]
 
     # NB: here it can't be None
     if not supervisor_specifications:
@@ -28,7 +258,11 @@ def generator_node(state: AgentState) -> AgentState:
         "specifications": supervisor_specifications
     }
     if generator_code and code_assessment:
-        feedback_template = generator_prompts.get_fixing_template()
+        # NB: with edit blocks only the changed lines are generated
+        feedback_template = generator_prompts.get_editing_template() if editing else generator_prompts.get_fixing_template()
+        if editing and is_setting_enabled("LOCALIZED_CONTEXT"):
+            # NB: only the functions with errors, edit blocks are applied to the whole code anyway
+            generator_code = get_code_context(generator_code, code_assessment) or generator_code
         generator_input.update({
             "code": generator_code,
             "assessment": code_assessment
@@ -36,46 +270,54 @@ def generator_node(state: AgentState) -> AgentState:
     else:
         feedback_template = generator_prompts.get_starting_template()
     generator_template = generator_template.replace("{feedback}", feedback_template)
+    # NB: a normal LLM chain (no ReAct needed) with the model of each candidate
     generator_prompt = PromptTemplate.from_template(generator_template)
 
-    # Initialize model for generator
-    generator_llm = initialize_llm(model_source)
-
-    # Create a normal LLM chain (no ReAct needed)
-    generator_executor = generator_prompt | generator_llm
-
     # Print the prompt
     generator_prompt_rendered = generator_prompt.format(**generator_input)
     print_colored(f"Generator PROMPT (Iteration {iteration_count}/{max_iterations}):", colors.GREEN, bold=True)
     print_colored(generator_prompt_rendered, colors.GREEN)
 
-    # Invoke the agent
-    generator_outcome, generator_response = invoke_agent(generator_executor, generator_input)
-    if generator_outcome:
-        generator_response_color = colors.MAGENTA
-        # Extract clean c code
-        generator_response_code = extract_c_code(generator_response)
-    else:
-        generator_response_color = colors.RED
-        generator_response_code = None
+    return generator_prompt, generator_input
+
+def __finish_generator(
+        state: AgentState, generator_outcome: bool, generator_response: str, generator_response_code: str | None, 
+        candidate: dict[str, Any] | None = None
+    ) -> AgentState:
+    iteration_count = state["iteration_count"]
+    max_iterations = state["max_iterations"]
+    messages = [AIMessage(content=generator_response, name="Generator")]
+
+    generator_response_color = colors.MAGENTA if generator_outcome else colors.RED
     
     print_colored(f"Generator RESPONSE (Iteration {iteration_count}/{max_iterations}):", generator_response_color, bold=True)
     print_colored(generator_response, generator_response_color)
+
+    compiler_result = tester_result = None
+    if candidate and candidate["compiler_result"]:
+        # NB: best-of-N candidates are already compiled and tested, the orchestrator goes on from their last step
+        compiler_result = candidate["compiler_result"]
+        compilation_status = "✅ Compilation successful" if compiler_result["success"] else f"❌ Compilation failed with the following errors:\n{compiler_result["stderr"]}"
+        messages.append(AIMessage(content=f"Compilation result ({candidate["compilation_flags"]}): {compilation_status}", name="Compiler"))
+        tester_result = candidate["tester_result"]
+        if tester_result:
+            testing_status = "✅ Testing successful" if tester_result["success"] else f"❌ Testing failed with the following errors:\n{tester_result["stderr"]}"
+            messages.append(AIMessage(content=f"Testing result: {testing_status}", name="Tester"))
     
     return {
-        "messages": [AIMessage(content=generator_response, name="Generator")],
+        "messages": messages,
         "user_action": state["user_action"],
         "user_request": state["user_request"],
         "file_format": state["file_format"],
-        "supervisor_specifications": supervisor_specifications,
+        "supervisor_specifications": state["supervisor_specifications"],
         "generator_code": generator_response_code,
-        "compiler_result": None,
-        "tester_result": None,
+        "compiler_result": compiler_result,
+        "tester_result": tester_result,
         "code_assessment": None,
         "round": state["round"],
         "iteration_count": iteration_count,
         "max_iterations": max_iterations,
-        "model_source": model_source,
+        "model_source": state["model_source"],
         "session_dir": state["session_dir"],
         "next_step": "Orchestrator",
         "benchmark_metrics": state["benchmark_metrics"]
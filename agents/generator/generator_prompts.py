@@ -71,3 +71,24 @@ This is the assessment about the code above (IMPORTANT):
 
 Correct the code generated, addressing all the assessment issues and following all the previous instructions.
 """
+
+def get_editing_template() -> str:
+    return """<code_generated>
+This is the code you have already generated (IMPORTANT):
+```c
+{code}
+```
+
+This is the assessment about the code above (IMPORTANT):
+{assessment}
+</code_generated>
+
+Correct the code generated, addressing all the assessment issues and following all the previous instructions.
+Do NOT rewrite the whole code: reply ONLY with edit blocks in this exact format, one for each change:
+<<<<<<< SEARCH
+exact lines of the code above to replace (with enough lines to be unique)
+=======
+new lines
+>>>>>>> REPLACE
+To add code, search the lines next to it and replace them with the same lines plus the new code.
+"""
@@ -49,6 +49,9 @@ def orchestrator_node(state: AgentState) -> AgentState:
         if not tester_result:
             raise Exception("Something goes wrong :(")
         
+        # NB: best-of-N candidates come from the generator already compiled (recorded once anyway)
+        benchmark_metrics.record_parser_compilation(iteration_count, parser_dir)
+
         # Check testing results
         if tester_result["success"]:
             # go on with qualitative assessment
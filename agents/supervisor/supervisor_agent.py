@@ -1,15 +1,38 @@
+from typing import Any
 from langchain_core.messages import AIMessage
 from langchain.prompts import PromptTemplate
 from models import AgentState
 from utils import colors
-from utils.general import print_colored, initialize_llm, get_parser_requirements
-from utils.multi_agent import invoke_agent
+from utils.general import print_colored, initialize_llm, get_parser_requirements, is_setting_enabled
+from utils.context import get_code_context
+from utils.multi_agent import invoke_agent, ainvoke_agent
 from agents.supervisor import supervisor_prompts
 
 
 
 def supervisor_node(state: AgentState) -> AgentState:
     """Supervisor agent that converses with the user and manages the parser generation process."""
+    supervisor_executor, supervisor_input, purpose, next_step = __prepare_supervisor(state)
+
+    # Invoke the agent
+    supervisor_event = {}
+    supervisor_outcome, supervisor_response = invoke_agent(supervisor_executor, supervisor_input, event=supervisor_event)
+    state["benchmark_metrics"].record_event("Supervisor", state["iteration_count"], "llm", success=supervisor_outcome, **supervisor_event)
+
+    return __finish_supervisor(state, supervisor_outcome, supervisor_response, purpose, next_step)
+
+async def asupervisor_node(state: AgentState) -> AgentState:
+    """Supervisor agent that converses with the user and manages the parser generation process (asynchronously)."""
+    supervisor_executor, supervisor_input, purpose, next_step = __prepare_supervisor(state)
+
+    # Invoke the agent
+    supervisor_event = {}
+    supervisor_outcome, supervisor_response = await ainvoke_agent(supervisor_executor, supervisor_input, event=supervisor_event)
+    state["benchmark_metrics"].record_event("Supervisor", state["iteration_count"], "llm", success=supervisor_outcome, **supervisor_event)
+
+    return __finish_supervisor(state, supervisor_outcome, supervisor_response, purpose, next_step)
+
+def __prepare_supervisor(state: AgentState) -> tuple[Any, dict[str, str], str, str]:
     user_action = state["user_action"]
     user_request = state["user_request"]
     generator_code = state["generator_code"]
@@ -32,6 +55,9 @@ def supervisor_node(state: AgentState) -> AgentState:
             next_step = "Orchestrator"
         elif user_action == "CORRECT_ERROR" and generator_code and code_assessment:
             adaptive_instructions = supervisor_prompts.get_supervisor_input_correct_error()
+            if is_setting_enabled("LOCALIZED_CONTEXT"):
+                # NB: specifications only, so the functions with errors are enough
+                generator_code = get_code_context(generator_code, code_assessment) or generator_code
             supervisor_input.update({
                 "code": generator_code,
                 "assessment": code_assessment
@@ -66,7 +92,7 @@ def supervisor_node(state: AgentState) -> AgentState:
     supervisor_prompt = PromptTemplate.from_template(supervisor_template)
 
     # Initialize model for supervisor
-    supervisor_llm = initialize_llm(model_source, 0.6)
+    supervisor_llm = initialize_llm(model_source, 0.6, retries=0)
     
     # Create a normal LLM chain (no ReAct needed)
     supervisor_executor = supervisor_prompt | supervisor_llm
@@ -83,8 +109,9 @@ def supervisor_node(state: AgentState) -> AgentState:
     print_colored(f"Supervisor PROMPT ({purpose}):", colors.GREEN, bold=True)
     print_colored(supervisor_prompt_rendered, colors.GREEN)
 
-    # Invoke the agent
-    supervisor_outcome, supervisor_response = invoke_agent(supervisor_executor, supervisor_input)
+    return supervisor_executor, supervisor_input, purpose, next_step
+
+def __finish_supervisor(state: AgentState, supervisor_outcome: bool, supervisor_response: str, purpose: str, next_step: str) -> AgentState:
     if supervisor_outcome:
         supervisor_response_color = colors.BLUE
         # Set the specifications (NB: only for orchestrator -> generator)
@@ -98,18 +125,18 @@ def supervisor_node(state: AgentState) -> AgentState:
     
     return {
         "messages": [AIMessage(content=supervisor_response, name="Supervisor")],
-        "user_action": user_action,
-        "user_request": user_request,
+        "user_action": state["user_action"],
+        "user_request": state["user_request"],
         "file_format": state["file_format"],
         "supervisor_specifications": supervisor_specifications,
-        "generator_code": generator_code,
+        "generator_code": state["generator_code"],
         "compiler_result": None,
         "tester_result": None,
-        "code_assessment": code_assessment,
+        "code_assessment": state["code_assessment"],
         "round": state["round"],
-        "iteration_count": iteration_count,
+        "iteration_count": state["iteration_count"],
         "max_iterations": state["max_iterations"],
-        "model_source": model_source,
+        "model_source": state["model_source"],
         "session_dir": state["session_dir"],
         "next_step": next_step,
         "benchmark_metrics": state["benchmark_metrics"]
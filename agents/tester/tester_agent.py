@@ -1,32 +1,52 @@
+from pathlib import Path
+from time import perf_counter
 from langchain_core.messages import AIMessage
 from models import AgentState
 from utils import colors
-from utils.general import print_colored, execute_c_code, get_parser_dir
+from utils.general import print_colored, execute_c_code, aexecute_c_code, execute_c_code_suite, aexecute_c_code_suite, get_parser_dir, is_setting_enabled, save_testing_output
 
 
 
 def tester_node(state: AgentState) -> AgentState:
     """Tester agent that tests parser code."""
-    file_format = state["file_format"]
-    round = state["round"]
-    iteration_count = state["iteration_count"]
-    max_iterations = state["max_iterations"]
-    session_dir = state["session_dir"]
-    
+    parser_dir = get_parser_dir(state["session_dir"], state["round"], state["iteration_count"])
+
     # Test the code
     print_colored("\n--- Parser Testing ---", colors.YELLOW, bold=True)
-    parser_dir = get_parser_dir(session_dir, round, iteration_count)
-    testing_result = execute_c_code(parser_dir, file_format)
-    
+    start = perf_counter()
+    if is_setting_enabled("TEST_SUITE"):
+        # all the test cases of the format (valid, invalid and large ones)
+        testing_result = execute_c_code_suite(parser_dir, state["file_format"])
+    else:
+        testing_result = execute_c_code(parser_dir, state["file_format"])
+    state["benchmark_metrics"].record_event("Tester", state["iteration_count"], "execute", perf_counter() - start, bool(testing_result["success"]))
+
+    return __finish_tester(state, parser_dir, testing_result)
+
+async def atester_node(state: AgentState) -> AgentState:
+    """Tester agent that tests parser code (asynchronously, the test cases in parallel)."""
+    parser_dir = get_parser_dir(state["session_dir"], state["round"], state["iteration_count"])
+
+    # Test the code
+    print_colored("\n--- Parser Testing ---", colors.YELLOW, bold=True)
+    start = perf_counter()
+    if is_setting_enabled("TEST_SUITE"):
+        testing_result = await aexecute_c_code_suite(parser_dir, state["file_format"])
+    else:
+        testing_result = await aexecute_c_code(parser_dir, state["file_format"])
+    state["benchmark_metrics"].record_event("Tester", state["iteration_count"], "execute", perf_counter() - start, bool(testing_result["success"]))
+
+    return __finish_tester(state, parser_dir, testing_result)
+
+def __finish_tester(state: AgentState, parser_dir: Path, testing_result: dict[str, bool | str]) -> AgentState:
+    iteration_count = state["iteration_count"]
+    max_iterations = state["max_iterations"]
+
     # Check if code has been tested with success
     is_tested_ok = testing_result["success"]
     testing_status = "✅ Testing successful" if is_tested_ok else "❌ Testing failed with the following errors:\n" + testing_result["stderr"]
 
-    with open(parser_dir / "output.txt", "w", encoding="utf-8") as f:
-        test_output = f"success: {"OK" if is_tested_ok else "ERR"}\n"
-        test_output += f"stdout: {testing_result["stdout"]}\n"
-        test_output += f"stderr: {testing_result["stderr"]}"
-        f.write(test_output)
+    save_testing_output(parser_dir, testing_result)
     
     # Log the results
     print_colored(f"Tester (Iteration {iteration_count}/{max_iterations}):", colors.BLUE, bold=True)
@@ -39,17 +59,17 @@ def tester_node(state: AgentState) -> AgentState:
         "messages": [AIMessage(content=tester_response, name="Tester")],
         "user_action": state["user_action"],
         "user_request": state["user_request"],
-        "file_format": file_format,
+        "file_format": state["file_format"],
         "supervisor_specifications": state["supervisor_specifications"],
         "generator_code": state["generator_code"],
         "compiler_result": None,
         "tester_result": testing_result,
         "code_assessment": None,
-        "round": round,
+        "round": state["round"],
         "iteration_count": iteration_count,
         "max_iterations": max_iterations,
         "model_source": state["model_source"],
-        "session_dir": session_dir,
+        "session_dir": state["session_dir"],
         "next_step": "Orchestrator",
         "benchmark_metrics": state["benchmark_metrics"]
     }
\ No newline at end of file
@@ -1,68 +1,184 @@
-from csv import DictWriter
+from argparse import ArgumentParser, BooleanOptionalAction
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from traceback import format_exc
+from threading import Lock
+from traceback import format_exc, print_exc
 from langchain_core.runnables import RunnableConfig
 from models import BenchmarkMetrics
+from utils.benchmark_config import get_benchmark_config_path, load_benchmark_config, apply_settings, get_benchmark_cells, select_benchmarks, estimate_benchmarks
+from utils.benchmark_store import get_benchmark_key, append_rows, load_manifest, append_manifest, keep_manifest, keep_rows
+from utils.fake_llm import save_fake_transcript
 from utils.general import create_session
 from utils.graph import build_workflow, start_workflow
+from utils.llm_cache import set_llm_cache_namespace
 from utils.multi_agent import get_request_from_action
 from utils.single_agent import start_chat
 
 
 
+def get_benchmark_files(benchmarks_dir: Path) -> tuple[Path, Path, Path]:
+    """Get the files of the benchmarks, the events and the manifest."""
+    benchmarks_file = benchmarks_dir / "benchmark.csv"
+    # NB: long format, one row for each LLM request, compilation and execution
+    events_file = benchmarks_dir / "benchmark_events.csv"
+    # completed benchmarks (repetition, type, format, source), one JSON line each
+    manifest_file = benchmarks_dir / "benchmark_manifest.jsonl"
+    return benchmarks_file, events_file, manifest_file
+
+def save_benchmark(benchmarks_dir: Path, benchmark_metrics: BenchmarkMetrics) -> dict:
+    """Save the rows of a benchmark and mark it as completed."""
+    benchmarks_file, events_file, manifest_file = get_benchmark_files(benchmarks_dir)
+    # NB: on disk right away (rows first, then the manifest), so a crash loses at most the running benchmarks
+    benchmark = benchmark_metrics.get_benchmark()
+    append_rows(benchmarks_file, [benchmark])
+    append_rows(events_file, benchmark_metrics.get_events())
+    append_manifest(manifest_file, benchmark)
+    return benchmark
+
+def run_benchmark(graph, config: RunnableConfig, user_action: str, rep: int, type: str, format: str, source: str, attempts: int) -> BenchmarkMetrics:
+    """Run a single benchmark (a cell of the matrix)."""
+    # NB: repetitions must not share cached LLM responses (a rerun of the same repetition does)
+    set_llm_cache_namespace(f"rep_{rep}")
+
+    if type == "zero_shot":
+        # Log benchmark
+        return start_chat(source, format, n=rep, react_loops=attempts, exit_at_first=True)
+
+    # Initialize parameters
+    session_dir = create_session(source, type, format)
+    conversation_file = session_dir / "conversation.txt"
+    user_request = get_request_from_action(user_action, format)
+    benchmark_metrics = BenchmarkMetrics(rep, type, format, source)
+
+    try:
+        # Get workflow result
+        result = start_workflow(graph, config, user_action, user_request, format, 1, attempts, source, session_dir, benchmark_metrics)
+
+        # Log conversation
+        with open(conversation_file, "w", encoding="utf-8") as f:
+            for m in result["messages"]:
+                f.write(f"{m.pretty_repr()}\n\n")
+        save_fake_transcript(result["messages"], session_dir / "transcript.jsonl")
+
+        # Log benchmark
+        benchmark_metrics = result["benchmark_metrics"]
+    except Exception as e:
+        # Log error
+        with open(conversation_file, "w", encoding="utf-8") as f:
+            f.write(f"An error occurred: {e}\n\n")
+            f.write(format_exc())
+
+    return benchmark_metrics
+
 if __name__ == "__main__":
-    benchmarks_file = Path("benchmark") / "benchmark.csv"
+    parser = ArgumentParser(description="Benchmark the single-agent and multi-agent parser generation.")
+    parser.add_argument("--config", type=Path, default=get_benchmark_config_path(), help="configuration file (default: %(default)s)")
+    parser.add_argument("--resume", action="store_true", help="skip the benchmarks already completed by a previous run")
+    parser.add_argument("--dry-run", action="store_true", help="print the benchmarks to run with their estimated time and cost, without running them")
+    # subsets of the matrix
+    parser.add_argument("--reps", type=int, nargs="+", help="repetitions to run")
+    parser.add_argument("--types", nargs="+", help="types to run (multi_agent, zero_shot)")
+    parser.add_argument("--formats", nargs="+", help="formats to run")
+    parser.add_argument("--sources", nargs="+", help="sources to run")
+    parser.add_argument("--attempts", type=int, help="iterations of each benchmark")
+    # overrides of the settings
+    parser.add_argument("--timeout", type=float, help="CPU seconds of each execution of a parser (EXECUTION_TIME_LIMIT, it turns on SANDBOX_EXECUTION)")
+    parser.add_argument("--tiered-compilation", action=BooleanOptionalAction, help="compile in tiers (TIERED_COMPILATION)")
+    parser.add_argument("--set", action="append", default=[], metavar="VAR=VALUE", help="any other setting, also more times")
+    parser.add_argument("--output", type=Path, help="directory of the results")
+    # benchmarks to run again (NB: their results are replaced)
+    parser.add_argument("--rerun-failed", action="store_true", help="run again the saved benchmarks whose parsers never passed the tests")
+    parser.add_argument("--rerun-slower-than", type=float, metavar="SECONDS", help="run again the saved benchmarks that took more")
+    args = parser.parse_args()
+
+    # Initialize parameters
+    config = load_benchmark_config(args.config)
+    matrix = config["matrix"]
+    for key in ["reps", "types", "formats", "sources", "attempts"]:
+        if getattr(args, key) is not None:
+            matrix[key] = getattr(args, key)
+    settings = config["settings"]
+    if args.timeout is not None:
+        # NB: the limit is applied only by the sandbox
+        settings["EXECUTION_TIME_LIMIT"] = args.timeout
+        settings["SANDBOX_EXECUTION"] = True
+    if args.tiered_compilation is not None:
+        settings["TIERED_COMPILATION"] = args.tiered_compilation
+    for setting in args.set:
+        var, _, value = setting.partition("=")
+        settings[var.strip()] = value.strip()
+    if args.output is not None:
+        config["output"]["dir"] = str(args.output)
+
+    benchmarks_dir = Path(config["output"]["dir"])
+    benchmarks_file, events_file, manifest_file = get_benchmark_files(benchmarks_dir)
+
+    # Plan the benchmarks
+    rerun = args.rerun_failed or args.rerun_slower_than is not None
+    completed = load_manifest(manifest_file) if args.resume or rerun else set()
+    if rerun:
+        selected = select_benchmarks(benchmarks_file, args.rerun_failed, args.rerun_slower_than) & completed
+        completed -= selected
+    cells = [
+        cell for cell in get_benchmark_cells(matrix)
+        if (key := get_benchmark_key({ "n": cell[0], "type": cell[1], "file_format": cell[2], "llm": cell[3] })) not in completed
+        # NB: only the benchmarks to run again, unless also resuming
+        and (not rerun or args.resume or key in selected)
+    ]
+
+    if args.dry_run:
+        for rep, type, format, source in cells:
+            print(f"{rep:>4} {type:<12} {format:<5} {source}")
+        estimate = estimate_benchmarks(config, cells)
+        print(f"{estimate["benchmarks"]} benchmarks (skipped {len(completed)} completed), settings: {settings}")
+        print(f"Estimated time: {estimate["wall_seconds"] / 3600:.1f} h ({estimate["seconds"] / 3600:.1f} h of benchmarks)")
+        print(f"Estimated cost: ${estimate["cost"]:.2f} (+ {estimate["unknown_cost"]} benchmarks without prices or token history)")
+        raise SystemExit
+
+    if args.resume or rerun:
+        # NB: rows written just before a crash have no manifest line, their benchmarks run again (as those to rerun)
+        keep_rows(benchmarks_file, completed)
+        keep_rows(events_file, completed)
+        keep_manifest(manifest_file, completed)
+        print(f"Resuming: {len(completed)} benchmarks already completed")
+    else:
+        for file in [benchmarks_file, events_file, manifest_file]:
+            file.unlink(missing_ok=True)
+    apply_settings(settings)
 
     # Initialize the graph
     graph = build_workflow()
-    config = RunnableConfig(recursion_limit=100)
+    runnable_config = RunnableConfig(recursion_limit=100)
 
-    # Initialize parameters
-    user_action = "GENERATE_PARSER"
-    reps = range(19, 24)
-    types = [ "multi_agent", "zero_shot" ]
-    formats = [ "CSV", "HTML", "HTTP", "JSON", "PDF", "XML" ]
-    sources = [ "google", "openai", "anthropic" ]
-    attempts = 15
-    benchmarks = []
-
-    for rep in reps:
-        for type in types:
-            for format in formats:
-                for source in sources:
-                    if type == "zero_shot":
-                        # Log benchmark
-                        benchmark_metrics = start_chat(source, format, n=rep, react_loops=attempts, exit_at_first=True)
-                    else:
-                        # Initialize parameters
-                        session_dir = create_session(source, type, format)
-                        conversation_file = session_dir / "conversation.txt"
-                        user_request = get_request_from_action(user_action, format)
-                        benchmark_metrics = BenchmarkMetrics(rep, type, format, source)
-                        
-                        try:
-                            # Get workflow result
-                            result = start_workflow(graph, config, user_action, user_request, format, 1, attempts, source, session_dir, benchmark_metrics)
-
-                            # Log conversation
-                            with open(conversation_file, "w", encoding="utf-8") as f:
-                                for m in result["messages"]:
-                                    f.write(f"{m.pretty_repr()}\n\n")
-
-                            # Log benchmark
-                            benchmark_metrics = result["benchmark_metrics"]
-                        except Exception as e:
-                            # Log error
-                            with open(conversation_file, "w", encoding="utf-8") as f:
-                                f.write(f"An error occurred: {e}\n\n")
-                                f.write(format_exc())
-                    
-                    # Save benchmark
-                    benchmarks.append(benchmark_metrics.get_benchmark())
-    
-    # Log benchmark
-    with open(benchmarks_file, "w", encoding="utf-8", newline="") as f:
-        writer = DictWriter(f, fieldnames=benchmarks[0].keys())
-        writer.writeheader()
-        writer.writerows(benchmarks)
-    print(benchmarks)
\ No newline at end of file
+    # a queue for each source, in the matrix order
+    queues = { source: deque() for source in matrix["sources"] }
+    for rep, type, format, source in cells:
+        queues[source].append((rep, type, format))
+    workers = config["workers"]
+    save_lock = Lock()
+
+    def run_worker(source: str) -> None:
+        """Run the benchmarks of a source until its queue is empty."""
+        while True:
+            try:
+                rep, type, format = queues[source].popleft()
+            except IndexError:
+                return
+
+            try:
+                benchmark_metrics = run_benchmark(graph, runnable_config, matrix["user_action"], rep, type, format, source, matrix["attempts"])
+            except Exception:
+                # NB: not saved, so a resumed run tries it again
+                print_exc()
+                continue
+
+            # Save benchmark
+            with save_lock:
+                print(save_benchmark(benchmarks_dir, benchmark_metrics))
+
+    # NB: the workers of all the sources start together, so every provider is always busy
+    with ThreadPoolExecutor(max_workers=sum(workers.get(source, 1) for source in queues)) as executor:
+        futures = [ executor.submit(run_worker, source) for source in queues for _ in range(workers.get(source, 1)) ]
+        for future in futures:
+            future.result()
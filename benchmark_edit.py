@@ -1,14 +1,19 @@
 import re
+from argparse import ArgumentParser
 from csv import DictReader, DictWriter
 from pathlib import Path
 from lizard import analyze_file
-from utils.general import analyze_c_code, get_c_parser_path
+from utils.general import analyze_c_code, benchmark_c_code, get_c_parser_path
 
 
 
 if __name__ == "__main__":
+    parser = ArgumentParser(description="Add the code metrics and the performance of the best parsers to the benchmarks.")
+    parser.add_argument("--dir", type=Path, default=Path("benchmark"), help="directory of benchmark.csv (e.g. of a queue worker)")
+    args = parser.parse_args()
+
     # parameters
-    benchmarks_dir = Path("benchmark")
+    benchmarks_dir = args.dir
     benchmarks = []
 
     # read
@@ -17,7 +22,11 @@ if __name__ == "__main__":
 
     # edit
     coc_pattern = "Lines executed:"
+    performance_cols = ["throughput_mb_s", "peak_rss_kb", "latency_p50_ms", "latency_p99_ms"]
     for row in reader:
+        # NB: benchmarks recorded before the performance metrics don't have their columns
+        for col in performance_cols:
+            row[col] = row.get(col) or ""
         parser_path_str = row["best_parser_folder"]
         if parser_path_str:
             parser_path = Path(parser_path_str)
@@ -37,6 +46,11 @@ if __name__ == "__main__":
                     matches = re.search(rf"{coc_pattern}([\d.]+)% of (\d+)", lines[-1])
                     if matches:
                         row["code_coverage"] = float(matches.group(1))
+                # Performance (throughput, peak memory and latency of the optimized binary)
+                performance = benchmark_c_code(parser_path, row["file_format"])
+                for col in performance_cols:
+                    if performance[col] is not None:
+                        row[col] = performance[col]
         benchmarks.append(row)
         
     # close
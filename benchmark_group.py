@@ -1,20 +1,33 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
-import statsmodels.formula.api as smf
+from argparse import ArgumentParser, BooleanOptionalAction
+from functools import cache
 from pathlib import Path
-from matplotlib.patches import Patch
-from scipy.stats import t, ttest_ind, f_oneway, bootstrap
-from pingouin import pairwise_gameshowell
+from typing import Callable
+# NB: the other libraries (plots, models and tests) are imported only by the commands using them
 
 
 
+# defaults of the command line flags
 REPLACE_NA = False
-SHOW_PLOTS = False
 SHOW_BARPLOTS = False
-RESIDUALS_ANALYSIS = False
+
+METRICS = [
+    "compilation_iteration",
+    "testing_iteration",
+    "cyclomatic_complexity",
+    "code_coverage",
+    "execution_time",
+    "throughput_mb_s",
+    "peak_rss_kb",
+    "latency_p50_ms",
+    "latency_p99_ms"
+]
+ALPHA = 0.05
+
+def is_fresh(path: Path, source: Path) -> bool:
+    """Check if an output is newer than its source."""
+    return path.exists() and path.stat().st_mtime >= source.stat().st_mtime
 
 def beautify_col(col: str) -> str:
     return col.capitalize().replace("_", " ")
@@ -37,9 +50,117 @@ def cohens_d(x1: list[float], x2: list[float]) -> float:
     cohens_d = (mean_x1 - mean_x2) / sd_pooled
     return cohens_d
 
-if __name__ == "__main__":
+@cache
+def bootstrap_indices(n: int, n_resamples: int, random_state: int) -> np.ndarray:
+    """Get the resample indices of a sample size, shared by all the samples (groups and metrics) of that size."""
+    # NB: seeded also with the size, so the resamples don't depend on the other groups
+    rng = np.random.default_rng([random_state, n])
+    indices = rng.integers(0, n, size=(n_resamples, n))
+    indices.flags.writeable = False
+    return indices
+
+@cache
+def jackknife_indices(n: int) -> np.ndarray:
+    """Get the leave-one-out indices of a sample size (row i without i)."""
+    columns = np.arange(n - 1)
+    indices = columns[None, :] + (columns[None, :] >= np.arange(n)[:, None])
+    indices.flags.writeable = False
+    return indices
+
+def get_statistic(name: str) -> Callable[[np.ndarray], np.ndarray]:
+    """Get a statistic reducing the last axis: mean, median or a percentile (e.g. p90)."""
+    if name == "mean":
+        return lambda x: np.mean(x, axis=-1)
+    if name == "median":
+        return lambda x: np.median(x, axis=-1)
+    if name.startswith("p"):
+        return lambda x: np.percentile(x, float(name[1:]), axis=-1)
+    raise ValueError(f"Unknown statistic: {name}")
+
+def __get_quantiles(sorted_x: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Get a quantile for each row of sorted values (linear interpolation, as numpy)."""
+    position = np.clip(np.nan_to_num(q, nan=0.5), 0, 1) * (sorted_x.shape[-1] - 1)
+    lo = np.floor(position).astype(int)
+    hi = np.ceil(position).astype(int)
+    x_lo = np.take_along_axis(sorted_x, lo[:, None], axis=-1)[:, 0]
+    x_hi = np.take_along_axis(sorted_x, hi[:, None], axis=-1)[:, 0]
+    quantiles = x_lo + (x_hi - x_lo) * (position - lo)
+    return np.where(np.isnan(q), np.nan, quantiles)
+
+def bootstrap_ci(
+        samples: np.ndarray, statistic: Callable[[np.ndarray], np.ndarray], confidence_level: float = 0.95, 
+        n_resamples: int = 10000, method: str = "BCa", random_state: int = 42
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get the statistic and its bootstrap confidence interval (percentile or BCa) of many samples of the same size (one for each row)."""
+    from scipy.special import ndtr, ndtri
+
+    k, n = samples.shape
+    estimate = statistic(samples)
+    if n < 2:
+        return estimate, np.full(k, np.nan), np.full(k, np.nan)
+
+    # NB: resampled in chunks of rows, so a chunk stays around 20M values
+    indices = bootstrap_indices(n, n_resamples, random_state)
+    step = max(1, 20_000_000 // (n_resamples * n))
+    theta_b = np.concatenate([ statistic(samples[i:i + step, indices]) for i in range(0, k, step) ])
+    theta_b.sort(axis=-1)
+
+    alpha = (1 - confidence_level) / 2
+    if method == "percentile":
+        q = np.tile([alpha, 1 - alpha], (k, 1))
+    elif method == "BCa":
+        # bias correction (ties count half, as scipy)
+        less = (theta_b < estimate[:, None]).sum(axis=-1)
+        less_equal = (theta_b <= estimate[:, None]).sum(axis=-1)
+        z0 = ndtri((less + less_equal) / (2 * n_resamples))
+        # acceleration (jackknife)
+        theta_j = statistic(samples[:, jackknife_indices(n)])
+        d = theta_j.mean(axis=-1, keepdims=True) - theta_j
+        numerator = (d ** 3).sum(axis=-1)
+        denominator = 6 * (d ** 2).sum(axis=-1) ** 1.5
+        # NB: constant samples have no acceleration
+        a = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+        z = ndtri([alpha, 1 - alpha])[None, :]
+        q = ndtr(z0[:, None] + (z0[:, None] + z) / (1 - a[:, None] * (z0[:, None] + z)))
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+    return estimate, __get_quantiles(theta_b, q[:, 0]), __get_quantiles(theta_b, q[:, 1])
+
+def bootstrap_groups(
+        df: pd.DataFrame, group: list[str], metrics: list[str], statistics: list[str] = ["mean", "median"], 
+        confidence_level: float = 0.95, n_resamples: int = 10000, method: str = "BCa", random_state: int = 42
+    ) -> pd.DataFrame:
+    """Get the statistics and their bootstrap confidence intervals of all the metrics of all the groups 
+    ({statistic}_{metric}, lcb_{statistic}_{metric} and ucb_{statistic}_{metric} columns)."""
+    # samples (without missing values) by size, so each size is resampled at once
+    samples = {}
+    keys = []
+    for key, df_g in df.groupby(group):
+        keys.append(key)
+        for m in metrics:
+            values = df_g[m].dropna().to_numpy(dtype="float64")
+            if len(values) > 0:
+                samples.setdefault(len(values), []).append(((key, m), values))
+
+    rows = { key: {} for key in keys }
+    for n, items in samples.items():
+        x = np.stack([ values for _, values in items ])
+        for name in statistics:
+            estimate, lcb, ucb = bootstrap_ci(x, get_statistic(name), confidence_level, n_resamples, method, random_state)
+            for i, ((key, m), _) in enumerate(items):
+                rows[key] |= { f"{name}_{m}": estimate[i], f"lcb_{name}_{m}": lcb[i], f"ucb_{name}_{m}": ucb[i] }
+
+    columns = [ f"{prefix}{name}_{m}" for m in metrics for name in statistics for prefix in ["", "lcb_", "ucb_"] ]
+    return pd.DataFrame(
+        [ rows[key] for key in keys ], 
+        index=pd.MultiIndex.from_tuples(keys, names=group), 
+        columns=columns
+    )
+
+def derive(benchmarks_dir: Path) -> pd.DataFrame:
+    """Derive the analyzed frame from benchmarks.csv (durations in seconds, coverage as ratio, ...), saved as benchmarks_new.csv."""
     # read
-    benchmarks_dir = Path("benchmark/all")
     df = pd.read_csv(benchmarks_dir / "benchmarks.csv", encoding="utf-8", sep=",")
     
     # casts
@@ -52,6 +173,12 @@ if __name__ == "__main__":
     df["validation_time"] = pd.to_datetime(df["validation_time"])
     df["end_time"] = pd.to_datetime(df["end_time"])
 
+    # NB: benchmarks recorded before the performance metrics don't have their columns
+    for col in ["throughput_mb_s", "peak_rss_kb", "latency_p50_ms", "latency_p99_ms"]:
+        if col not in df.columns:
+            df[col] = np.nan
+        df[col] = df[col].astype("float64")
+
     # edits
     df["code_coverage"] /= 100
     df.loc[df["type"] == "zero_shot", "type"] = "single_agent"
@@ -68,222 +195,274 @@ if __name__ == "__main__":
         "start_time", "compilation_time", "testing_time", "validation_time", "end_time"
     ], inplace=True)
 
-    # save
+    # save (NB: the CSV is rounded, the cache of the later stages keeps the full precision)
     df.to_csv(benchmarks_dir / f"benchmarks_new.csv", encoding="utf-8", sep=",", na_rep="", float_format="%.4f", index=False)
-    
+    df.to_pickle(benchmarks_dir / "benchmarks_new.pkl")
+
+    return df
+
+def load_derived(benchmarks_dir: Path, refresh: bool = False) -> pd.DataFrame:
+    """Load the derived frame, deriving it again only if benchmarks.csv is newer (or if asked), indexed by benchmark."""
+    derived_path = benchmarks_dir / "benchmarks_new.pkl"
+    if refresh or not is_fresh(derived_path, benchmarks_dir / "benchmarks.csv"):
+        df = derive(benchmarks_dir)
+    else:
+        df = pd.read_pickle(derived_path)
+
+    # set index and check it
+    df["index"] = df["n"].astype("string") + "|" + df["type"] + "|" + df["file_format"] + "|" + df["llm"]
+    df.set_index("index", inplace=True, verify_integrity=True)
+    return df
+
+def replace_na(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace the missing iterations, complexity and coverage with their worst values."""
+    df_new = df.copy()
+    #df_new.loc[df_new["compilation_iteration"].isna(), "compilation_iteration"] = 16
+    df_new["compilation_iteration"] = df_new["compilation_iteration"].fillna(16)
+    df_new["testing_iteration"] = df_new["testing_iteration"].fillna(16)
+    df_new["cyclomatic_complexity"] = df_new["cyclomatic_complexity"].fillna(max(df_new["cyclomatic_complexity"]))
+    df_new["code_coverage"] = df_new["code_coverage"].fillna(0)
+    return df_new
+
+def get_correlations(df: pd.DataFrame) -> pd.DataFrame:
+    """Get the correlations of the metrics (short names)."""
     # calculate correlations
     df_corr = df[[
         "compilation_iteration", 
         "testing_iteration", 
         "cyclomatic_complexity", 
         "code_coverage",
-        "execution_time"
+        "execution_time",
+        "throughput_mb_s",
+        "peak_rss_kb",
+        "latency_p50_ms"
     ]].rename(columns={
         "compilation_iteration": "Comp. Iter.", 
         "testing_iteration": "Test. Iter.", 
         "cyclomatic_complexity": "Cyc. Complex.",
         "code_coverage": "Code Cov.",
-        "execution_time": "Time"
+        "execution_time": "Time",
+        "throughput_mb_s": "Throughput",
+        "peak_rss_kb": "Peak RSS",
+        "latency_p50_ms": "Latency"
     }).corr()
+    return df_corr
 
-    # set index and check it
-    df["index"] = df["n"].astype("string") + "|" + df["type"] + "|" + df["file_format"] + "|" + df["llm"]
-    df.set_index("index", inplace=True, verify_integrity=True)
-    
-    df.info()
-    print(df)
-
+def beautify_values(df: pd.DataFrame) -> pd.DataFrame:
+    """Get the frame with friendly names of architectures and LLMs (and of their columns)."""
     df_new = df.copy()
-    if REPLACE_NA:
-        #df_new.loc[df_new["compilation_iteration"].isna(), "compilation_iteration"] = 16
-        df_new["compilation_iteration"] = df_new["compilation_iteration"].fillna(16)
-        df_new["testing_iteration"] = df_new["testing_iteration"].fillna(16)
-        df_new["cyclomatic_complexity"] = df_new["cyclomatic_complexity"].fillna(max(df_new["cyclomatic_complexity"]))
-        df_new["code_coverage"] = df_new["code_coverage"].fillna(0)
-
-    if SHOW_PLOTS:
-        # Initialization
-        barWidth = 0.25
-        br1 = np.arange(16) 
-        br2 = [i + barWidth for i in br1]
-        br3 = [i + barWidth for i in br2]
-        binsCyc = [1, 10, 20, 50, 180]
-        #binsCyc = [1, 11, 21, 51, 171]
-        #binsCyc = range(1, 172, 10)
-        binsCod = np.arange(0, 1.1, 0.1)
-        binsExt = np.arange(0, 2281, 120)
-        bins = [binsCyc, binsCod, binsExt]
-        cols = ["cyclomatic_complexity", "code_coverage", "execution_time"]
-        it_cols = ["compilation_iteration", "testing_iteration"]
-        legend_steps = [
-            Patch(facecolor="olive", label="Compilation", alpha=0.8),
-            Patch(facecolor="darkgreen", label="Testing", alpha=0.8),
-        ]
-        legend_archs = [
-            Patch(facecolor="orange", label="Single-agent", alpha=0.6),
-            Patch(facecolor="purple", label="Multi-agent", alpha=0.6),
-        ]
-        median_style = {"color": "red", "linewidth": 1.5}
+    # name friendly
+    col = "type"
+    df_new.loc[df_new[col] == "single_agent", col] = "Single-agent"
+    df_new.loc[df_new[col] == "multi_agent", col] = "Multi-agent"
+    col = "llm"
+    df_new.loc[df_new[col] == "anthropic", col] = "Anthropic"
+    df_new.loc[df_new[col] == "google", col] = "Google"
+    df_new.loc[df_new[col] == "openai", col] = "OpenAI"
+    df_new.rename(columns={
+        "type": "Architecture",
+        "file_format": "File format",
+        "llm": "LLM"
+    }, inplace=True)
+    return df_new
 
-        # Set global window size
-        plt.rcParams.update({
-            "figure.figsize": (11, 7),
-            "figure.dpi": 100
-        })
+def plots(df_new: pd.DataFrame, df_corr: pd.DataFrame, show_barplots: bool = SHOW_BARPLOTS) -> None:
+    """Show the plots of the correlations and of the metrics of each architecture."""
+    # NB: the plotting libraries only here, they are the slowest to import
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from matplotlib.patches import Patch
 
-        # Correlation heatmap plot
-        mask = np.triu(df_corr)
-        np.fill_diagonal(mask, 0)
-        ax = sns.heatmap(df_corr, mask=mask, annot=True, fmt=".3f", cmap="RdYlGn", vmin=-1, vmax=1, center=0, annot_kws={"size": 14})
-        ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
-        plt.title("Correlation Heatmap")
-        plt.show()
+    # Initialization
+    barWidth = 0.25
+    br1 = np.arange(16) 
+    br2 = [i + barWidth for i in br1]
+    br3 = [i + barWidth for i in br2]
+    binsCyc = [1, 10, 20, 50, 180]
+    #binsCyc = [1, 11, 21, 51, 171]
+    #binsCyc = range(1, 172, 10)
+    binsCod = np.arange(0, 1.1, 0.1)
+    binsExt = np.arange(0, 2281, 120)
+    bins = [binsCyc, binsCod, binsExt]
+    cols = ["cyclomatic_complexity", "code_coverage", "execution_time"]
+    it_cols = ["compilation_iteration", "testing_iteration"]
+    legend_steps = [
+        Patch(facecolor="olive", label="Compilation", alpha=0.8),
+        Patch(facecolor="darkgreen", label="Testing", alpha=0.8),
+    ]
+    legend_archs = [
+        Patch(facecolor="orange", label="Single-agent", alpha=0.6),
+        Patch(facecolor="purple", label="Multi-agent", alpha=0.6),
+    ]
+    median_style = {"color": "red", "linewidth": 1.5}
+
+    # Set global window size
+    plt.rcParams.update({
+        "figure.figsize": (11, 7),
+        "figure.dpi": 100
+    })
 
-        #raise SystemExit
+    # Correlation heatmap plot
+    mask = np.triu(df_corr)
+    np.fill_diagonal(mask, 0)
+    ax = sns.heatmap(df_corr, mask=mask, annot=True, fmt=".3f", cmap="RdYlGn", vmin=-1, vmax=1, center=0, annot_kws={"size": 14})
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
+    plt.title("Correlation Heatmap")
+    plt.show()
+
+    #raise SystemExit
+
+    # Architecture plots
+    archs = ["Single-agent", "Multi-agent"]
+    df_sa = df_new[df_new["type"] == "single_agent"]
+    df_ma = df_new[df_new["type"] == "multi_agent"]
+    ## Boxplot
+    data = [
+        df_sa["compilation_iteration"].dropna(), 
+        df_sa["testing_iteration"].dropna(), 
+        df_ma["compilation_iteration"].dropna(),
+        df_ma["testing_iteration"].dropna()
+    ]
+    bp = plt.boxplot(
+        data, 
+        positions=[1, 2, 4, 5], 
+        patch_artist=True,
+        medianprops=median_style
+    )
+    for i in range(len(data)):
+        c = legend_steps[0 if (i % 2) == 0 else 1].get_facecolor()
+        bp["boxes"][i].set_facecolor(c)
+    tick_positions = [1.5, 4.5]
+    plt.xticks(tick_positions, archs)
+    plt.title("Compilation and Testing")
+    plt.ylabel("Iterations")
+    plt.legend(handles=legend_steps, loc="best")
+    plt.show()
+    if show_barplots:
+        ## Barplot
+        fig, axes = plt.subplots(2, 1, figsize=(12, 9))
+        for i, it_col in enumerate(it_cols):
+            df_sa_col = [ df_sa.loc[df_sa[it_col] == j + 1, it_col].count() for j in br1 ]
+            df_ma_col = [ df_ma.loc[df_ma[it_col] == j + 1, it_col].count() for j in br1 ] 
+            axes[i].bar(br1, df_sa_col, color=legend_archs[0].get_facecolor(), edgecolor="grey", width=barWidth, label="Single-agent") 
+            axes[i].bar(br2, df_ma_col, color=legend_archs[1].get_facecolor(), edgecolor="grey", width=barWidth, label="Multi-agent") 
+            axes[i].set_title(beautify_col(it_col))
+            axes[i].set_xticks([j + (barWidth/2) for j in br1], br1 + 1)
+            axes[i].set_ylim(0, 280)
+            axes[i].legend(handles=legend_archs, loc="upper center")
+        axes[-1].set_xlabel("Iterations")
+        plt.tight_layout()
+        plt.show()
 
-        # Architecture plots
-        archs = ["Single-agent", "Multi-agent"]
-        df_sa = df_new[df_new["type"] == "single_agent"]
-        df_ma = df_new[df_new["type"] == "multi_agent"]
+    for i in range(len(cols)):
+        col = cols[i]
+        ticks = bins[i]
         ## Boxplot
         data = [
-            df_sa["compilation_iteration"].dropna(), 
-            df_sa["testing_iteration"].dropna(), 
-            df_ma["compilation_iteration"].dropna(),
-            df_ma["testing_iteration"].dropna()
+            df_sa[col].dropna(), 
+            df_ma[col].dropna()
         ]
         bp = plt.boxplot(
-            data, 
-            positions=[1, 2, 4, 5], 
-            patch_artist=True,
+            data,
+            tick_labels=archs,
+            patch_artist=True, 
             medianprops=median_style
         )
-        for i in range(len(data)):
-            c = legend_steps[0 if (i % 2) == 0 else 1].get_facecolor()
-            bp["boxes"][i].set_facecolor(c)
-        tick_positions = [1.5, 4.5]
-        plt.xticks(tick_positions, archs)
-        plt.title("Compilation and Testing")
-        plt.ylabel("Iterations")
-        plt.legend(handles=legend_steps, loc="best")
+        for j in range(len(data)):
+            c = legend_archs[j].get_facecolor()
+            bp["boxes"][j].set_facecolor(c)
+        plt.title(beautify_col(col))
+        plt.show()
+        ## Histogram
+        for j in range(len(data)):
+            c = legend_archs[j].get_facecolor()
+            #sns.histplot(np.log(data[j]), color=c, edgecolor=c, label=archs[j], kde=True)
+            sns.histplot(data[j], color=c, edgecolor=c, label=archs[j], bins=ticks, kde=True)
+        plt.title(f"{beautify_col(col)} (KDE)")
+        plt.xlabel("")
+        plt.xticks(ticks)
+        plt.legend()
+        plt.tight_layout()
         plt.show()
-        if SHOW_BARPLOTS:
-            ## Barplot
-            fig, axes = plt.subplots(2, 1, figsize=(12, 9))
-            for i, it_col in enumerate(it_cols):
-                df_sa_col = [ df_sa.loc[df_sa[it_col] == j + 1, it_col].count() for j in br1 ]
-                df_ma_col = [ df_ma.loc[df_ma[it_col] == j + 1, it_col].count() for j in br1 ] 
-                axes[i].bar(br1, df_sa_col, color=legend_archs[0].get_facecolor(), edgecolor="grey", width=barWidth, label="Single-agent") 
-                axes[i].bar(br2, df_ma_col, color=legend_archs[1].get_facecolor(), edgecolor="grey", width=barWidth, label="Multi-agent") 
-                axes[i].set_title(beautify_col(it_col))
-                axes[i].set_xticks([j + (barWidth/2) for j in br1], br1 + 1)
-                axes[i].set_ylim(0, 280)
-                axes[i].legend(handles=legend_archs, loc="upper center")
-            axes[-1].set_xlabel("Iterations")
-            plt.tight_layout()
-            plt.show()
-
-        for i in range(len(cols)):
-            col = cols[i]
-            ticks = bins[i]
-            ## Boxplot
-            data = [
-                df_sa[col].dropna(), 
-                df_ma[col].dropna()
-            ]
-            bp = plt.boxplot(
-                data,
-                tick_labels=archs,
-                patch_artist=True, 
-                medianprops=median_style
-            )
-            for j in range(len(data)):
-                c = legend_archs[j].get_facecolor()
-                bp["boxes"][j].set_facecolor(c)
-            plt.title(beautify_col(col))
-            plt.show()
-            ## Histogram
-            for j in range(len(data)):
-                c = legend_archs[j].get_facecolor()
-                #sns.histplot(np.log(data[j]), color=c, edgecolor=c, label=archs[j], kde=True)
-                sns.histplot(data[j], color=c, edgecolor=c, label=archs[j], bins=ticks, kde=True)
-            plt.title(f"{beautify_col(col)} (KDE)")
-            plt.xlabel("")
-            plt.xticks(ticks)
-            plt.legend()
-            plt.tight_layout()
-            plt.show()
 
-    #raise SystemExit
+def residuals(df_new: pd.DataFrame) -> None:
+    """Residuals analysis of the log-normal models."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import statsmodels.formula.api as smf
 
-    if RESIDUALS_ANALYSIS:
-        fig1, axes1 = plt.subplots(1, 3, figsize=(10, 5))
-        fig2, axes2 = plt.subplots(3, 3, figsize=(16, 8))
-        fig3, axes3 = plt.subplots(1, 3, figsize=(10, 5))
-        j = 0
-        df_t_count = pd.DataFrame()
-        for outcome in ["testing_iteration", "execution_time", "cyclomatic_complexity"]:
-            # log-normal
-            model = smf.ols(
-                formula=f"np.log({outcome}) ~ type + llm + file_format",
-                data=df_new
-            ).fit()
-            print(model.summary())
-
-            # fitted values
-            fitted = model.fittedvalues
-            # standard residuals
-            residuals = model.resid_pearson
-            
-            # -----------------------------
-            # 1. Fitted vs Residuals plot (Well specified predictors check)
-            # (if there are trends, then it's required to add interactions or other predictors)
-            # -----------------------------
-            sns.scatterplot(x=fitted, y=residuals, ax=axes1[j])
-            axes1[j].axhline(0, linestyle='--')
-            axes1[j].set_xlabel("Fitted values")
-            axes1[j].set_ylabel("Std. residuals")
-            axes1[j].set_title(f"{beautify_col(outcome)}")
-            
-            # -----------------------------------------
-            # 2. Covariate vs Residuals boxplots (Heteroskedasticity check)
-            # -----------------------------------------
-            for i, var in enumerate(["type", "llm", "file_format"]):
-                ddd = df_new.loc[model.resid.index, var]
-                sns.boxplot(x=ddd, y=residuals, ax=axes2[j, i])
-                axes2[j, i].set_xlabel(var)
-                axes2[j, i].set_ylabel("Std. residuals")
-                axes2[j, i].set_title(f"{beautify_col(outcome)}")
-            
-            # -----------------------------
-            # 3. Residuals Boxplot (Normal distribution check with mean equal to 0)
-            # -----------------------------
-            sns.boxplot(y=residuals, ax=axes3[j])
-            axes3[j].set_ylabel("Std. residuals")
-            axes3[j].set_title(f"{beautify_col(outcome)}")
-
-            j = j + 1
-
-            effect = np.exp(model.params["type[T.single_agent]"])
-            ci = np.exp(model.conf_int().loc["type[T.single_agent]"])
-
-            d = pd.DataFrame([{
-                "Metric": beautify_col(outcome),
-                "Model": "Log-Normal",
-                "$p$-value": model.pvalues["type[T.single_agent]"],
-                "Effect": effect,
-                "$CI_l$": ci.values[0],
-                "$CI_u$": ci.values[1]
-            }])
-            df_t_count = pd.concat([df_t_count, d])
-
-        print(df_t_count)
-        fig1.tight_layout()
-        fig2.tight_layout()
-        fig3.tight_layout()
-        plt.show()
+    fig1, axes1 = plt.subplots(1, 3, figsize=(10, 5))
+    fig2, axes2 = plt.subplots(3, 3, figsize=(16, 8))
+    fig3, axes3 = plt.subplots(1, 3, figsize=(10, 5))
+    j = 0
+    df_t_count = pd.DataFrame()
+    for outcome in ["testing_iteration", "execution_time", "cyclomatic_complexity"]:
+        # log-normal
+        model = smf.ols(
+            formula=f"np.log({outcome}) ~ type + llm + file_format",
+            data=df_new
+        ).fit()
+        print(model.summary())
 
-        raise SystemExit
+        # fitted values
+        fitted = model.fittedvalues
+        # standard residuals
+        residuals = model.resid_pearson
+
+        # -----------------------------
+        # 1. Fitted vs Residuals plot (Well specified predictors check)
+        # (if there are trends, then it's required to add interactions or other predictors)
+        # -----------------------------
+        sns.scatterplot(x=fitted, y=residuals, ax=axes1[j])
+        axes1[j].axhline(0, linestyle='--')
+        axes1[j].set_xlabel("Fitted values")
+        axes1[j].set_ylabel("Std. residuals")
+        axes1[j].set_title(f"{beautify_col(outcome)}")
+
+        # -----------------------------------------
+        # 2. Covariate vs Residuals boxplots (Heteroskedasticity check)
+        # -----------------------------------------
+        for i, var in enumerate(["type", "llm", "file_format"]):
+            ddd = df_new.loc[model.resid.index, var]
+            sns.boxplot(x=ddd, y=residuals, ax=axes2[j, i])
+            axes2[j, i].set_xlabel(var)
+            axes2[j, i].set_ylabel("Std. residuals")
+            axes2[j, i].set_title(f"{beautify_col(outcome)}")
+
+        # -----------------------------
+        # 3. Residuals Boxplot (Normal distribution check with mean equal to 0)
+        # -----------------------------
+        sns.boxplot(y=residuals, ax=axes3[j])
+        axes3[j].set_ylabel("Std. residuals")
+        axes3[j].set_title(f"{beautify_col(outcome)}")
+
+        j = j + 1
+
+        effect = np.exp(model.params["type[T.single_agent]"])
+        ci = np.exp(model.conf_int().loc["type[T.single_agent]"])
+
+        d = pd.DataFrame([{
+            "Metric": beautify_col(outcome),
+            "Model": "Log-Normal",
+            "$p$-value": model.pvalues["type[T.single_agent]"],
+            "Effect": effect,
+            "$CI_l$": ci.values[0],
+            "$CI_u$": ci.values[1]
+        }])
+        df_t_count = pd.concat([df_t_count, d])
+
+    print(df_t_count)
+    fig1.tight_layout()
+    fig2.tight_layout()
+    fig3.tight_layout()
+    plt.show()
+
+def tests(benchmarks_dir: Path, df_new: pd.DataFrame) -> None:
+    """Effect of the architecture: GLM (with the other factors), bootstrap intervals and Welch tests, saved as LaTeX tables."""
+    import statsmodels.api as sm
+    import statsmodels.formula.api as smf
+    from pingouin import pairwise_gameshowell
+    from scipy.stats import t, ttest_ind, f_oneway
 
     models = {
         #"compilation_iteration": {
@@ -353,53 +532,19 @@ if __name__ == "__main__":
     with open(benchmarks_dir / f"benchmarks_t_count.tex", "w", encoding="utf-8") as f:
         f.write(df_t_count.to_latex(None, float_format="%.3f"))
 
-    #raise SystemExit
-
-    metrics = [
-        "compilation_iteration",
-        "testing_iteration",
-        "cyclomatic_complexity",
-        "code_coverage",
-        "execution_time"
-    ]
-    alpha = 0.05
-
-    for m in metrics:
-        print(m)
-        x1 = df_new.loc[df_new["type"] == "multi_agent", m].dropna()
-        x2 = df_new.loc[df_new["type"] == "single_agent", m].dropna()
-        for data in [x1, x2]:
-            result = bootstrap(
-                (data,),
-                statistic = np.mean,
-                confidence_level=0.95,
-                n_resamples=10000,
-                method="BCa",
-                random_state=42
-            )
-            print(result.confidence_interval)
-    
-    #raise SystemExit
-
-    # name friendly
-    col = "type"
-    df_new.loc[df_new[col] == "single_agent", col] = "Single-agent"
-    df_new.loc[df_new[col] == "multi_agent", col] = "Multi-agent"
-    col = "llm"
-    df_new.loc[df_new[col] == "anthropic", col] = "Anthropic"
-    df_new.loc[df_new[col] == "google", col] = "Google"
-    df_new.loc[df_new[col] == "openai", col] = "OpenAI"
-    df_new.rename(columns={
-        "type": "Architecture",
-        "file_format": "File format",
-        "llm": "LLM"
-    }, inplace=True)
+    # NB: all the metrics of both architectures at once (metrics not measured yet have no interval)
+    df_bootstrap = bootstrap_groups(df_new, ["type"], METRICS)
+    print(df_bootstrap.T)
 
+    df_new = beautify_values(df_new)
     df_t_tests = pd.DataFrame()
-    for m in metrics:
+    for m in METRICS:
         print(m)
         x1 = df_new.loc[df_new["Architecture"] == "Multi-agent", m].dropna()
         x2 = df_new.loc[df_new["Architecture"] == "Single-agent", m].dropna()
+        if (len(x1) < 2) or (len(x2) < 2):
+            # e.g. performance metrics not measured yet
+            continue
         if False:
             # it's the same damn thing
             res = ttest_ind(
@@ -420,7 +565,7 @@ if __name__ == "__main__":
         print(res)
         d = pairwise_gameshowell(dv=m, between="Architecture", data=df_new, effsize="cohen")
         d["Metric"] = beautify_col(m)
-        d["CI"] = t.ppf(1 - (alpha / 2), df=d["df"]) * d["se"]
+        d["CI"] = t.ppf(1 - (ALPHA / 2), df=d["df"]) * d["se"]
         d["CI_l"] = d["diff"] - d["CI"]
         d["CI_u"] = d["diff"] + d["CI"]
         df_t_tests = pd.concat([df_t_tests, d])
@@ -440,8 +585,11 @@ if __name__ == "__main__":
     with open(benchmarks_dir / f"benchmarks_t_tests.tex", "w", encoding="utf-8") as f:
         f.write(df_t_tests.to_latex(None, float_format="%.3f"))
 
-    #raise SystemExit
+def group_statistics(benchmarks_dir: Path, df_new: pd.DataFrame) -> None:
+    """Statistics of the metrics for each group, saved as HTML and LaTeX tables."""
+    from scipy.stats import t
 
+    df_new = beautify_values(df_new)
     groups = {
         #"tfl": ["Architecture", "LLM", "File format"],
         "t": ["Architecture"],
@@ -476,20 +624,47 @@ if __name__ == "__main__":
             avg_execution_time=("execution_time", "mean"),
             std_execution_time=("execution_time", "std"),
             med_execution_time=("execution_time", "median"),
-            cnt_execution_time=("execution_time", "count")
+            cnt_execution_time=("execution_time", "count"),
+
+            avg_throughput_mb_s=("throughput_mb_s", "mean"),
+            std_throughput_mb_s=("throughput_mb_s", "std"),
+            med_throughput_mb_s=("throughput_mb_s", "median"),
+            cnt_throughput_mb_s=("throughput_mb_s", "count"),
+
+            avg_peak_rss_kb=("peak_rss_kb", "mean"),
+            std_peak_rss_kb=("peak_rss_kb", "std"),
+            med_peak_rss_kb=("peak_rss_kb", "median"),
+            cnt_peak_rss_kb=("peak_rss_kb", "count"),
+
+            avg_latency_p50_ms=("latency_p50_ms", "mean"),
+            std_latency_p50_ms=("latency_p50_ms", "std"),
+            med_latency_p50_ms=("latency_p50_ms", "median"),
+            cnt_latency_p50_ms=("latency_p50_ms", "count"),
+
+            avg_latency_p99_ms=("latency_p99_ms", "mean"),
+            std_latency_p99_ms=("latency_p99_ms", "std"),
+            med_latency_p99_ms=("latency_p99_ms", "median"),
+            cnt_latency_p99_ms=("latency_p99_ms", "count")
+        )
+        # bootstrap confidence intervals (mean and median)
+        bootstrap_groups(df_new, group, METRICS).to_csv(
+            benchmarks_dir / f"benchmarks_{name}_bootstrap.csv", 
+            encoding="utf-8", 
+            float_format="%.4f"
         )
+
         # group rate calculation
         df_group["compilation_rate"] = df_group["cnt_compilation_iteration"] / df_group["cnt_all"]
         df_group["testing_rate"] = df_group["cnt_testing_iteration"] / df_group["cnt_all"]
         df_group.drop(columns=["cnt_all"], inplace=True)
 
-        for m in metrics:
+        for m in METRICS:
             # parameters
             means = df_group[f"avg_{m}"]
             stds = df_group[f"std_{m}"]
             ns = df_group[f"cnt_{m}"]
             se = stds / np.sqrt(ns) # standard error
-            ci = t.ppf(1 - (alpha / 2), df=ns-1) * se
+            ci = t.ppf(1 - (ALPHA / 2), df=ns-1) * se
             # calculations
             df_group[f"lcb_{m}"] = means - ci
             df_group[f"ucb_{m}"] = means + ci
@@ -527,7 +702,31 @@ if __name__ == "__main__":
             "std_execution_time",
             "med_execution_time",
             "lcb_execution_time",
-            "ucb_execution_time"
+            "ucb_execution_time",
+            "cnt_throughput_mb_s",
+            "avg_throughput_mb_s",
+            "std_throughput_mb_s",
+            "med_throughput_mb_s",
+            "lcb_throughput_mb_s",
+            "ucb_throughput_mb_s",
+            "cnt_peak_rss_kb",
+            "avg_peak_rss_kb",
+            "std_peak_rss_kb",
+            "med_peak_rss_kb",
+            "lcb_peak_rss_kb",
+            "ucb_peak_rss_kb",
+            "cnt_latency_p50_ms",
+            "avg_latency_p50_ms",
+            "std_latency_p50_ms",
+            "med_latency_p50_ms",
+            "lcb_latency_p50_ms",
+            "ucb_latency_p50_ms",
+            "cnt_latency_p99_ms",
+            "avg_latency_p99_ms",
+            "std_latency_p99_ms",
+            "med_latency_p99_ms",
+            "lcb_latency_p99_ms",
+            "ucb_latency_p99_ms"
         ]]
 
         # print
@@ -567,7 +766,31 @@ if __name__ == "__main__":
             "std_execution_time": "σ Execution time",
             "med_execution_time": "η Execution time",
             "lcb_execution_time": "LCB Execution time",
-            "ucb_execution_time": "UCB Execution time"
+            "ucb_execution_time": "UCB Execution time",
+            "cnt_throughput_mb_s": "n Throughput (MB/s)",
+            "avg_throughput_mb_s": "μ Throughput (MB/s)",
+            "std_throughput_mb_s": "σ Throughput (MB/s)",
+            "med_throughput_mb_s": "η Throughput (MB/s)",
+            "lcb_throughput_mb_s": "LCB Throughput (MB/s)",
+            "ucb_throughput_mb_s": "UCB Throughput (MB/s)",
+            "cnt_peak_rss_kb": "n Peak RSS (KB)",
+            "avg_peak_rss_kb": "μ Peak RSS (KB)",
+            "std_peak_rss_kb": "σ Peak RSS (KB)",
+            "med_peak_rss_kb": "η Peak RSS (KB)",
+            "lcb_peak_rss_kb": "LCB Peak RSS (KB)",
+            "ucb_peak_rss_kb": "UCB Peak RSS (KB)",
+            "cnt_latency_p50_ms": "n Latency p50 (ms)",
+            "avg_latency_p50_ms": "μ Latency p50 (ms)",
+            "std_latency_p50_ms": "σ Latency p50 (ms)",
+            "med_latency_p50_ms": "η Latency p50 (ms)",
+            "lcb_latency_p50_ms": "LCB Latency p50 (ms)",
+            "ucb_latency_p50_ms": "UCB Latency p50 (ms)",
+            "cnt_latency_p99_ms": "n Latency p99 (ms)",
+            "avg_latency_p99_ms": "μ Latency p99 (ms)",
+            "std_latency_p99_ms": "σ Latency p99 (ms)",
+            "med_latency_p99_ms": "η Latency p99 (ms)",
+            "lcb_latency_p99_ms": "LCB Latency p99 (ms)",
+            "ucb_latency_p99_ms": "UCB Latency p99 (ms)"
         })
 
         # overall
@@ -670,7 +893,31 @@ if __name__ == "__main__":
             "μ Code coverage",
             "σ Code coverage",
             "LCB Code coverage",
-            "UCB Code coverage"
+            "UCB Code coverage",
+            "n Throughput (MB/s)",
+            "η Throughput (MB/s)",
+            "μ Throughput (MB/s)",
+            "σ Throughput (MB/s)",
+            "LCB Throughput (MB/s)",
+            "UCB Throughput (MB/s)",
+            "n Peak RSS (KB)",
+            "η Peak RSS (KB)",
+            "μ Peak RSS (KB)",
+            "σ Peak RSS (KB)",
+            "LCB Peak RSS (KB)",
+            "UCB Peak RSS (KB)",
+            "n Latency p50 (ms)",
+            "η Latency p50 (ms)",
+            "μ Latency p50 (ms)",
+            "σ Latency p50 (ms)",
+            "LCB Latency p50 (ms)",
+            "UCB Latency p50 (ms)",
+            "n Latency p99 (ms)",
+            "η Latency p99 (ms)",
+            "μ Latency p99 (ms)",
+            "σ Latency p99 (ms)",
+            "LCB Latency p99 (ms)",
+            "UCB Latency p99 (ms)"
         ]]
         
         metrics_out = [
@@ -678,7 +925,11 @@ if __name__ == "__main__":
             "Testing iterations",
             "Execution time",
             "Cyclomatic complexity",
-            "Code coverage"
+            "Code coverage",
+            "Throughput (MB/s)",
+            "Peak RSS (KB)",
+            "Latency p50 (ms)",
+            "Latency p99 (ms)"
         ]
         my_list = []
         for mo in metrics_out:
@@ -712,6 +963,18 @@ if __name__ == "__main__":
             float_format="%.3f", 
             border=False
         )
+        # only performance
+        df_html[[
+            "Throughput (MB/s)",
+            "Peak RSS (KB)",
+            "Latency p50 (ms)",
+            "Latency p99 (ms)"
+        ]].to_html(
+            benchmarks_dir / f"benchmarks_{name}_4.html", 
+            encoding="utf-8", 
+            float_format="%.3f", 
+            border=False
+        )
 
         # for latex (convert population symbols to sample symbols)
         df_html.rename(columns={
@@ -727,7 +990,11 @@ if __name__ == "__main__":
             "Testing iterations",
             "Execution time",
             "Cyclomatic complexity",
-            "Code coverage"
+            "Code coverage",
+            "Throughput (MB/s)",
+            "Peak RSS (KB)",
+            "Latency p50 (ms)",
+            "Latency p99 (ms)"
         ]:
             df_latex_sub = df_html[col].copy()
             df_latex_sub["Metric"] = col
@@ -736,3 +1003,48 @@ if __name__ == "__main__":
         df_latex.set_index(["Metric"] + group, inplace=True)
         with open(benchmarks_dir / f"benchmarks_{name}.tex", "w", encoding="utf-8") as f:
             f.write(df_latex.to_latex(None, float_format="%.3f", multirow=False))
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Statistics, tests and plots of the benchmarks.")
+    parser.add_argument("--dir", type=Path, default=Path("benchmark/all"), help="directory of benchmarks.csv, and of the outputs (default: %(default)s)")
+    parser.add_argument("--refresh", action="store_true", help="derive the benchmarks again even if newer than benchmarks.csv")
+    parser.add_argument("--replace-na", action=BooleanOptionalAction, default=REPLACE_NA, help="replace the missing iterations, complexity and coverage with their worst values")
+    subparsers = parser.add_subparsers(dest="command", help="all but residuals and plots, if omitted")
+    subparsers.add_parser("derive", help="derive benchmarks_new.csv from benchmarks.csv")
+    subparsers.add_parser("correlations", help="correlations of the metrics, saved as benchmarks_corr.csv")
+    subparsers.add_parser("tests", help="effect of the architecture, saved as benchmarks_t_count.tex and benchmarks_t_tests.tex")
+    subparsers.add_parser("groups", help="statistics of each group, saved as HTML, LaTeX and bootstrap CSV tables")
+    subparsers.add_parser("residuals", help="residuals analysis of the log-normal models")
+    plots_parser = subparsers.add_parser("plots", help="show the plots")
+    plots_parser.add_argument("--show-barplots", action=BooleanOptionalAction, default=SHOW_BARPLOTS, help="show also the bar plots of the iterations")
+    args = parser.parse_args()
+
+    # read (NB: derived again only if the benchmarks changed)
+    benchmarks_dir = args.dir
+    df = load_derived(benchmarks_dir, args.refresh or args.command == "derive")
+    if args.command == "derive":
+        df.info()
+        print(df)
+        raise SystemExit
+
+    df_new = replace_na(df) if args.replace_na else df.copy()
+    commands = [args.command] if args.command else ["correlations", "tests", "groups"]
+
+    if "correlations" in commands or "plots" in commands:
+        # NB: the CSV is rounded, the cache keeps the full precision
+        corr_path = benchmarks_dir / "benchmarks_corr.pkl"
+        if is_fresh(corr_path, benchmarks_dir / "benchmarks_new.pkl"):
+            df_corr = pd.read_pickle(corr_path)
+        else:
+            df_corr = get_correlations(df)
+            df_corr.to_csv(benchmarks_dir / "benchmarks_corr.csv", encoding="utf-8", sep=",", float_format="%.4f")
+            df_corr.to_pickle(corr_path)
+        print(df_corr)
+    if "plots" in commands:
+        plots(df_new, df_corr, args.show_barplots)
+    if "residuals" in commands:
+        residuals(df_new)
+    if "tests" in commands:
+        tests(benchmarks_dir, df_new)
+    if "groups" in commands:
+        group_statistics(benchmarks_dir, df_new)
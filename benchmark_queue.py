@@ -0,0 +1,131 @@
+import os, socket
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Event, Lock, Thread
+from time import sleep
+from traceback import print_exc
+from langchain_core.runnables import RunnableConfig
+from benchmark import get_benchmark_files, run_benchmark, save_benchmark
+from utils.benchmark_config import get_benchmark_config_path, load_benchmark_config, apply_settings, get_benchmark_cells
+from utils.benchmark_store import merge_rows
+from utils.graph import build_workflow
+from utils.work_queue import WorkQueue, get_work_queue_path
+
+
+
+def get_workers_dir() -> Path:
+    return Path("benchmark") / "workers"
+
+def __keep_lease(queue: WorkQueue, cell: tuple[int, str, str, str], worker: str, stop: Event, every: float) -> None:
+    """Renew the lease of a running benchmark until it stops."""
+    while not stop.wait(every):
+        if not queue.heartbeat(cell, worker):
+            # NB: the benchmark keeps running, the first results saved win when merging
+            print(f"Lease lost: {cell}")
+            return
+
+def init(queue: WorkQueue, config: dict) -> None:
+    added = queue.add(get_benchmark_cells(config["matrix"]))
+    print(f"Queued {added} benchmarks: {queue.get_counts()}")
+
+def work(queue: WorkQueue, config: dict, worker: str, results_dir: Path) -> None:
+    # NB: a directory for each worker, so no file is written by two machines
+    benchmarks_dir = (results_dir / worker).absolute()
+    benchmarks_dir.mkdir(parents=True, exist_ok=True)
+    queue.register_worker(worker, benchmarks_dir)
+    matrix = config["matrix"]
+    workers = config["workers"]
+    save_lock = Lock()
+    apply_settings(config["settings"])
+
+    # Initialize the graph
+    graph = build_workflow()
+    runnable_config = RunnableConfig(recursion_limit=100)
+
+    def run_worker(source: str) -> None:
+        """Lease and run the benchmarks of a source until there are no more, pending or leased."""
+        while True:
+            cell = queue.lease(worker, source)
+            if cell is None:
+                # NB: the benchmarks leased by other workers are queued again (by lease) if they die, so wait for them before leaving
+                if queue.get_counts(source)["leased"] == 0:
+                    return
+                sleep(queue.lease_seconds / 3)
+                continue
+            rep, type, format, source = cell
+            stop = Event()
+            heartbeat = Thread(target=__keep_lease, args=(queue, cell, worker, stop, queue.lease_seconds / 3), daemon=True)
+            heartbeat.start()
+            try:
+                benchmark_metrics = run_benchmark(graph, runnable_config, matrix["user_action"], rep, type, format, source, matrix["attempts"])
+                with save_lock:
+                    print(save_benchmark(benchmarks_dir, benchmark_metrics))
+            except Exception:
+                # NB: queued again for any worker, until its attempts are over
+                print_exc()
+                queue.release(cell, worker)
+                continue
+            finally:
+                stop.set()
+                heartbeat.join()
+            queue.complete(cell, worker)
+
+    # NB: the sources of this machine's configuration, the queued benchmarks of the others are left to other machines
+    sources = matrix["sources"]
+    with ThreadPoolExecutor(max_workers=sum(workers.get(source, 1) for source in sources)) as executor:
+        futures = [ executor.submit(run_worker, source) for source in sources for _ in range(workers.get(source, 1)) ]
+        for future in futures:
+            future.result()
+
+def merge(queue: WorkQueue, output_dir: Path, worker_dirs: list[Path]) -> None:
+    benchmarks_sources = []
+    events_sources = []
+    # NB: the directories recorded by the workers in the queue, and the given ones (e.g. copied from a machine)
+    for worker_dir in [ *queue.get_workers().values(), *worker_dirs ]:
+        benchmarks_file, events_file, _ = get_benchmark_files(worker_dir)
+        if not benchmarks_file.exists():
+            print(f"No results in {worker_dir}")
+            continue
+        # NB: the benchmarks edited by the worker (it has the parsers to analyze), if any
+        edited_file = worker_dir / "benchmark_edit.csv"
+        benchmarks_sources.append(edited_file if edited_file.exists() else benchmarks_file)
+        if events_file.exists():
+            events_sources.append(events_file)
+
+    added, skipped = merge_rows(output_dir / "benchmarks.csv", benchmarks_sources)
+    added_events, _ = merge_rows(output_dir / "benchmark_events.csv", events_sources)
+    print(f"Merged {added} benchmarks and {added_events} events from {len(benchmarks_sources)} workers into {output_dir}")
+    # NB: the results already in the output win, the new ones of the same cells are left out
+    if skipped:
+        print(f"Warning: {len(skipped)} benchmarks already in {output_dir} were not merged (merge into another --output to keep them):")
+        for key in sorted(skipped):
+            print(f"  {"|".join(key)}")
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Run the benchmarks on many machines through a queue on a shared file system.")
+    parser.add_argument("--config", type=Path, default=get_benchmark_config_path(), help="configuration file (default: %(default)s)")
+    parser.add_argument("--queue", type=Path, default=get_work_queue_path(), help="queue file, on a file system shared by the machines")
+    parser.add_argument("--results", type=Path, default=get_workers_dir(), help="directory of the results of the workers, on the shared file system too")
+    parser.add_argument("--lease", type=float, default=300, help="seconds before the benchmark of a silent worker is queued again")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("init", help="queue the benchmarks of the configuration not queued yet")
+    work_parser = subparsers.add_parser("work", help="run the queued benchmarks")
+    work_parser.add_argument("--worker", default=f"{socket.gethostname()}_{os.getpid()}", help="name of the worker (and of its results directory)")
+    subparsers.add_parser("status", help="count the benchmarks in each status")
+    merge_parser = subparsers.add_parser("merge", help="merge the results of the workers")
+    merge_parser.add_argument("worker_dirs", type=Path, nargs="*", help="results of other workers, besides those recorded in the queue")
+    merge_parser.add_argument("--output", type=Path, default=Path("benchmark") / "merged", help="directory of the merged results (NB: the benchmarks it already has are kept)")
+    args = parser.parse_args()
+
+    config = load_benchmark_config(args.config)
+    queue = WorkQueue(args.queue, lease_seconds=args.lease)
+    match args.command:
+        case "init":
+            init(queue, config)
+        case "work":
+            work(queue, config, args.worker, args.results)
+        case "status":
+            print(queue.get_counts())
+        case "merge":
+            merge(queue, args.output, args.worker_dirs)
@@ -0,0 +1,124 @@
+#include <stdio.h>
+#include <stdlib.h>
+
+typedef enum {
+    FIELD_START,
+    UNQUOTED,
+    QUOTED,
+    QUOTE_IN_QUOTED
+} State;
+
+typedef struct {
+    State state;
+    size_t line;
+    size_t records;
+    size_t fields;
+    size_t record_fields;
+    size_t header_fields;
+    size_t max_fields;
+    size_t quoted_fields;
+} Parser;
+
+static void end_field(Parser *p) {
+    p->fields++;
+    p->record_fields++;
+}
+
+static void end_record(Parser *p) {
+    end_field(p);
+    if (p->records == 0) {
+        p->header_fields = p->record_fields;
+    }
+    if (p->record_fields > p->max_fields) {
+        p->max_fields = p->record_fields;
+    }
+    p->records++;
+    p->record_fields = 0;
+}
+
+static int feed(Parser *p, int c) {
+    switch (p->state) {
+        case FIELD_START:
+            if (c == '"') {
+                p->state = QUOTED;
+                p->quoted_fields++;
+            } else if (c == ',') {
+                end_field(p);
+            } else if (c == '\n') {
+                end_record(p);
+            } else if (c != '\r') {
+                p->state = UNQUOTED;
+            }
+            return 1;
+        case UNQUOTED:
+            if (c == ',') {
+                end_field(p);
+                p->state = FIELD_START;
+            } else if (c == '\n') {
+                end_record(p);
+                p->state = FIELD_START;
+            } else if (c == '"') {
+                return 0;
+            }
+            return 1;
+        case QUOTED:
+            if (c == '"') {
+                p->state = QUOTE_IN_QUOTED;
+            }
+            return 1;
+        case QUOTE_IN_QUOTED:
+            if (c == '"') {
+                /* escaped quote */
+                p->state = QUOTED;
+            } else if (c == ',') {
+                end_field(p);
+                p->state = FIELD_START;
+            } else if (c == '\n') {
+                end_record(p);
+                p->state = FIELD_START;
+            } else if (c != '\r') {
+                return 0;
+            }
+            return 1;
+    }
+    return 0;
+}
+
+int main(void) {
+    Parser p = { FIELD_START, 1, 0, 0, 0, 0, 0, 0 };
+    size_t quote_line = 0;
+    int c;
+    int last = '\n';
+
+    while ((c = getchar()) != EOF) {
+        if (p.state != QUOTED && c == '"') {
+            quote_line = p.line;
+        }
+        if (!feed(&p, c)) {
+            fprintf(stderr, "Error: unexpected quote at line %zu\n", p.line);
+            return 1;
+        }
+        if (c == '\n') {
+            p.line++;
+        }
+        last = c;
+    }
+    if (ferror(stdin)) {
+        fprintf(stderr, "Error: cannot read input\n");
+        return 1;
+    }
+    if (p.state == QUOTED) {
+        fprintf(stderr, "Error: unterminated quoted field starting at line %zu\n", quote_line);
+        return 1;
+    }
+    if (last != '\n') {
+        end_record(&p);
+    }
+    if (p.records == 0) {
+        fprintf(stderr, "Error: empty input\n");
+        return 1;
+    }
+
+    printf("CSV: %zu records, %zu fields, %zu header fields, %zu max fields, %zu quoted fields\n", p.records, p.fields, p.header_fields, p.max_fields, p.quoted_fields);
+    return 0;
+}
@@ -0,0 +1,213 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <strings.h>
+
+#define MAX_NAME 64
+
+typedef struct {
+    const unsigned char *data;
+    size_t size;
+    size_t pos;
+    size_t line;
+    size_t elements;
+    size_t end_tags;
+    size_t attributes;
+    size_t comments;
+    size_t text_bytes;
+    int has_doctype;
+    const char *error;
+} Parser;
+
+static unsigned char *read_stdin(size_t *size) {
+    size_t capacity = 4096;
+    size_t length = 0;
+    unsigned char *buffer = malloc(capacity);
+    if (buffer == NULL) {
+        return NULL;
+    }
+    for (;;) {
+        if (length == capacity) {
+            unsigned char *grown = realloc(buffer, capacity * 2);
+            if (grown == NULL) {
+                free(buffer);
+                return NULL;
+            }
+            buffer = grown;
+            capacity *= 2;
+        }
+        size_t n = fread(buffer + length, 1, capacity - length, stdin);
+        if (n == 0) {
+            break;
+        }
+        length += n;
+    }
+    if (ferror(stdin)) {
+        free(buffer);
+        return NULL;
+    }
+    *size = length;
+    return buffer;
+}
+
+static int fail(Parser *p, const char *error) {
+    if (p->error == NULL) {
+        p->error = error;
+    }
+    return 0;
+}
+
+static void advance(Parser *p) {
+    if (p->data[p->pos] == '\n') {
+        p->line++;
+    }
+    p->pos++;
+}
+
+static int starts_with_nocase(const Parser *p, const char *prefix) {
+    size_t length = strlen(prefix);
+    return p->size - p->pos >= length && strncasecmp((const char *)p->data + p->pos, prefix, length) == 0;
+}
+
+static int is_alpha(unsigned char c) {
+    return (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z');
+}
+
+static int is_space(unsigned char c) {
+    return c == ' ' || c == '\t' || c == '\r' || c == '\n' || c == '\f';
+}
+
+static int skip_until(Parser *p, const char *terminator, const char *error) {
+    while (p->pos < p->size) {
+        if (starts_with_nocase(p, terminator)) {
+            p->pos += strlen(terminator);
+            return 1;
+        }
+        advance(p);
+    }
+    return fail(p, error);
+}
+
+static void parse_name(Parser *p, char *name) {
+    size_t length = 0;
+    while (p->pos < p->size && !is_space(p->data[p->pos]) && p->data[p->pos] != '>' && p->data[p->pos] != '/') {
+        if (length + 1 < MAX_NAME) {
+            name[length++] = (char)p->data[p->pos];
+        }
+        p->pos++;
+    }
+    name[length] = '\0';
+}
+
+static int parse_tag_rest(Parser *p) {
+    /* attributes until '>', quoted values may contain '>' */
+    while (p->pos < p->size) {
+        unsigned char c = p->data[p->pos];
+        if (c == '>') {
+            p->pos++;
+            return 1;
+        }
+        if (c == '"' || c == '\'') {
+            p->pos++;
+            while (p->pos < p->size && p->data[p->pos] != c) {
+                advance(p);
+            }
+            if (p->pos >= p->size) {
+                return fail(p, "unterminated attribute value");
+            }
+            p->pos++;
+            continue;
+        }
+        if (c == '=') {
+            p->attributes++;
+        }
+        advance(p);
+    }
+    return fail(p, "unterminated tag");
+}
+
+static int parse_raw_text(Parser *p, const char *name) {
+    /* script and style content is not markup */
+    char terminator[MAX_NAME + 2];
+    snprintf(terminator, sizeof(terminator), "</%s", name);
+    if (!skip_until(p, terminator, "unterminated raw text element")) {
+        return 0;
+    }
+    p->end_tags++;
+    return parse_tag_rest(p);
+}
+
+static int parse_document(Parser *p) {
+    char name[MAX_NAME];
+    while (p->pos < p->size) {
+        if (p->data[p->pos] != '<') {
+            p->text_bytes++;
+            advance(p);
+            continue;
+        }
+        if (starts_with_nocase(p, "<!--")) {
+            p->pos += 4;
+            if (!skip_until(p, "-->", "unterminated comment")) {
+                return 0;
+            }
+            p->comments++;
+        } else if (starts_with_nocase(p, "<!doctype")) {
+            p->has_doctype = 1;
+            if (!skip_until(p, ">", "unterminated doctype")) {
+                return 0;
+            }
+        } else if (starts_with_nocase(p, "</")) {
+            p->pos += 2;
+            parse_name(p, name);
+            if (!parse_tag_rest(p)) {
+                return 0;
+            }
+            p->end_tags++;
+        } else if (p->pos + 1 < p->size && is_alpha(p->data[p->pos + 1])) {
+            p->pos++;
+            parse_name(p, name);
+            if (!parse_tag_rest(p)) {
+                return 0;
+            }
+            p->elements++;
+            if (strcasecmp(name, "script") == 0 || strcasecmp(name, "style") == 0) {
+                if (!parse_raw_text(p, name)) {
+                    return 0;
+                }
+            }
+        } else {
+            /* a lone '<' is text */
+            p->text_bytes++;
+            p->pos++;
+        }
+    }
+    if (p->elements == 0) {
+        return fail(p, "no elements");
+    }
+    return 1;
+}
+
+int main(void) {
+    size_t size = 0;
+    unsigned char *data = read_stdin(&size);
+    if (data == NULL) {
+        fprintf(stderr, "Error: cannot read input\n");
+        return 1;
+    }
+
+    Parser p;
+    memset(&p, 0, sizeof(p));
+    p.data = data;
+    p.size = size;
+    p.line = 1;
+
+    if (!parse_document(&p)) {
+        fprintf(stderr, "Error: %s at line %zu\n", p.error, p.line);
+        free(data);
+        return 1;
+    }
+
+    printf("HTML: %s doctype, %zu elements, %zu end tags, %zu attributes, %zu comments, %zu text bytes\n", p.has_doctype ? "with" : "without", p.elements, p.end_tags, p.attributes, p.comments, p.text_bytes);
+    free(data);
+    return 0;
+}
@@ -0,0 +1,163 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define MAX_LINE 8192
+
+typedef enum {
+    EXPECT_REQUEST,
+    HEADERS,
+    BODY
+} State;
+
+typedef struct {
+    State state;
+    size_t line;
+    size_t requests;
+    size_t headers;
+    size_t body_lines;
+    size_t methods[9];
+} Parser;
+
+static const char *METHODS[] = { "GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS", "TRACE", "CONNECT" };
+
+static int is_blank(const char *line) {
+    for (; *line; line++) {
+        if (*line != ' ' && *line != '\t' && *line != '\r') {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+static int parse_request_line(Parser *p, const char *line) {
+    for (size_t i = 0; i < sizeof(METHODS) / sizeof(METHODS[0]); i++) {
+        size_t length = strlen(METHODS[i]);
+        if (strncmp(line, METHODS[i], length) == 0 && line[length] == ' ') {
+            const char *target = line + length + 1;
+            while (*target == ' ') {
+                target++;
+            }
+            if (*target == '\0' || *target == '\r') {
+                return 0;
+            }
+            p->methods[i]++;
+            p->requests++;
+            return 1;
+        }
+    }
+    return 0;
+}
+
+static int parse_header(const char *line) {
+    const char *colon = strchr(line, ':');
+    if (colon == NULL || colon == line) {
+        return 0;
+    }
+    for (const char *c = line; c < colon; c++) {
+        if (*c == ' ' || *c == '\t') {
+            return 0;
+        }
+    }
+    return 1;
+}
+
+static int feed_line(Parser *p, const char *line) {
+    if (strncmp(line, "###", 3) == 0) {
+        /* request separator (optionally with a comment) */
+        p->state = EXPECT_REQUEST;
+        return 1;
+    }
+    switch (p->state) {
+        case EXPECT_REQUEST:
+            if (is_blank(line) || line[0] == '#' || strncmp(line, "//", 2) == 0) {
+                return 1;
+            }
+            if (!parse_request_line(p, line)) {
+                fprintf(stderr, "Error: invalid request line at line %zu\n", p->line);
+                return 0;
+            }
+            p->state = HEADERS;
+            return 1;
+        case HEADERS:
+            if (is_blank(line)) {
+                p->state = BODY;
+                return 1;
+            }
+            if (!parse_header(line)) {
+                fprintf(stderr, "Error: invalid header at line %zu\n", p->line);
+                return 0;
+            }
+            p->headers++;
+            return 1;
+        case BODY:
+            if (!is_blank(line)) {
+                p->body_lines++;
+            }
+            return 1;
+    }
+    return 0;
+}
+
+int main(void) {
+    Parser p;
+    memset(&p, 0, sizeof(p));
+    p.state = EXPECT_REQUEST;
+
+    char *line = malloc(MAX_LINE);
+    if (line == NULL) {
+        fprintf(stderr, "Error: out of memory\n");
+        return 1;
+    }
+    size_t length = 0;
+    int c;
+    int ok = 1;
+    while (ok && (c = getchar()) != EOF) {
+        if (c == '\0') {
+            fprintf(stderr, "Error: NUL byte at line %zu\n", p.line + 1);
+            ok = 0;
+            break;
+        }
+        if (c != '\n') {
+            if (length + 1 >= MAX_LINE) {
+                fprintf(stderr, "Error: line %zu too long\n", p.line + 1);
+                ok = 0;
+                break;
+            }
+            line[length++] = (char)c;
+            continue;
+        }
+        line[length] = '\0';
+        p.line++;
+        ok = feed_line(&p, line);
+        length = 0;
+    }
+    if (ok && length > 0) {
+        line[length] = '\0';
+        p.line++;
+        ok = feed_line(&p, line);
+    }
+    free(line);
+    if (!ok) {
+        return 1;
+    }
+    if (ferror(stdin)) {
+        fprintf(stderr, "Error: cannot read input\n");
+        return 1;
+    }
+    if (p.requests == 0) {
+        fprintf(stderr, "Error: no requests\n");
+        return 1;
+    }
+
+    printf("HTTP: %zu requests (", p.requests);
+    int first = 1;
+    for (size_t i = 0; i < sizeof(METHODS) / sizeof(METHODS[0]); i++) {
+        if (p.methods[i] > 0) {
+            printf("%s%s %zu", first ? "" : ", ", METHODS[i], p.methods[i]);
+            first = 0;
+        }
+    }
+    printf("), %zu headers, %zu body lines\n", p.headers, p.body_lines);
+    return 0;
+}
@@ -0,0 +1,283 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define MAX_DEPTH 512
+
+typedef struct {
+    const unsigned char *data;
+    size_t size;
+    size_t pos;
+    size_t line;
+    int depth;
+    size_t objects;
+    size_t arrays;
+    size_t strings;
+    size_t numbers;
+    size_t literals;
+    const char *error;
+} Parser;
+
+static unsigned char *read_stdin(size_t *size) {
+    size_t capacity = 4096;
+    size_t length = 0;
+    unsigned char *buffer = malloc(capacity);
+    if (buffer == NULL) {
+        return NULL;
+    }
+    for (;;) {
+        if (length == capacity) {
+            unsigned char *grown = realloc(buffer, capacity * 2);
+            if (grown == NULL) {
+                free(buffer);
+                return NULL;
+            }
+            buffer = grown;
+            capacity *= 2;
+        }
+        size_t n = fread(buffer + length, 1, capacity - length, stdin);
+        if (n == 0) {
+            break;
+        }
+        length += n;
+    }
+    if (ferror(stdin)) {
+        free(buffer);
+        return NULL;
+    }
+    *size = length;
+    return buffer;
+}
+
+static int fail(Parser *p, const char *error) {
+    if (p->error == NULL) {
+        p->error = error;
+    }
+    return 0;
+}
+
+static void skip_whitespace(Parser *p) {
+    while (p->pos < p->size) {
+        unsigned char c = p->data[p->pos];
+        if (c == '\n') {
+            p->line++;
+        } else if (c != ' ' && c != '\t' && c != '\r') {
+            return;
+        }
+        p->pos++;
+    }
+}
+
+static int parse_value(Parser *p);
+
+static int parse_string(Parser *p) {
+    /* opening quote already checked */
+    p->pos++;
+    while (p->pos < p->size) {
+        unsigned char c = p->data[p->pos++];
+        if (c == '"') {
+            p->strings++;
+            return 1;
+        }
+        if (c < 0x20) {
+            return fail(p, "control character in string");
+        }
+        if (c == '\\') {
+            if (p->pos >= p->size) {
+                break;
+            }
+            c = p->data[p->pos++];
+            if (c == 'u') {
+                for (int i = 0; i < 4; i++) {
+                    if (p->pos >= p->size || strchr("0123456789abcdefABCDEF", p->data[p->pos]) == NULL || p->data[p->pos] == '\0') {
+                        return fail(p, "invalid unicode escape");
+                    }
+                    p->pos++;
+                }
+            } else if (strchr("\"\\/bfnrt", c) == NULL || c == '\0') {
+                return fail(p, "invalid escape sequence");
+            }
+        }
+    }
+    return fail(p, "unterminated string");
+}
+
+static int parse_digits(Parser *p) {
+    size_t start = p->pos;
+    while (p->pos < p->size && p->data[p->pos] >= '0' && p->data[p->pos] <= '9') {
+        p->pos++;
+    }
+    return p->pos > start;
+}
+
+static int parse_number(Parser *p) {
+    if (p->data[p->pos] == '-') {
+        p->pos++;
+    }
+    if (p->pos < p->size && p->data[p->pos] == '0') {
+        p->pos++;
+    } else if (!parse_digits(p)) {
+        return fail(p, "invalid number");
+    }
+    if (p->pos < p->size && p->data[p->pos] == '.') {
+        p->pos++;
+        if (!parse_digits(p)) {
+            return fail(p, "invalid fraction");
+        }
+    }
+    if (p->pos < p->size && (p->data[p->pos] == 'e' || p->data[p->pos] == 'E')) {
+        p->pos++;
+        if (p->pos < p->size && (p->data[p->pos] == '+' || p->data[p->pos] == '-')) {
+            p->pos++;
+        }
+        if (!parse_digits(p)) {
+            return fail(p, "invalid exponent");
+        }
+    }
+    p->numbers++;
+    return 1;
+}
+
+static int parse_literal(Parser *p, const char *literal) {
+    size_t length = strlen(literal);
+    if (p->size - p->pos < length || memcmp(p->data + p->pos, literal, length) != 0) {
+        return fail(p, "invalid literal");
+    }
+    p->pos += length;
+    p->literals++;
+    return 1;
+}
+
+static int parse_object(Parser *p) {
+    p->pos++;
+    p->objects++;
+    skip_whitespace(p);
+    if (p->pos < p->size && p->data[p->pos] == '}') {
+        p->pos++;
+        return 1;
+    }
+    for (;;) {
+        skip_whitespace(p);
+        if (p->pos >= p->size || p->data[p->pos] != '"') {
+            return fail(p, "expected object key");
+        }
+        if (!parse_string(p)) {
+            return 0;
+        }
+        skip_whitespace(p);
+        if (p->pos >= p->size || p->data[p->pos] != ':') {
+            return fail(p, "expected ':' after object key");
+        }
+        p->pos++;
+        if (!parse_value(p)) {
+            return 0;
+        }
+        skip_whitespace(p);
+        if (p->pos >= p->size) {
+            return fail(p, "unterminated object");
+        }
+        if (p->data[p->pos] == '}') {
+            p->pos++;
+            return 1;
+        }
+        if (p->data[p->pos] != ',') {
+            return fail(p, "expected ',' or '}' in object");
+        }
+        p->pos++;
+    }
+}
+
+static int parse_array(Parser *p) {
+    p->pos++;
+    p->arrays++;
+    skip_whitespace(p);
+    if (p->pos < p->size && p->data[p->pos] == ']') {
+        p->pos++;
+        return 1;
+    }
+    for (;;) {
+        if (!parse_value(p)) {
+            return 0;
+        }
+        skip_whitespace(p);
+        if (p->pos >= p->size) {
+            return fail(p, "unterminated array");
+        }
+        if (p->data[p->pos] == ']') {
+            p->pos++;
+            return 1;
+        }
+        if (p->data[p->pos] != ',') {
+            return fail(p, "expected ',' or ']' in array");
+        }
+        p->pos++;
+    }
+}
+
+static int parse_value(Parser *p) {
+    skip_whitespace(p);
+    if (p->pos >= p->size) {
+        return fail(p, "unexpected end of input");
+    }
+    if (p->depth >= MAX_DEPTH) {
+        return fail(p, "nesting too deep");
+    }
+    int result;
+    p->depth++;
+    switch (p->data[p->pos]) {
+        case '{':
+            result = parse_object(p);
+            break;
+        case '[':
+            result = parse_array(p);
+            break;
+        case '"':
+            result = parse_string(p);
+            break;
+        case 't':
+            result = parse_literal(p, "true");
+            break;
+        case 'f':
+            result = parse_literal(p, "false");
+            break;
+        case 'n':
+            result = parse_literal(p, "null");
+            break;
+        default:
+            if (p->data[p->pos] == '-' || (p->data[p->pos] >= '0' && p->data[p->pos] <= '9')) {
+                result = parse_number(p);
+            } else {
+                result = fail(p, "unexpected character");
+            }
+            break;
+    }
+    p->depth--;
+    return result;
+}
+
+int main(void) {
+    size_t size = 0;
+    unsigned char *data = read_stdin(&size);
+    if (data == NULL) {
+        fprintf(stderr, "Error: cannot read input\n");
+        return 1;
+    }
+
+    Parser p = { data, size, 0, 1, 0, 0, 0, 0, 0, 0, NULL };
+    int ok = parse_value(&p);
+    if (ok) {
+        skip_whitespace(&p);
+        if (p.pos != p.size) {
+            ok = fail(&p, "trailing characters after value");
+        }
+    }
+    if (!ok) {
+        fprintf(stderr, "Error: %s at line %zu\n", p.error, p.line);
+        free(data);
+        return 1;
+    }
+
+    printf("JSON: %zu objects, %zu arrays, %zu strings, %zu numbers, %zu literals\n", p.objects, p.arrays, p.strings, p.numbers, p.literals);
+    free(data);
+    return 0;
+}
@@ -0,0 +1,180 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+typedef struct {
+    const unsigned char *data;
+    size_t size;
+    char version[8];
+    size_t objects;
+    size_t streams;
+    size_t xref_tables;
+    size_t startxref;
+    int has_trailer;
+} Document;
+
+static unsigned char *read_stdin(size_t *size) {
+    size_t capacity = 4096;
+    size_t length = 0;
+    unsigned char *buffer = malloc(capacity);
+    if (buffer == NULL) {
+        return NULL;
+    }
+    for (;;) {
+        if (length == capacity) {
+            unsigned char *grown = realloc(buffer, capacity * 2);
+            if (grown == NULL) {
+                free(buffer);
+                return NULL;
+            }
+            buffer = grown;
+            capacity *= 2;
+        }
+        size_t n = fread(buffer + length, 1, capacity - length, stdin);
+        if (n == 0) {
+            break;
+        }
+        length += n;
+    }
+    if (ferror(stdin)) {
+        free(buffer);
+        return NULL;
+    }
+    *size = length;
+    return buffer;
+}
+
+static int is_delimiter(unsigned char c) {
+    return c == ' ' || c == '\t' || c == '\r' || c == '\n' || c == '\f' || c == '\0' || c == '<' || c == '>' || c == '[' || c == ']' || c == '/' || c == '(' || c == ')' || c == '%';
+}
+
+static int keyword_at(const Document *d, size_t pos, const char *keyword) {
+    size_t length = strlen(keyword);
+    if (d->size - pos < length || memcmp(d->data + pos, keyword, length) != 0) {
+        return 0;
+    }
+    int before = pos == 0 || is_delimiter(d->data[pos - 1]);
+    int after = pos + length == d->size || is_delimiter(d->data[pos + length]);
+    return before && after;
+}
+
+static const char *parse_header(Document *d) {
+    if (d->size < 8 || memcmp(d->data, "%PDF-", 5) != 0) {
+        return "missing %PDF- header";
+    }
+    size_t length = 0;
+    while (5 + length < d->size && length + 1 < sizeof(d->version) && ((d->data[5 + length] >= '0' && d->data[5 + length] <= '9') || d->data[5 + length] == '.')) {
+        d->version[length] = (char)d->data[5 + length];
+        length++;
+    }
+    d->version[length] = '\0';
+    return length > 0 ? NULL : "invalid PDF version";
+}
+
+static const char *parse_trailer(Document *d) {
+    /* %%EOF must be in the last kilobyte */
+    size_t start = d->size > 1024 ? d->size - 1024 : 0;
+    size_t eof = d->size;
+    for (size_t pos = d->size; pos-- > start;) {
+        if (d->size - pos >= 5 && memcmp(d->data + pos, "%%EOF", 5) == 0) {
+            eof = pos;
+            break;
+        }
+    }
+    if (eof == d->size) {
+        return "missing %%EOF marker";
+    }
+    for (size_t pos = eof; pos-- > start;) {
+        if (keyword_at(d, pos, "startxref")) {
+            size_t offset = 0;
+            size_t cursor = pos + 9;
+            while (cursor < eof && (d->data[cursor] == ' ' || d->data[cursor] == '\r' || d->data[cursor] == '\n')) {
+                cursor++;
+            }
+            if (cursor >= eof || d->data[cursor] < '0' || d->data[cursor] > '9') {
+                return "invalid startxref offset";
+            }
+            while (cursor < eof && d->data[cursor] >= '0' && d->data[cursor] <= '9') {
+                offset = offset * 10 + (size_t)(d->data[cursor] - '0');
+                if (offset >= d->size) {
+                    return "startxref offset beyond end of file";
+                }
+                cursor++;
+            }
+            d->startxref = offset;
+            d->has_trailer = 1;
+            return NULL;
+        }
+    }
+    return "missing startxref";
+}
+
+static const char *parse_body(Document *d) {
+    size_t open_objects = 0;
+    size_t pos = 0;
+    while (pos < d->size) {
+        if (keyword_at(d, pos, "stream")) {
+            /* skip binary content */
+            const unsigned char *end = NULL;
+            for (size_t cursor = pos + 6; cursor + 9 <= d->size; cursor++) {
+                if (memcmp(d->data + cursor, "endstream", 9) == 0) {
+                    end = d->data + cursor;
+                    break;
+                }
+            }
+            if (end == NULL) {
+                return "unterminated stream";
+            }
+            d->streams++;
+            pos = (size_t)(end - d->data) + 9;
+            continue;
+        }
+        if (keyword_at(d, pos, "obj")) {
+            open_objects++;
+            d->objects++;
+        } else if (keyword_at(d, pos, "endobj")) {
+            if (open_objects == 0) {
+                return "endobj without obj";
+            }
+            open_objects--;
+        } else if (keyword_at(d, pos, "xref")) {
+            d->xref_tables++;
+        }
+        pos++;
+    }
+    if (open_objects > 0) {
+        return "unterminated object";
+    }
+    return NULL;
+}
+
+int main(void) {
+    size_t size = 0;
+    unsigned char *data = read_stdin(&size);
+    if (data == NULL) {
+        fprintf(stderr, "Error: cannot read input\n");
+        return 1;
+    }
+
+    Document d;
+    memset(&d, 0, sizeof(d));
+    d.data = data;
+    d.size = size;
+
+    const char *error = parse_header(&d);
+    if (error == NULL) {
+        error = parse_trailer(&d);
+    }
+    if (error == NULL) {
+        error = parse_body(&d);
+    }
+    if (error != NULL) {
+        fprintf(stderr, "Error: %s\n", error);
+        free(data);
+        return 1;
+    }
+
+    printf("PDF %s: %zu objects, %zu streams, %zu xref tables, startxref %zu\n", d.version, d.objects, d.streams, d.xref_tables, d.startxref);
+    free(data);
+    return 0;
+}
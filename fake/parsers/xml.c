@@ -0,0 +1,283 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#define MAX_DEPTH 256
+#define MAX_NAME 128
+
+typedef struct {
+    const unsigned char *data;
+    size_t size;
+    size_t pos;
+    size_t line;
+    char stack[MAX_DEPTH][MAX_NAME];
+    int depth;
+    size_t elements;
+    size_t attributes;
+    size_t text_nodes;
+    size_t comments;
+    int has_root;
+    const char *error;
+} Parser;
+
+static unsigned char *read_stdin(size_t *size) {
+    size_t capacity = 4096;
+    size_t length = 0;
+    unsigned char *buffer = malloc(capacity);
+    if (buffer == NULL) {
+        return NULL;
+    }
+    for (;;) {
+        if (length == capacity) {
+            unsigned char *grown = realloc(buffer, capacity * 2);
+            if (grown == NULL) {
+                free(buffer);
+                return NULL;
+            }
+            buffer = grown;
+            capacity *= 2;
+        }
+        size_t n = fread(buffer + length, 1, capacity - length, stdin);
+        if (n == 0) {
+            break;
+        }
+        length += n;
+    }
+    if (ferror(stdin)) {
+        free(buffer);
+        return NULL;
+    }
+    *size = length;
+    return buffer;
+}
+
+static int fail(Parser *p, const char *error) {
+    if (p->error == NULL) {
+        p->error = error;
+    }
+    return 0;
+}
+
+static void advance(Parser *p) {
+    if (p->data[p->pos] == '\n') {
+        p->line++;
+    }
+    p->pos++;
+}
+
+static int starts_with(const Parser *p, const char *prefix) {
+    size_t length = strlen(prefix);
+    return p->size - p->pos >= length && memcmp(p->data + p->pos, prefix, length) == 0;
+}
+
+static int is_space(unsigned char c) {
+    return c == ' ' || c == '\t' || c == '\r' || c == '\n';
+}
+
+static int is_name_char(unsigned char c) {
+    return (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z') || (c >= '0' && c <= '9') || c == '_' || c == '-' || c == '.' || c == ':' || c >= 0x80;
+}
+
+static void skip_spaces(Parser *p) {
+    while (p->pos < p->size && is_space(p->data[p->pos])) {
+        advance(p);
+    }
+}
+
+static int skip_until(Parser *p, const char *terminator, const char *error) {
+    while (p->pos < p->size) {
+        if (starts_with(p, terminator)) {
+            p->pos += strlen(terminator);
+            return 1;
+        }
+        advance(p);
+    }
+    return fail(p, error);
+}
+
+static int parse_name(Parser *p, char *name) {
+    size_t length = 0;
+    while (p->pos < p->size && is_name_char(p->data[p->pos])) {
+        if (length + 1 >= MAX_NAME) {
+            return fail(p, "name too long");
+        }
+        name[length++] = (char)p->data[p->pos];
+        p->pos++;
+    }
+    name[length] = '\0';
+    return length > 0 ? 1 : fail(p, "expected a name");
+}
+
+static int parse_attributes(Parser *p, int *self_closing) {
+    char name[MAX_NAME];
+    for (;;) {
+        skip_spaces(p);
+        if (p->pos >= p->size) {
+            return fail(p, "unterminated tag");
+        }
+        if (p->data[p->pos] == '>') {
+            p->pos++;
+            return 1;
+        }
+        if (starts_with(p, "/>")) {
+            p->pos += 2;
+            *self_closing = 1;
+            return 1;
+        }
+        if (!parse_name(p, name)) {
+            return 0;
+        }
+        skip_spaces(p);
+        if (p->pos >= p->size || p->data[p->pos] != '=') {
+            return fail(p, "expected '=' after attribute name");
+        }
+        p->pos++;
+        skip_spaces(p);
+        if (p->pos >= p->size || (p->data[p->pos] != '"' && p->data[p->pos] != '\'')) {
+            return fail(p, "expected quoted attribute value");
+        }
+        unsigned char quote = p->data[p->pos];
+        p->pos++;
+        while (p->pos < p->size && p->data[p->pos] != quote) {
+            if (p->data[p->pos] == '<') {
+                return fail(p, "'<' in attribute value");
+            }
+            advance(p);
+        }
+        if (p->pos >= p->size) {
+            return fail(p, "unterminated attribute value");
+        }
+        p->pos++;
+        p->attributes++;
+    }
+}
+
+static int parse_start_tag(Parser *p) {
+    char name[MAX_NAME];
+    int self_closing = 0;
+    p->pos++;
+    if (p->depth == 0 && p->has_root) {
+        return fail(p, "more than one root element");
+    }
+    if (!parse_name(p, name) || !parse_attributes(p, &self_closing)) {
+        return 0;
+    }
+    p->elements++;
+    p->has_root = 1;
+    if (self_closing) {
+        return 1;
+    }
+    if (p->depth >= MAX_DEPTH) {
+        return fail(p, "nesting too deep");
+    }
+    memcpy(p->stack[p->depth], name, MAX_NAME);
+    p->depth++;
+    return 1;
+}
+
+static int parse_end_tag(Parser *p) {
+    char name[MAX_NAME];
+    p->pos += 2;
+    if (!parse_name(p, name)) {
+        return 0;
+    }
+    skip_spaces(p);
+    if (p->pos >= p->size || p->data[p->pos] != '>') {
+        return fail(p, "unterminated end tag");
+    }
+    p->pos++;
+    if (p->depth == 0) {
+        return fail(p, "end tag without start tag");
+    }
+    if (strcmp(p->stack[p->depth - 1], name) != 0) {
+        return fail(p, "mismatched end tag");
+    }
+    p->depth--;
+    return 1;
+}
+
+static int parse_document(Parser *p) {
+    while (p->pos < p->size) {
+        unsigned char c = p->data[p->pos];
+        if (c != '<') {
+            int has_text = 0;
+            while (p->pos < p->size && p->data[p->pos] != '<') {
+                if (!is_space(p->data[p->pos])) {
+                    has_text = 1;
+                }
+                advance(p);
+            }
+            if (has_text) {
+                if (p->depth == 0) {
+                    return fail(p, "text outside the root element");
+                }
+                p->text_nodes++;
+            }
+        } else if (starts_with(p, "<?")) {
+            if (!skip_until(p, "?>", "unterminated processing instruction")) {
+                return 0;
+            }
+        } else if (starts_with(p, "<!--")) {
+            if (!skip_until(p, "-->", "unterminated comment")) {
+                return 0;
+            }
+            p->comments++;
+        } else if (starts_with(p, "<![CDATA[")) {
+            if (p->depth == 0) {
+                return fail(p, "CDATA outside the root element");
+            }
+            if (!skip_until(p, "]]>", "unterminated CDATA section")) {
+                return 0;
+            }
+            p->text_nodes++;
+        } else if (starts_with(p, "<!")) {
+            if (!skip_until(p, ">", "unterminated declaration")) {
+                return 0;
+            }
+        } else if (starts_with(p, "</")) {
+            if (!parse_end_tag(p)) {
+                return 0;
+            }
+        } else if (!parse_start_tag(p)) {
+            return 0;
+        }
+    }
+    if (p->depth > 0) {
+        return fail(p, "unclosed element at end of input");
+    }
+    if (!p->has_root) {
+        return fail(p, "no root element");
+    }
+    return 1;
+}
+
+int main(void) {
+    size_t size = 0;
+    unsigned char *data = read_stdin(&size);
+    if (data == NULL) {
+        fprintf(stderr, "Error: cannot read input\n");
+        return 1;
+    }
+
+    Parser *p = calloc(1, sizeof(Parser));
+    if (p == NULL) {
+        fprintf(stderr, "Error: out of memory\n");
+        free(data);
+        return 1;
+    }
+    p->data = data;
+    p->size = size;
+    p->line = 1;
+
+    if (!parse_document(p)) {
+        fprintf(stderr, "Error: %s at line %zu\n", p->error, p->line);
+        free(p);
+        free(data);
+        return 1;
+    }
+
+    printf("XML: %zu elements, %zu attributes, %zu text nodes, %zu comments\n", p->elements, p->attributes, p->text_nodes, p->comments);
+    free(p);
+    free(data);
+    return 0;
+}
@@ -1,9 +1,13 @@
 from datetime import datetime
 from operator import add
 from pathlib import Path
+from time import perf_counter
+from uuid import UUID
 from typing_extensions import TypedDict
 from typing import Annotated, Sequence, Any, Literal, TypeAlias
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
 from langchain.tools import Tool
 from utils.general import compilation_check, execution_check
 
@@ -13,6 +17,7 @@ class BenchmarkMetrics:
     """Class for benchmark metrics recording."""
     def __init__(self, n: int, type: str, file_format: str, llm: str):
         self.checkpoints = []
+        self.events = []
         self.data = {
             "n": n,
             "type": type,
@@ -29,7 +34,11 @@ class BenchmarkMetrics:
             "best_parser_folder": None,
             "testing_rate": None,
             "cyclomatic_complexity": None,
-            "code_coverage": None
+            "code_coverage": None,
+            "throughput_mb_s": None,
+            "peak_rss_kb": None,
+            "latency_p50_ms": None,
+            "latency_p99_ms": None
         }
     
     def __record_parser_checkpoint(self, checkpoint: str, iteration: int, parser_folder: Path) -> bool:
@@ -54,8 +63,69 @@ class BenchmarkMetrics:
     def record_parser_end(self) -> None:
         self.data["end_time"] = datetime.now().isoformat()
     
+    def record_event(
+            self, node: str, iteration: int, kind: Literal["llm", "compile", "execute"], seconds: float, success: bool | None = None, 
+            input_tokens: int | None = None, output_tokens: int | None = None, retries: int | None = 0
+        ) -> None:
+        """Record an event of an iteration: LLM request (with its tokens and retries, None if unknown), compilation or execution."""
+        self.events.append({
+            "time": datetime.now().isoformat(),
+            "node": node,
+            "iteration": iteration,
+            "kind": kind,
+            "seconds": round(seconds, 3),
+            "success": success,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "retries": retries
+        })
+    
     def get_benchmark(self) -> dict[str, Any]:
         return self.data
+    
+    def get_events(self) -> list[dict[str, Any]]:
+        """Get the events in long format (one row each, with the benchmark keys)."""
+        keys = { key: self.data[key] for key in ["n", "type", "file_format", "llm"] }
+        return [ keys | event for event in self.events ]
+
+class BenchmarkEventsHandler(BaseCallbackHandler):
+    """Class for the callback that records the LLM requests and tool runs of the single agent as benchmark events."""
+    def __init__(self, benchmark_metrics: BenchmarkMetrics, node: str = "Agent"):
+        self.benchmark_metrics = benchmark_metrics
+        self.node = node
+        self.iteration = 0
+        self.starts: dict[UUID, float] = {}
+    
+    def on_chat_model_start(self, serialized: dict[str, Any], messages: list[list[BaseMessage]], *, run_id: UUID, **kwargs: Any) -> None:
+        # NB: each request is a ReAct loop
+        self.iteration += 1
+        self.starts[run_id] = perf_counter()
+    
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        input_tokens = output_tokens = None
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens = (input_tokens or 0) + usage.get("input_tokens", 0)
+                    output_tokens = (output_tokens or 0) + usage.get("output_tokens", 0)
+        seconds = perf_counter() - self.starts.pop(run_id, perf_counter())
+        # NB: the ReAct model retries inside the SDK (max_retries), so its retries are unknown here
+        self.benchmark_metrics.record_event(self.node, self.iteration, "llm", seconds, True, input_tokens, output_tokens, None)
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        seconds = perf_counter() - self.starts.pop(run_id, perf_counter())
+        self.benchmark_metrics.record_event(self.node, self.iteration, "llm", seconds, False, retries=None)
+    
+    def on_tool_start(self, serialized: dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        self.starts[run_id] = perf_counter()
+    
+    def on_tool_end(self, output: Any, *, run_id: UUID, name: str | None = None, **kwargs: Any) -> None:
+        seconds = perf_counter() - self.starts.pop(run_id, perf_counter())
+        # NB: the execution check compiles too
+        kind = "compile" if name == "compilation_check" else "execute"
+        success = output.get("success") if isinstance(output, dict) else None
+        self.benchmark_metrics.record_event(self.node, self.iteration, kind, seconds, success)
 
 AgentType: TypeAlias = Literal["Supervisor", "Orchestrator", "Generator", "Compiler", "Tester", "Assessor", "FINISH"]
 
@@ -73,7 +143,7 @@ class AgentState(TypedDict):
     round: int
     iteration_count: int
     max_iterations: int
-    model_source: Literal["google", "openai", "anthropic"]
+    model_source: Literal["google", "openai", "anthropic", "fake"]
     next_step: AgentType
     session_dir: Path
     benchmark_metrics: BenchmarkMetrics
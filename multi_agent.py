@@ -3,6 +3,7 @@ from traceback import format_exc
 from langchain_core.runnables import RunnableConfig
 from models import BenchmarkMetrics
 from utils import colors
+from utils.fake_llm import save_fake_transcript
 from utils.general import create_session, get_model_source_from_input, get_file_format_from_input, print_colored
 from utils.graph import build_workflow, start_workflow
 from utils.multi_agent import get_action_from_input, get_request_from_action
@@ -59,6 +60,7 @@ if __name__ == "__main__":
     with open(session_dir / "conversation.txt", "w", encoding="utf-8") as f:
         for m in messages:
             f.write(f"{m.pretty_repr()}\n\n")
+    save_fake_transcript(messages, session_dir / "transcript.jsonl")
     
     # Log benchmark
     with open(session_dir / "benchmark.csv", "w", encoding="utf-8", newline="") as f:
@@ -0,0 +1,121 @@
+import os, tomllib
+from copy import deepcopy
+from csv import DictReader
+from datetime import datetime
+from pathlib import Path
+from statistics import mean
+from typing import Any
+from utils.benchmark_store import get_benchmark_key
+
+
+
+DEFAULT_BENCHMARK_CONFIG = {
+    "matrix": {
+        "user_action": "GENERATE_PARSER",
+        "reps": list(range(19, 24)),
+        "types": [ "multi_agent", "zero_shot" ],
+        "formats": [ "CSV", "HTML", "HTTP", "JSON", "PDF", "XML" ],
+        "sources": [ "google", "openai", "anthropic" ],
+        "attempts": 15
+    },
+    # benchmarks running at the same time for each source (more in benchmark.toml)
+    "workers": { "google": 1, "openai": 1, "anthropic": 1 },
+    # settings of the run, they override the environment variables
+    "settings": {},
+    "output": {
+        "dir": "benchmark",
+        # previous benchmarks, for the estimates of the dry run
+        "history": "benchmark/all",
+        # seconds of a benchmark without history
+        "default_seconds": 600
+    },
+    # USD per million tokens, for the estimates of the dry run
+    "prices": {}
+}
+
+def get_benchmark_config_path() -> Path:
+    return Path("benchmark.toml")
+
+def load_benchmark_config(path: Path) -> dict[str, Any]:
+    """Load the benchmark configuration, the missing keys keep their defaults."""
+    config = deepcopy(DEFAULT_BENCHMARK_CONFIG)
+    if path.exists():
+        with open(path, "rb") as f:
+            for section, values in tomllib.load(f).items():
+                config.setdefault(section, {}).update(values)
+    return config
+
+def apply_settings(settings: dict[str, Any]) -> None:
+    """Set the settings of the run as environment variables (NB: the .env file doesn't override them)."""
+    for var, value in settings.items():
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        os.environ[var] = str(value)
+
+def get_benchmark_cells(matrix: dict[str, Any]) -> list[tuple[int, str, str, str]]:
+    """Get the benchmarks to run (repetition, type, format, source), in the matrix order."""
+    return [
+        (rep, type, format, source)
+        for rep in matrix["reps"] for type in matrix["types"] for format in matrix["formats"] for source in matrix["sources"]
+    ]
+
+def get_benchmark_seconds(row: dict[str, str]) -> float | None:
+    """Get the wall time of a benchmark, None if it didn't end."""
+    if not row.get("start_time") or not row.get("end_time"):
+        return None
+    return (datetime.fromisoformat(row["end_time"]) - datetime.fromisoformat(row["start_time"])).total_seconds()
+
+def __read_rows(path: Path) -> list[dict[str, str]]:
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(DictReader(f))
+
+def select_benchmarks(path: Path, failed: bool = False, slower_than: float | None = None) -> set[tuple[str, ...]]:
+    """Get the keys of the saved benchmarks that failed (no parser passed the tests) or took more than the seconds."""
+    keys = set()
+    for row in __read_rows(path):
+        seconds = get_benchmark_seconds(row)
+        if (failed and not row.get("testing_time")) or (slower_than is not None and seconds is not None and seconds > slower_than):
+            keys.add(get_benchmark_key(row))
+    return keys
+
+def estimate_benchmarks(config: dict[str, Any], cells: list[tuple[int, str, str, str]]) -> dict[str, Any]:
+    """Estimate the wall time and the cost of the benchmarks, from the mean of the previous ones of the same type and source."""
+    history_dir = Path(config["output"]["history"])
+    seconds = {}
+    for row in __read_rows(history_dir / "benchmarks.csv"):
+        row_seconds = get_benchmark_seconds(row)
+        if row_seconds is not None:
+            seconds.setdefault((row["type"], row["llm"]), []).append(row_seconds)
+    # NB: tokens only from the benchmarks with events (recorded since the event log)
+    tokens = {}
+    for row in __read_rows(history_dir / "benchmark_events.csv"):
+        if row["kind"] == "llm":
+            cell_tokens = tokens.setdefault((row["type"], row["llm"]), {}).setdefault(get_benchmark_key(row), [0, 0])
+            cell_tokens[0] += int(row["input_tokens"] or 0)
+            cell_tokens[1] += int(row["output_tokens"] or 0)
+
+    source_seconds = {}
+    cost = 0.0
+    unknown_cost = 0
+    for _, type, _, source in cells:
+        cell_seconds = mean(seconds[(type, source)]) if (type, source) in seconds else float(config["output"]["default_seconds"])
+        source_seconds[source] = source_seconds.get(source, 0) + cell_seconds
+        prices = config["prices"].get(source)
+        if (type, source) in tokens and prices:
+            input_tokens = mean(cell_tokens[0] for cell_tokens in tokens[(type, source)].values())
+            output_tokens = mean(cell_tokens[1] for cell_tokens in tokens[(type, source)].values())
+            cost += (input_tokens * prices.get("input", 0) + output_tokens * prices.get("output", 0)) / 1_000_000
+        else:
+            unknown_cost += 1
+
+    # NB: the sources run at the same time, each one with its workers
+    wall_seconds = max([ total / max(1, config["workers"].get(source, 1)) for source, total in source_seconds.items() ], default=0)
+    return {
+        "benchmarks": len(cells),
+        "seconds": sum(source_seconds.values()),
+        "wall_seconds": wall_seconds,
+        "cost": cost,
+        "unknown_cost": unknown_cost
+    }
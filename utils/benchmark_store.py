@@ -0,0 +1,153 @@
+import json, os
+from csv import DictReader, DictWriter
+from pathlib import Path
+from typing import Any, Iterable
+
+
+
+BENCHMARK_KEYS = ["n", "type", "file_format", "llm"]
+
+def get_benchmark_key(row: dict[str, Any]) -> tuple[str, ...]:
+    """Get the key of a benchmark cell (repetition, type, format and source) from one of its rows."""
+    return tuple(str(row[key]) for key in BENCHMARK_KEYS)
+
+def __fsync(f) -> None:
+    f.flush()
+    os.fsync(f.fileno())
+
+def append_rows(path: Path, rows: Iterable[dict[str, Any]]) -> None:
+    """Append the rows to a CSV file (with the header of the file, if any) and flush them to disk."""
+    rows = list(rows)
+    if not rows:
+        return
+
+    fieldnames = list(rows[0].keys())
+    is_new = not path.exists() or path.stat().st_size == 0
+    if not is_new:
+        # NB: the columns of the existing file, so rows stay aligned to its header
+        with open(path, encoding="utf-8", newline="") as f:
+            fieldnames = DictReader(f).fieldnames or fieldnames
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = DictWriter(f, fieldnames=fieldnames, restval="", extrasaction="ignore")
+        if is_new:
+            writer.writeheader()
+        writer.writerows(rows)
+        __fsync(f)
+
+def load_manifest(path: Path) -> set[tuple[str, ...]]:
+    """Load the keys of the completed benchmark cells."""
+    keys = set()
+    if not path.exists():
+        return keys
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                keys.add(get_benchmark_key(json.loads(line)))
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # NB: the last line can be half written by a crash
+                continue
+    return keys
+
+def append_manifest(path: Path, row: dict[str, Any]) -> None:
+    """Mark a benchmark cell as completed (after its rows are on disk)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # NB: after a half written line (crash), the new one starts on its own line
+    is_broken = path.exists() and path.stat().st_size > 0 and path.read_bytes()[-1:] != b"\n"
+    with open(path, "a", encoding="utf-8") as f:
+        if is_broken:
+            f.write("\n")
+        f.write(json.dumps({ key: row[key] for key in BENCHMARK_KEYS }) + "\n")
+        __fsync(f)
+
+def keep_manifest(path: Path, keys: set[tuple[str, ...]]) -> None:
+    """Keep only the given cells as completed (e.g. to run some of them again)."""
+    if not path.exists():
+        return
+
+    lines = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                if get_benchmark_key(json.loads(line)) in keys:
+                    lines.append(line.rstrip("\n") + "\n")
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+
+    # NB: replaced atomically, so a crash here leaves the old file
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+        __fsync(f)
+    os.replace(tmp_path, path)
+
+def keep_rows(path: Path, keys: set[tuple[str, ...]]) -> None:
+    """Keep only the rows of the completed cells (a crash can leave rows of a cell not in the manifest)."""
+    if not path.exists():
+        return
+
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = DictReader(f)
+        fieldnames = reader.fieldnames
+        # NB: half written rows have missing (None) or extra (None key) fields
+        rows = [ row for row in reader if None not in row and None not in row.values() and get_benchmark_key(row) in keys ]
+    if not fieldnames:
+        return
+
+    # NB: replaced atomically, so a crash here leaves the old file
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+        __fsync(f)
+    os.replace(tmp_path, path)
+
+def __read_rows(path: Path) -> tuple[list[str], list[dict[str, str]]]:
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = DictReader(f)
+        # NB: half written rows (a worker still running or crashed) are left out
+        rows = [ row for row in reader if None not in row and None not in row.values() ]
+        return list(reader.fieldnames or []), rows
+
+def merge_rows(path: Path, sources: list[Path]) -> tuple[int, set[tuple[str, ...]]]:
+    """Add to a CSV file the rows of the cells it doesn't have yet from other CSV files (the first file with a cell wins),
+    with the columns of the file first, returning how many rows were added and the cells skipped because the file already had different rows of them."""
+    fieldnames, rows = __read_rows(path) if path.exists() else ([], [])
+    keys = { get_benchmark_key(row) for row in rows }
+    existing_rows = {}
+    for row in rows:
+        existing_rows.setdefault(get_benchmark_key(row), []).append(row)
+
+    added = 0
+    skipped = set()
+    for source in sources:
+        source_fieldnames, source_rows = __read_rows(source)
+        fieldnames += [ field for field in source_fieldnames if field not in fieldnames ]
+        # NB: a cell can have many rows (e.g. events), all of them come from the same file
+        source_keys = { get_benchmark_key(row) for row in source_rows }
+        # NB: the same rows merged again (e.g. merging twice) aren't a conflict
+        for key in source_keys & existing_rows.keys():
+            key_rows = [ row for row in source_rows if get_benchmark_key(row) == key ]
+            if [ { field: row.get(field, "") for field in source_fieldnames } for row in existing_rows[key] ] != key_rows:
+                skipped.add(key)
+        source_keys -= keys
+        new_rows = [ row for row in source_rows if get_benchmark_key(row) in source_keys ]
+        rows += new_rows
+        keys |= source_keys
+        added += len(new_rows)
+    if not fieldnames:
+        return 0, skipped
+
+    # NB: replaced atomically, so a crash here leaves the old file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = DictWriter(f, fieldnames=fieldnames, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+        __fsync(f)
+    os.replace(tmp_path, path)
+    return added, skipped
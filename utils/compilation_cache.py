@@ -0,0 +1,105 @@
+import json, os
+from time import time
+from hashlib import sha256
+from pathlib import Path
+from shutil import copy2, rmtree
+from uuid import uuid4
+
+
+
+def get_cache_dir() -> Path:
+    return Path("cache") / "compilation"
+
+def get_compilation_key(parser_code: str, flags: list[str], runtime: bool, gcc_version: str) -> str:
+    """Content-addressed key of a compilation: same source, flags, profile and compiler give the same binary."""
+    key = json.dumps({
+        "code": parser_code,
+        "flags": flags,
+        "runtime": runtime,
+        "gcc": gcc_version
+    })
+    return sha256(key.encode("utf-8")).hexdigest()
+
+def load_compilation(key: str, o_parser_path: Path, max_age_days: float = 30) -> dict[str, bool | str] | None:
+    """Restore a cached compilation (binary included) without spawning gcc."""
+    entry_dir = get_cache_dir() / key
+    try:
+        # NB: the modification time of the result is when the entry was created, expired entries are compiled again
+        if os.stat(entry_dir / "result.json").st_mtime < time() - max_age_days * 24 * 60 * 60:
+            return None
+        with open(entry_dir / "result.json", encoding="utf-8") as f:
+            result = json.load(f)
+        if result["success"]:
+            copy2(entry_dir / "binary", o_parser_path)
+        # NB: the modification time of the entry is when it was last used, least recently used entries are evicted first
+        os.utime(entry_dir)
+    except Exception:
+        # missing or broken entry, just compile again
+        return None
+
+    return result
+
+def store_compilation(key: str, result: dict[str, bool | str], o_parser_path: Path, max_mb: float = 1024, max_age_days: float = 30) -> None:
+    """Save a compilation in the cache (binary included), evicting the expired and least recently used entries above the size."""
+    entry_dir = get_cache_dir() / key
+    if entry_dir.exists():
+        return
+
+    # NB: the entry is built aside and then renamed, so concurrent sessions never see it half written
+    tmp_dir = get_cache_dir() / f".{key}_{uuid4().hex}"
+    try:
+        tmp_dir.mkdir(parents=True)
+        if result["success"]:
+            copy2(o_parser_path, tmp_dir / "binary")
+        with open(tmp_dir / "result.json", "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        os.rename(tmp_dir, entry_dir)
+    except Exception:
+        # the cache is only an optimization (e.g. another session stored the same entry first)
+        rmtree(tmp_dir, ignore_errors=True)
+        return
+
+    __evict(int(max_mb * 2**20), max_age_days * 24 * 60 * 60)
+
+def __get_entry_size(entry_dir: Path) -> int:
+    return sum(entry_path.stat().st_size for entry_path in entry_dir.iterdir())
+
+def __remove_entry(entry_dir: Path) -> None:
+    # NB: renamed first, so concurrent sessions never load it half removed (they just compile again)
+    removed_dir = entry_dir.with_name(f".{entry_dir.name}_{uuid4().hex}_removed")
+    try:
+        os.rename(entry_dir, removed_dir)
+    except OSError:
+        # already removed by another session
+        return
+    rmtree(removed_dir, ignore_errors=True)
+
+def __evict(max_bytes: int, max_age_seconds: float) -> None:
+    now = time()
+    entries = []
+    total_bytes = 0
+    for entry_dir in get_cache_dir().iterdir():
+        try:
+            if entry_dir.name.startswith("."):
+                # NB: entries being written or removed, left behind only if their session died
+                if entry_dir.stat().st_mtime < now - max_age_seconds:
+                    rmtree(entry_dir, ignore_errors=True)
+                continue
+            if (entry_dir / "result.json").stat().st_mtime < now - max_age_seconds:
+                __remove_entry(entry_dir)
+                continue
+            size = __get_entry_size(entry_dir)
+            entries.append((entry_dir.stat().st_mtime, size, entry_dir))
+            total_bytes += size
+        except OSError:
+            # removed meanwhile by another session
+            continue
+    if total_bytes <= max_bytes:
+        return
+
+    # least recently used first, until the cache fits its size again
+    for _, size, entry_dir in sorted(entries):
+        __remove_entry(entry_dir)
+        total_bytes -= size
+        if total_bytes <= max_bytes:
+            break
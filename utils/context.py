@@ -0,0 +1,56 @@
+import re
+
+
+
+DIAGNOSTIC_LINE = re.compile(r"\bLine (\d+)\b")
+DIAGNOSTIC_FRAME = re.compile(r"\b(?:in|at) (\w+) Line \d+")
+
+def get_functions(code: str) -> list[tuple[str, int, int]]:
+    """Get the functions of the C code: (name, first line, last line), lines from 1."""
+    # NB: lizard is a benchmark dependency, without it there is no context to build
+    try:
+        from lizard import analyze_file
+    except ImportError:
+        return []
+
+    file_info = analyze_file.analyze_source_code("source.c", code)
+    return [ (function.name, function.start_line, function.end_line) for function in file_info.function_list ]
+
+def __get_signature(code_lines: list[str], start: int, end: int) -> str:
+    """Get the signature of a function (lines until its opening brace)."""
+    signature = []
+    for line in code_lines[start - 1:end]:
+        signature.append(line.split("{")[0].rstrip())
+        if "{" in line:
+            break
+    return "\n".join(signature)
+
+def get_code_context(code: str, diagnostics: str) -> str | None:
+    """Get only the functions referred by the diagnostics (line numbers and stack frames), with the declarations outside functions
+    and an outline of the other functions (None if the diagnostics can't be localized)."""
+    lines = { int(line) for line in DIAGNOSTIC_LINE.findall(diagnostics) }
+    names = set(DIAGNOSTIC_FRAME.findall(diagnostics))
+    functions = get_functions(code)
+
+    selected = [ (name, start, end) for name, start, end in functions if name in names or any(start <= line <= end for line in lines) ]
+    if not selected or len(selected) == len(functions):
+        return None
+
+    code_lines = code.splitlines()
+    context = []
+    omitted = []
+    position = 1
+    for name, start, end in functions:
+        # declarations (includes, macros, types, globals) are always kept
+        context += code_lines[position - 1:start - 1]
+        if (name, start, end) in selected:
+            context += code_lines[start - 1:end]
+        else:
+            context.append(f"{__get_signature(code_lines, start, end)} {{ /* lines {start}-{end} omitted */ }}")
+            omitted.append(name)
+        position = end + 1
+    context += code_lines[position - 1:]
+
+    # NB: the outline is not the actual code, edits must refer only to the functions shown in full
+    header = f"/* Only the functions with errors are shown in full, the other ones are omitted: {", ".join(omitted)} */"
+    return "\n".join([header] + context)
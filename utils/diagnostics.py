@@ -0,0 +1,124 @@
+import json, re
+
+
+
+SANITIZER_ERROR = re.compile(r"^==\d+==\s*ERROR: (\w+Sanitizer): (.*)$")
+SANITIZER_LEAK = re.compile(r"^(Direct|Indirect) leak of (.*?)(?: allocated from:)?$")
+SANITIZER_FRAME = re.compile(r"^\s*#\d+ 0x[0-9a-f]+ in (\S+) (\S+?):(\d+)(?::(\d+))?")
+SANITIZER_REGION = re.compile(r"^0x[0-9a-f]+ (is located .*?)\.?$")
+SANITIZER_SEPARATOR = re.compile(r"^=+$")
+SANITIZER_SUMMARY = re.compile(r"^SUMMARY: ")
+SANITIZER_END = re.compile(r"^==\d+==\s*ABORTING")
+RUNTIME_ERROR = re.compile(r"^(\S+?):(\d+):(\d+): runtime error: (.*)$")
+RUNTIME_NOTE = re.compile(r"^(0x[0-9a-f]+: note: .*|\s*([0-9a-f]{2}\s+)*[0-9a-f]{2}\s*|\s*\^\s*)$")
+
+def __is_source(path: str, c_name: str) -> bool:
+    return re.split(r"[\\/]", path)[-1] == c_name
+
+def __new_record(kind: str, message: str, line: int | None = None, column: int | None = None) -> dict:
+    return {
+        "kind": kind,
+        "line": line,
+        "column": column,
+        "message": message,
+        "frames": []
+    }
+
+def parse_gcc_diagnostics(stderr: str, c_name: str) -> list[dict]:
+    """Parse gcc diagnostics (-fdiagnostics-format=json) into records."""
+    records = []
+    for text_line in stderr.splitlines():
+        text_line = text_line.strip()
+        if not text_line:
+            continue
+
+        # NB: not everything is JSON (e.g. linker errors)
+        try:
+            diagnostics = json.loads(text_line) if text_line.startswith("[") else None
+        except json.JSONDecodeError:
+            diagnostics = None
+        if diagnostics is None:
+            records.append(__new_record("gcc", text_line))
+            continue
+
+        for diagnostic in diagnostics:
+            caret = diagnostic["locations"][0]["caret"] if diagnostic.get("locations") else {}
+            message = diagnostic["message"]
+            if diagnostic.get("option"):
+                message += f" [{diagnostic["option"]}]"
+            record = __new_record(diagnostic["kind"], message, caret.get("line"), caret.get("column"))
+            # static analyzer events
+            for event in diagnostic.get("path", []):
+                location = event.get("location", {})
+                if __is_source(location.get("file", ""), c_name):
+                    record["frames"].append(f"{event.get("function", "?")} Line {location["line"]}: {event["description"]}")
+            records.append(record)
+
+    return records
+
+def parse_sanitizer_report(stderr: str, c_name: str) -> list[dict]:
+    """Parse sanitizers (ASan, LSan, UBSan) reports into records, other stderr lines are kept as they are."""
+    records = []
+    record = None
+    # NB: only the first stack of a sanitizer report is kept (the access, not where memory was allocated)
+    is_first_stack = False
+    for text_line in stderr.splitlines():
+        if match := SANITIZER_ERROR.match(text_line):
+            record = __new_record(match.group(1), match.group(2))
+            records.append(record)
+            is_first_stack = True
+        elif record and (match := SANITIZER_LEAK.match(text_line)):
+            # one record for each leak
+            record = __new_record("LeakSanitizer", f"{match.group(1).lower()} leak of {match.group(2)}")
+            records.append(record)
+            is_first_stack = True
+        elif record and (match := SANITIZER_FRAME.match(text_line)):
+            function, path, line, column = match.groups()
+            # only frames inside the parser source (no libc, no sanitizer internals)
+            if is_first_stack and __is_source(path, c_name):
+                record["frames"].append(f"{function} Line {line}")
+                if record["line"] is None:
+                    record["line"] = int(line)
+                    record["column"] = int(column) if column else None
+        elif record and not text_line.strip():
+            is_first_stack = False
+        elif record and (match := SANITIZER_REGION.match(text_line)):
+            # where the address is, compared with its buffer (e.g. the off-by-one of an overflow)
+            record["message"] += f" (the address {match.group(1)})"
+        elif SANITIZER_SEPARATOR.match(text_line.strip()):
+            continue
+        elif match := RUNTIME_ERROR.match(text_line):
+            _, line, column, message = match.groups()
+            records.append(__new_record("UndefinedBehaviorSanitizer", message, int(line), int(column)))
+            record = None
+        elif RUNTIME_NOTE.match(text_line):
+            # memory dump of a runtime error
+            continue
+        elif SANITIZER_SUMMARY.match(text_line):
+            # NB: the report goes on with the shadow memory dump
+            is_first_stack = False
+        elif SANITIZER_END.match(text_line):
+            record = None
+        elif record is None and text_line.strip():
+            # own parser messages
+            records.append(__new_record("stderr", text_line.strip()))
+
+    return records
+
+def summarize_diagnostics(records: list[dict]) -> str:
+    """Compact and deduplicated summary of the diagnostics records."""
+    counts = {}
+    for record in records:
+        key = (record["kind"], record["line"], record["column"], record["message"], tuple(record["frames"]))
+        counts[key] = counts.get(key, 0) + 1
+
+    summary = []
+    for (kind, line, column, message, frames), count in counts.items():
+        location = ""
+        if line is not None:
+            location = f"Line {line} Column {column}: " if column is not None else f"Line {line}: "
+        repeated = f" (x{count})" if count > 1 else ""
+        summary.append(f"{location}{kind}: {message}{repeated}")
+        summary += [ f"    at {frame}" for frame in frames ]
+
+    return "\n".join(summary)
@@ -0,0 +1,140 @@
+import json, re
+from pathlib import Path
+from threading import Lock
+from time import sleep
+from typing import Any, Sequence
+from pydantic import Field, PrivateAttr
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+
+FAKE_ROLES = ["Supervisor", "Generator", "Assessor", "Agent"]
+FAKE_FORMATS = ["CSV", "HTML", "HTTP", "JSON", "PDF", "XML"]
+
+def get_fake_parsers_dir() -> Path:
+    return Path("fake") / "parsers"
+
+def get_fake_role(prompt: str) -> str:
+    """Detect which agent is asking from its prompt."""
+    if "You are a supervisor managing" in prompt:
+        return "Supervisor"
+    if "You are a specialized C programming assessor" in prompt:
+        return "Assessor"
+    if "Action Input" in prompt:
+        # ReAct single agent
+        return "Agent"
+    return "Generator"
+
+def get_fake_format(prompt: str) -> str:
+    """Detect the file format of the parser from the prompt (the first one mentioned)."""
+    match = re.search(r"parser function for (\w+) files", prompt)
+    if match and match.group(1).upper() in FAKE_FORMATS:
+        return match.group(1).upper()
+    match = re.search(rf"\b({"|".join(FAKE_FORMATS)})\b", prompt)
+    return match.group(1) if match else "JSON"
+
+def load_fake_transcript(path: Path) -> dict[str, list[str]]:
+    """Load a recorded transcript (JSON lines with name and content) as the responses of each role."""
+    transcript = { role: [] for role in FAKE_ROLES }
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                message = json.loads(line)
+                if message.get("name") in transcript:
+                    transcript[message["name"]].append(message["content"])
+    return transcript
+
+def save_fake_transcript(messages: Sequence[BaseMessage], path: Path) -> None:
+    """Save the agents responses of a conversation as a transcript that can be replayed."""
+    with open(path, "w", encoding="utf-8") as f:
+        for m in messages:
+            if isinstance(m, AIMessage) and m.name in FAKE_ROLES:
+                f.write(json.dumps({ "name": m.name, "content": str(m.content) }) + "\n")
+
+class FakeChatModel(BaseChatModel):
+    """Class for an offline chat model: it replays a recorded transcript, then it serves canned parsers of each format."""
+    temperature: float = 0.5
+    max_tokens: int = 32768
+    latency: float = 0.0
+    transcript: dict[str, list[str]] = Field(default_factory=dict)
+    _cursors: dict[str, int] = PrivateAttr(default_factory=dict)
+    _lock: Lock = PrivateAttr(default_factory=Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return { "temperature": self.temperature, "max_tokens": self.max_tokens }
+
+    def __get_recorded(self, role: str) -> str | None:
+        with self._lock:
+            responses = self.transcript.get(role, [])
+            cursor = self._cursors.get(role, 0)
+            if cursor >= len(responses):
+                return None
+            self._cursors[role] = cursor + 1
+            return responses[cursor]
+
+    def __get_canned_parser(self, format: str) -> str:
+        return (get_fake_parsers_dir() / f"{format.lower()}.c").read_text(encoding="utf-8")
+
+    def __get_canned(self, role: str, prompt: str) -> str:
+        format = get_fake_format(prompt)
+        if role == "Supervisor":
+            if "friendly response" in prompt or "conversational" in prompt:
+                return f"Here is the {format} parser, the assessment deemed it satisfactory."
+            return "\n".join([
+                f"Create a parser function for {format} files in C.",
+                "1. Read the entire input from stdin as raw bytes into a dynamically resized buffer.",
+                "2. Keep the parsing state in a struct and validate the input while scanning it.",
+                "3. On success print a short normalized summary to stdout and exit with code 0.",
+                "4. On failure print a descriptive error to stderr, print nothing to stdout and exit with a non-zero code.",
+                "5. Free all the allocated memory on every path."
+            ])
+        if role == "Assessor":
+            return f"The {format} parser is satisfactory: it meets all the requirements and specifications."
+
+        code = f"```c\n{self.__get_canned_parser(format)}```"
+        if role == "Generator":
+            return code
+
+        # ReAct: compilation, then execution, then final answer
+        # NB: the template has only numbered observations, the scratchpad has the ones of the tools used
+        observations = prompt.count("Observation:")
+        if observations <= 0:
+            return f"Thought: I need to check if the code compiles.\nAction: compilation_check\nAction Input: {code}"
+        if observations == 1:
+            return f"Thought: The code compiles; now I need to check if it executes the test correctly.\nAction: execution_check\nAction Input: {code}"
+        return f"Thought: The test execution is successful.\nFinal Answer: {code}"
+
+    def _generate(
+            self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager: CallbackManagerForLLMRun | None = None,
+            **kwargs: Any
+        ) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        role = get_fake_role(prompt)
+        response = self.__get_recorded(role)
+        if response is None:
+            response = self.__get_canned(role, prompt)
+
+        # synthetic latency of a hosted model
+        if self.latency > 0:
+            sleep(self.latency)
+
+        # NB: rough token counts (4 characters each), like the usage reported by hosted models
+        input_tokens = len(prompt) // 4
+        output_tokens = len(response) // 4
+        message = AIMessage(
+            content = response,
+            usage_metadata = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens
+            }
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -1,15 +1,30 @@
-import os, re
+import asyncio, os, re, shutil
 from datetime import datetime
 from dotenv import load_dotenv
+from functools import cache
 from getpass import getpass
+from math import ceil
 from pathlib import Path
 from pydantic import SecretStr
-from subprocess import run, TimeoutExpired
+from subprocess import run, Popen, CompletedProcess, TimeoutExpired, DEVNULL, PIPE
 from tempfile import TemporaryDirectory
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from threading import Lock, Timer
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Generator
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 from utils import colors
+from utils.compilation_cache import get_compilation_key, load_compilation, store_compilation
+from utils.llm_cache import LLMCache, LLM_CACHE_MODES, get_llm_cache_path
+from utils.fake_llm import FakeChatModel, load_fake_transcript
+from utils.rate_limit import TokenBucketRateLimiter, TokenUsageHandler, get_rate_limit_path
+from utils.inputs import get_scaled_input
+from utils.diagnostics import parse_gcc_diagnostics, parse_sanitizer_report, summarize_diagnostics
+from utils.sandbox import get_sandbox_time, get_sandbox_rlimits, get_sandbox_command, get_sandbox_asan_options, get_sandbox_limit_hit
+from utils.workspace import Workspace
 
 
 
@@ -23,6 +38,36 @@ def __get_in_parser_path(format: str) -> Path:
     format = format.lower()
     return Path("input") / format / f"test.{format}"
 
+def __get_in_parser_file(format: str) -> tuple[Path, int]:
+    """Get the input file of a format with its size."""
+    in_parser_path = __get_in_parser_path(format)
+    # NB: a single stat, nothing to cache (the size comes with the modification time that a cache would check)
+    return in_parser_path, os.stat(in_parser_path).st_size
+
+# test suites already seen: format -> (modification times of the suite directories and size of the large case, test cases)
+__in_parser_suites: dict[str, tuple[list[float], list[tuple[str, Path]]]] = {}
+
+def __get_in_parser_suite(format: str) -> list[tuple[str, Path]]:
+    """Get the test cases of a format (listed again only if the suite directories have been modified)."""
+    # NB: the default input file is a valid case, others are in input/<format>/<valid|invalid|large>
+    in_parser_path = __get_in_parser_path(format)
+    suite_dirs = [ in_parser_path.parent / case_type for case_type in ["valid", "invalid", "large"] ]
+    large_mb = float(get_setting("LARGE_INPUT_MB", "4"))
+    mtimes = [ (os.stat(suite_dir).st_mtime_ns if suite_dir.is_dir() else 0) for suite_dir in suite_dirs ] + [ large_mb ]
+    cached = __in_parser_suites.get(format)
+    if cached and cached[0] == mtimes:
+        return cached[1]
+
+    cases = [ ("valid", in_parser_path) ]
+    for suite_dir in suite_dirs:
+        if suite_dir.is_dir():
+            cases += [ (suite_dir.name, case_path) for case_path in sorted(suite_dir.iterdir()) if case_path.is_file() ]
+    # NB: a large case for every format, the default input scaled (generated once in cache/inputs, none for PDF)
+    if large_mb > 0 and (large_path := get_scaled_input(in_parser_path, format, large_mb)) is not None:
+        cases.append(("large", large_path))
+    __in_parser_suites[format] = (mtimes, cases)
+    return cases
+
 def __check_if_wsl(wsl: str) -> bool:
     return (wsl.lower() != "none")
 
@@ -34,12 +79,47 @@ def __to_wslpath(cmd: list[str], path: str) -> str:
 def __get_wsl_cmd(wsl: str) -> list[str]:
     return ["wsl", "-d", wsl]
 
+def __get_command() -> list[str]:
+    wsl = set_if_undefined("WSL")
+    return __get_wsl_cmd(wsl) if __check_if_wsl(wsl) else []
+
+def __get_command_paths(c_parser_path: Path, o_parser_path: Path, wslpath: bool = False) -> tuple[list[str], str, str]:
+    command = __get_command()
+    if command:
+        c_parser_path_str = c_parser_path.as_posix()
+        o_parser_path_str = o_parser_path.as_posix()
+        if wslpath:
+            c_parser_path_str = __to_wslpath(command, c_parser_path_str)
+            o_parser_path_str = __to_wslpath(command, o_parser_path_str)
+    else:
+        c_parser_path_str = str(c_parser_path)
+        o_parser_path_str = str(o_parser_path)
+
+    return command, c_parser_path_str, o_parser_path_str
+
+def __write_c_code(c_parser_path: Path, parser_code: str) -> None:
+    # NB: not rewritten if unchanged, so concurrent compilations of the same source never read it half written
+    if c_parser_path.exists() and c_parser_path.read_text(encoding="utf-8") == parser_code:
+        return
+    
+    with open(c_parser_path, "w", encoding="utf-8") as f:
+        f.write(parser_code)
+
+@cache
+def __get_gcc_version(command: tuple[str, ...]) -> str:
+    result = run([*command, "gcc", "--version"], capture_output=True, text=True, encoding="utf-8", check=True)
+    return result.stdout.strip()
+
+def __get_c_name(c_path: str) -> str:
+    return re.split(r"[\\/]", c_path)[-1]
+
 def __get_stderr_beautified(stderr: str, c_path: str, o_path: str | None = None) -> str:
     """Avoiding confusion for LLM on file name referred in stderr with better line and column number specification."""
     if not stderr:
         return stderr
     
-    c_path_esc = re.escape(c_path)
+    # NB: any directory is matched because binaries restored from the compilation cache refer to the source they were built from
+    c_path_esc = rf"(?:\S*[\\/])?{re.escape(__get_c_name(c_path))}"
 
     # NB: order matters!
 
@@ -72,6 +152,18 @@ def set_if_undefined(var: str) -> str:
     
     return value
 
+def get_setting(var: str, default: str = "") -> str:
+    """Get an optional setting from environment variables or .env file."""
+    # load variables from .env file
+    load_dotenv()
+
+    return os.environ.get(var, default)
+
+def is_setting_enabled(var: str, default: bool = False) -> bool:
+    """Check if an optional boolean setting is enabled."""
+    value = get_setting(var, str(default))
+    return value.lower() in ["1", "true", "yes", "on"]
+
 def map_input_to_model_source(input: int) -> str:
     if input == 1:
         return "google"
@@ -79,6 +171,9 @@ def map_input_to_model_source(input: int) -> str:
         return "openai"
     elif input == 3:
         return "anthropic"
+    elif input == 4:
+        # offline (recorded transcript or canned parsers)
+        return "fake"
     
     raise Exception("Cannot map input to model source")
 
@@ -87,7 +182,7 @@ def get_model_source_from_input() -> str:
     print_colored("\n=== C Parser Generator Setup ===\n", colors.CYAN, bold=True)
 
     print("Available model sources:\n")
-    sources = range(1, 4)
+    sources = range(1, 5)
     for i in sources:
         print(f"- {i}: {map_input_to_model_source(i)}")
 
@@ -142,18 +237,86 @@ def get_file_format_from_input() -> str:
         
         print("Invalid file format. Please enter one of these: " + (", ".join(actions)))
 
+# NB: a context variable, so concurrent sessions (threads) get their own fake models
+__fake_llm_session: ContextVar[str] = ContextVar("fake_llm_session", default="")
+
 def create_session(source: str, type: str, format: str) -> Path:
     """Create a session directory with timestamp and return its path."""
     session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
     session_dir = Path("output") / source / type / format.lower() / f"session_{session_id}"
-    session_dir.mkdir(parents=True)
+    session_dir.parent.mkdir(parents=True, exist_ok=True)
+    # NB: concurrent sessions can start in the same second, mkdir is atomic so only one gets each name
+    for i in range(1, 1000):
+        try:
+            session_dir.mkdir()
+            break
+        except FileExistsError:
+            session_dir = session_dir.with_name(f"session_{session_id}_{i}")
+    else:
+        raise Exception(f"Cannot create a session directory for {session_dir}")
     
     print_colored(f"\nCreated session directory: {session_dir}", colors.CYAN, bold=True)
+    # NB: each session replays the transcript of the fake model from the start
+    if source == "fake":
+        __fake_llm_session.set(str(session_dir))
     
     return session_dir
 
+@cache
+def __get_llm_cache(mode: str, max_mb: float, max_age_days: float) -> LLMCache:
+    return LLMCache(get_llm_cache_path(), mode, max_mb, max_age_days)
+
+def get_llm_cache() -> LLMCache | None:
+    """Get the persistent cache of LLM responses from the settings (None if it is off)."""
+    mode = get_setting("LLM_CACHE", "off").lower()
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(f"Invalid LLM_CACHE, it must be one of these: {", ".join(LLM_CACHE_MODES)}")
+    if mode == "off":
+        return None
+    
+    return __get_llm_cache(mode, float(get_setting("LLM_CACHE_MAX_MB", "512")), float(get_setting("LLM_CACHE_MAX_AGE_DAYS", "30")))
+
+@cache
+def __get_rate_limiter(source: str, requests_per_minute: float, tokens_per_minute: float) -> TokenBucketRateLimiter:
+    return TokenBucketRateLimiter(get_rate_limit_path(), source, requests_per_minute, tokens_per_minute)
+
+def get_rate_limiter(source: str) -> TokenBucketRateLimiter | None:
+    """Get the limiter of requests and tokens per minute of a provider from the settings (None if it has no limits)."""
+    requests_per_minute = float(get_setting(f"{source.upper()}_REQUESTS_PER_MINUTE", "0"))
+    tokens_per_minute = float(get_setting(f"{source.upper()}_TOKENS_PER_MINUTE", "0"))
+    if requests_per_minute <= 0 and tokens_per_minute <= 0:
+        return None
+    
+    return __get_rate_limiter(source, requests_per_minute, tokens_per_minute)
+
+# models already initialized: (source, temperature, max tokens, timeout, retries, cache, rate limiter, fake transcript and session) -> model
+__llm_pool: dict[tuple[str, float, int, int, int, LLMCache | None, TokenBucketRateLimiter | None, tuple[str, str]], ChatGoogleGenerativeAI | ChatOpenAI | ChatAnthropic | FakeChatModel] = {}
+__llm_pool_lock = Lock()
+
 def initialize_llm(source: str, temp: float = 0.5, tokens: int = 32768, timeout: int = 60 * 15, retries: int = 3):
+    """Get a hosted model with appropriate parameters (reused across calls, so its HTTP connections are kept alive)."""
+    llm_cache = get_llm_cache()
+    rate_limiter = get_rate_limiter(source)
+    # NB: the fake model keeps the replay cursors of its transcript, so it isn't shared by other transcripts and sessions
+    fake_key = (get_setting("FAKE_LLM_TRANSCRIPT"), __fake_llm_session.get()) if source == "fake" else ("", "")
+    key = (source, temp, tokens, timeout, retries, llm_cache, rate_limiter, fake_key)
+    with __llm_pool_lock:
+        llm = __llm_pool.get(key)
+        if llm is None:
+            llm = __create_llm(source, temp, tokens, timeout, retries, llm_cache, rate_limiter)
+            __llm_pool[key] = llm
+    
+    return llm
+
+def __create_llm(
+        source: str, temp: float, tokens: int, timeout: int, retries: int, 
+        llm_cache: LLMCache | None = None, rate_limiter: TokenBucketRateLimiter | None = None
+    ):
     """Initialize a hosted model with appropriate parameters."""
+    # NB: False (not None) when off, so the global langchain cache is never used either
+    llm_cache = llm_cache or False
+    # NB: the limiter waits before each request, the handler takes the tokens of each response
+    callbacks = [ TokenUsageHandler(rate_limiter) ] if rate_limiter else None
     if source == "google":
         #model_id = "gemini-2.0-flash"
         model_id = "gemini-2.5-flash"
@@ -165,7 +328,10 @@ def initialize_llm(source: str, temp: float = 0.5, tokens: int = 32768, timeout:
             max_tokens = tokens,
             timeout = timeout,
             max_retries = retries,
-            api_key = SecretStr(api_key)
+            api_key = SecretStr(api_key),
+            cache = llm_cache,
+            rate_limiter = rate_limiter,
+            callbacks = callbacks
         )
     elif source == "openai":
         #model_id = "gpt-4o-mini"
@@ -178,7 +344,12 @@ def initialize_llm(source: str, temp: float = 0.5, tokens: int = 32768, timeout:
             max_tokens = tokens,
             timeout = timeout,
             max_retries = retries,
-            api_key = SecretStr(api_key)
+            api_key = SecretStr(api_key),
+            cache = llm_cache,
+            rate_limiter = rate_limiter,
+            callbacks = callbacks,
+            # NB: streamed responses have no usage otherwise
+            stream_usage = True
         )
     elif source == "anthropic":
         #model_id = "claude-3-7-sonnet-20250219"
@@ -193,7 +364,22 @@ def initialize_llm(source: str, temp: float = 0.5, tokens: int = 32768, timeout:
             timeout = timeout,
             max_retries = retries,
             api_key = SecretStr(api_key),
-            betas=["context-1m-2025-08-07"]
+            betas=["context-1m-2025-08-07"],
+            cache = llm_cache,
+            rate_limiter = rate_limiter,
+            callbacks = callbacks
+        )
+    elif source == "fake":
+        transcript_path = get_setting("FAKE_LLM_TRANSCRIPT")
+
+        return FakeChatModel(
+            temperature = temp,
+            max_tokens = tokens,
+            latency = float(get_setting("FAKE_LLM_LATENCY", "0")),
+            transcript = load_fake_transcript(Path(transcript_path)) if transcript_path else {},
+            cache = llm_cache,
+            rate_limiter = rate_limiter,
+            callbacks = callbacks
         )
     
     raise ValueError("Invalid source")
@@ -218,8 +404,39 @@ def extract_c_code(text: str) -> str:
     # if no code block is found, then return as is
     return text
 
-def compile_c_code(parser_path: Path, parser_code: str, runtime: bool = True, wslpath: bool = False) -> dict[str, bool | str]:
-    """Compile the C code using gcc with strict optimization, warnings and hardening."""
+def __find_lines(code_lines: list[str], search_lines: list[str]) -> int | None:
+    """Find the only occurrence of the lines, ignoring the indentation and trailing spaces."""
+    search_lines = [ line.strip() for line in search_lines ]
+    found = [
+        i for i in range(len(code_lines) - len(search_lines) + 1)
+        if all(code_lines[i + j].strip() == line for j, line in enumerate(search_lines))
+    ]
+    return found[0] if len(found) == 1 else None
+
+def apply_edit_blocks(code: str, text: str) -> str | None:
+    """Apply the SEARCH/REPLACE edit blocks of the LLM response to the code (None if there are none or one doesn't apply)."""
+    blocks = re.findall(r"<{5,9} ?SEARCH[^\n]*\n(.*?)\n?={5,9}[^\S\n]*\n(.*?)\n?>{5,9} ?REPLACE", text, re.DOTALL)
+    if not blocks:
+        return None
+
+    for search, replace in blocks:
+        if not search.strip():
+            return None
+        if code.count(search) == 1:
+            code = code.replace(search, replace)
+            continue
+        # NB: models often get the indentation wrong, so lines are compared stripped
+        code_lines = code.splitlines()
+        search_lines = search.strip("\n").splitlines()
+        start = __find_lines(code_lines, search_lines)
+        if start is None:
+            return None
+        code = "\n".join(code_lines[:start] + replace.strip("\n").splitlines() + code_lines[start + len(search_lines):]) + "\n"
+
+    return code.strip()
+
+def __get_compilation_flags(runtime: bool) -> tuple[list[str], list[str]]:
+    """Get compiler and linker flags for gcc with strict optimization, warnings and hardening."""
 
     runtime_flags = [
         "-O1",
@@ -307,58 +524,278 @@ def compile_c_code(parser_path: Path, parser_code: str, runtime: bool = True, ws
         "-pie"
     ]
 
+    return compiler_flags, linker_flags
+
+# Steps of a check: a generator that yields the subprocesses to run (run arguments) and gets their results,
+# so the same logic is driven both synchronously and asynchronously
+Steps = Generator[dict[str, Any], CompletedProcess, dict[str, bool | str]]
+
+def __run_steps(steps: Steps) -> dict[str, bool | str]:
+    """Drive the steps with blocking subprocesses."""
+    try:
+        request = next(steps)
+        while True:
+            try:
+                result = run(**request, capture_output=True)
+            except TimeoutExpired as te:
+                request = steps.throw(te)
+            else:
+                request = steps.send(result)
+    except StopIteration as stop:
+        return stop.value
+
+async def __arun(args: list[str], stdin: Any = None, input: bytes | None = None, timeout: float | None = None) -> CompletedProcess:
+    """Asynchronous subprocess.run (only the arguments used by the steps)."""
+    process = await asyncio.create_subprocess_exec(
+        *args, 
+        stdin = PIPE if input is not None else stdin, 
+        stdout = PIPE, 
+        stderr = PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(input), timeout)
+    except TimeoutError:
+        process.kill()
+        await process.wait()
+        raise TimeoutExpired(args, timeout or 0)
+    except asyncio.CancelledError:
+        # NB: a cancelled task (e.g. a discarded best-of-N candidate) must not leave its process running
+        if process.returncode is None:
+            process.kill()
+        raise
+    
+    return CompletedProcess(args, process.returncode or 0, stdout, stderr)
+
+def __advance_steps(resume: Callable[[Any], dict[str, Any]], value: Any) -> tuple[bool, Any]:
+    """Resume the steps until the next request: (True, request), or (False, result) when they end."""
+    # NB: StopIteration can't go through a future
+    try:
+        return True, resume(value)
+    except StopIteration as stop:
+        return False, stop.value
+
+async def __arun_steps(steps: Steps) -> dict[str, bool | str]:
+    """Drive the steps with asynchronous subprocesses (the event loop is free while they run)."""
+    # NB: the steps between the subprocesses run in a thread, they block too (cache lookups, copies of binaries, gcc --version)
+    running, request = await asyncio.to_thread(__advance_steps, steps.send, None)
+    while running:
+        try:
+            result = await __arun(**request)
+        except TimeoutExpired as te:
+            running, request = await asyncio.to_thread(__advance_steps, steps.throw, te)
+        else:
+            running, request = await asyncio.to_thread(__advance_steps, steps.send, result)
+
+    return request
+
+def __get_compilation_steps(parser_path: Path, parser_code: str, runtime: bool, wslpath: bool, cached: bool) -> Steps:
     c_parser_path = get_c_parser_path(parser_path)
     o_parser_path = get_o_parser_path(parser_path, runtime)
 
-    with open(c_parser_path, "w", encoding="utf-8") as f:
-        f.write(parser_code)
+    __write_c_code(c_parser_path, parser_code)
 
-    wsl = set_if_undefined("WSL")
-    if __check_if_wsl(wsl):
-        command = __get_wsl_cmd(wsl)
-        c_parser_path_str = c_parser_path.as_posix()
-        o_parser_path_str = o_parser_path.as_posix()
-        if wslpath:
-            c_parser_path_str = __to_wslpath(command, c_parser_path_str)
-            o_parser_path_str = __to_wslpath(command, o_parser_path_str)
-    else:
-        command = []
-        c_parser_path_str = str(c_parser_path)
-        o_parser_path_str = str(o_parser_path)
+    command, c_parser_path_str, o_parser_path_str = __get_command_paths(c_parser_path, o_parser_path, wslpath)
 
-    try:
-        result = run(
-            [*command, "gcc", *compiler_flags, c_parser_path_str, *linker_flags, "-o", o_parser_path_str],
-            capture_output = True,
-            text = True,
-            encoding = "utf-8",
-            timeout = 60 * 5
-        )
-    except TimeoutExpired as te:
-        return {
-            'success': False,  
-            'stdout': '',
-            'stderr': f'Failed to compile the code: {te}'
-        }
+    return __compile_c_code(command, parser_code, c_parser_path_str, o_parser_path_str, runtime, o_parser_path if cached else None)
 
-    compilation_stdout = result.stdout
-    compilation_stderr = __get_stderr_beautified(result.stderr, c_parser_path_str)
-    
-    return {
+def compile_c_code(parser_path: Path, parser_code: str, runtime: bool = True, wslpath: bool = False, cached: bool = True) -> dict[str, bool | str]:
+    """Compile the C code using gcc with strict optimization, warnings and hardening."""
+    return __run_steps(__get_compilation_steps(parser_path, parser_code, runtime, wslpath, cached))
+
+async def acompile_c_code(parser_path: Path, parser_code: str, runtime: bool = True, wslpath: bool = False, cached: bool = True) -> dict[str, bool | str]:
+    """Compile the C code using gcc with strict optimization, warnings and hardening (asynchronously)."""
+    # NB: the source is written (and the paths converted, with WSL) in a thread
+    steps = await asyncio.to_thread(__get_compilation_steps, parser_path, parser_code, runtime, wslpath, cached)
+    return await __arun_steps(steps)
+
+def __compile_c_code(
+        command: list[str], parser_code: str, c_parser_path_str: str | None, o_parser_path_str: str, runtime: bool, 
+        o_parser_path: Path | None = None
+    ) -> Steps:
+    """Run gcc on the C code (piped on stdin if there isn't a source path), using the cache if the output path is local."""
+    compiler_flags, linker_flags = __get_compilation_flags(runtime)
+    structured_diagnostics = is_setting_enabled("STRUCTURED_DIAGNOSTICS")
+    if structured_diagnostics:
+        compiler_flags = [*compiler_flags, "-fdiagnostics-format=json"]
+    if c_parser_path_str:
+        source_args = [c_parser_path_str]
+        source_input = None
+    else:
+        source_args = ["-x", "c", "-"]
+        source_input = parser_code.encode("utf-8")
+        c_parser_path_str = "<stdin>"
+
+    # Compilation tiers (buildtime only): syntax check and, if it passes, the full build (optimizing, with the static analyzer)
+    # NB: with front end errors (-Werror included) gcc stops before the optimizers and the analyzer in the full build too, so a failing syntax check gives its same diagnostics
+    compiler_tiers = [compiler_flags]
+    if not runtime and is_setting_enabled("TIERED_COMPILATION"):
+        syntax_flags = [flag for flag in compiler_flags if not flag.startswith("-fanalyzer")]
+        compiler_tiers = [[*syntax_flags, "-fsyntax-only"], compiler_flags]
+
+    # Look for the same compilation in the cache (NB: paths are not part of the key)
+    use_cache = (o_parser_path is not None) and is_setting_enabled("COMPILATION_CACHE")
+    if use_cache:
+        gcc_version = __get_gcc_version(tuple(command))
+        cache_flags = [flag for tier_flags in compiler_tiers for flag in tier_flags] + linker_flags
+        cache_key = get_compilation_key(parser_code, cache_flags, runtime, gcc_version)
+        cache_max_age_days = float(get_setting("COMPILATION_CACHE_MAX_AGE_DAYS", "30"))
+        cached_result = load_compilation(cache_key, o_parser_path, cache_max_age_days)
+        if cached_result:
+            return cached_result
+
+    for tier_flags in compiler_tiers:
+        if "-fsyntax-only" in tier_flags:
+            gcc_args = [*tier_flags, *source_args]
+        else:
+            gcc_args = [*tier_flags, *source_args, *linker_flags, "-o", o_parser_path_str]
+
+        try:
+            result = yield {
+                "args": [*command, "gcc", *gcc_args],
+                "input": source_input,
+                "timeout": 60 * 5
+            }
+        except TimeoutExpired as te:
+            return {
+                'success': False,  
+                'stdout': '',
+                'stderr': f'Failed to compile the code: {te}'
+            }
+        
+        # stop at the first failing tier
+        if result.returncode != 0:
+            break
+
+    compilation_stdout = result.stdout.decode("utf-8", errors="replace")
+    compilation_stderr = result.stderr.decode("utf-8", errors="replace")
+    if structured_diagnostics:
+        compilation_stderr = summarize_diagnostics(parse_gcc_diagnostics(compilation_stderr, __get_c_name(c_parser_path_str)))
+    compilation_stderr = __get_stderr_beautified(compilation_stderr, c_parser_path_str)
+    compilation_result = {
         'success': (result.returncode == 0),  
         'stdout': compilation_stdout,
         'stderr': compilation_stderr
     }
 
+    if use_cache:
+        store_compilation(cache_key, compilation_result, o_parser_path, float(get_setting("COMPILATION_CACHE_MAX_MB", "1024")), cache_max_age_days)
+    
+    return compilation_result
+
+def compile_c_code_profiles(parser_path: Path, parser_code: str, wslpath: bool = False) -> tuple[dict[str, bool | str], str]:
+    """Compile the C code with both buildtime and runtime flags, returning the result and the profile it refers to."""
+    # NB: the source is shared, so it must be written before starting both compilations
+    __write_c_code(get_c_parser_path(parser_path), parser_code)
+
+    return __compile_profiles(lambda runtime: compile_c_code(parser_path, parser_code, runtime, wslpath))
+
+def __compile_profiles(compile_profile: Callable[[bool], dict[str, bool | str]]) -> tuple[dict[str, bool | str], str]:
+    if not is_setting_enabled("PARALLEL_COMPILATION"):
+        result = compile_profile(False)
+        if not result["success"]:
+            return result, "buildtime"
+        
+        return compile_profile(True), "runtime"
+
+    # Both profiles at the same time (each one has its own output path)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        buildtime = executor.submit(compile_profile, False)
+        runtime = executor.submit(compile_profile, True)
+        buildtime_result = buildtime.result()
+        runtime_result = runtime.result()
+    
+    # NB: same semantics of the sequential mode, buildtime errors first
+    if not buildtime_result["success"]:
+        return buildtime_result, "buildtime"
+    
+    return runtime_result, "runtime"
+
+async def acompile_c_code_profiles(parser_path: Path, parser_code: str, wslpath: bool = False) -> tuple[dict[str, bool | str], str]:
+    """Compile the C code with both buildtime and runtime flags, returning the result and the profile it refers to (asynchronously)."""
+    await asyncio.to_thread(__write_c_code, get_c_parser_path(parser_path), parser_code)
+
+    return await __acompile_profiles(lambda runtime: acompile_c_code(parser_path, parser_code, runtime, wslpath))
+
+async def __acompile_profiles(compile_profile: Callable[[bool], Awaitable[dict[str, bool | str]]]) -> tuple[dict[str, bool | str], str]:
+    if not is_setting_enabled("PARALLEL_COMPILATION"):
+        result = await compile_profile(False)
+        if not result["success"]:
+            return result, "buildtime"
+        
+        return await compile_profile(True), "runtime"
+
+    # Both profiles at the same time (each one has its own output path)
+    buildtime_result, runtime_result = await asyncio.gather(compile_profile(False), compile_profile(True))
+    
+    # NB: same semantics of the sequential mode, buildtime errors first
+    if not buildtime_result["success"]:
+        return buildtime_result, "buildtime"
+    
+    return runtime_result, "runtime"
+
 def execute_c_code(parser_path: Path, parser_format: str, runtime: bool = True, wslpath: bool = False) -> dict[str, bool | str]:
     """Execute the compiled C program, feeding it the contents of the input file."""
+    c_parser_path = get_c_parser_path(parser_path)
+    o_parser_path = get_o_parser_path(parser_path, runtime)
+
+    # Execution command building
+    command, c_parser_path_str, o_parser_path_str = __get_command_paths(c_parser_path, o_parser_path, wslpath)
+
+    return __run_steps(__execute_c_code(command, c_parser_path_str, o_parser_path_str, parser_format, runtime))
+
+async def aexecute_c_code(parser_path: Path, parser_format: str, runtime: bool = True, wslpath: bool = False) -> dict[str, bool | str]:
+    """Execute the compiled C program, feeding it the contents of the input file (asynchronously)."""
+    c_parser_path = get_c_parser_path(parser_path)
+    o_parser_path = get_o_parser_path(parser_path, runtime)
+
+    # Execution command building
+    command, c_parser_path_str, o_parser_path_str = await asyncio.to_thread(__get_command_paths, c_parser_path, o_parser_path, wslpath)
+
+    return await __arun_steps(__execute_c_code(command, c_parser_path_str, o_parser_path_str, parser_format, runtime))
+
+@cache
+def __has_prlimit() -> bool:
+    return shutil.which("prlimit") is not None
+
+def __get_sandbox_limits() -> dict[str, float]:
+    """Get the resource limits of the executions from the settings."""
+    return {
+        "time_seconds": float(get_setting("EXECUTION_TIME_LIMIT", "10")),
+        "time_seconds_per_mb": float(get_setting("EXECUTION_TIME_PER_MB", "1")),
+        "memory_mb": float(get_setting("EXECUTION_MEMORY_MB", "1024")),
+        "file_mb": float(get_setting("EXECUTION_FILE_MB", "16")),
+        "open_files": float(get_setting("EXECUTION_OPEN_FILES", "64"))
+    }
+
+def __get_sandbox(command: list[str], input_size: int, runtime: bool) -> tuple[list[str], bool, dict[str, int], dict[str, float], int]:
+    """Get how to run an executable inside the resource limits: command, if the exit status is relayed by WSL, limits and wall-clock timeout."""
+    limits = __get_sandbox_limits()
+    time_budget = get_sandbox_time(limits, input_size)
+    # NB: sanitizers get the memory limit through their options
+    rlimits = get_sandbox_rlimits(limits, time_budget, address_space=not runtime)
+    # NB: wall-clock timeout a bit higher than the CPU limit, for programs waiting without using CPU
+    timeout = int(time_budget) + 5
+
+    # NB: prlimit and not setrlimit in a preexec function, which can deadlock the child when there are threads (e.g. suite cases, benchmark workers)
+    # (with WSL the executable isn't a child process here, so the limits are applied inside the distro anyway)
+    if command or __has_prlimit():
+        return [*command, *get_sandbox_command(rlimits)], bool(command), rlimits, limits, timeout
+    
+    # only the wall-clock timeout elsewhere
+    return command, False, rlimits, limits, timeout
 
+def __execute_c_code(
+        command: list[str], c_parser_path_str: str, o_parser_path_str: str, parser_format: str, runtime: bool, 
+        in_parser_path: Path | None = None
+    ) -> Steps:
     try:
-        # NB: read bytes, not text (for a general approach that supports all input files)
-        # NB: with rb, no encoding must be specified
-        in_parser_path = __get_in_parser_path(parser_format)
-        with open(in_parser_path, "rb") as f:
-            input_bytes = f.read()
+        # NB: the file is given to the executable as stdin, without being read here (input files can be huge)
+        # NB: raw bytes, not text (for a general approach that supports all input files)
+        if in_parser_path is None:
+            in_parser_path, in_parser_size = __get_in_parser_file(parser_format)
+        else:
+            in_parser_size = os.path.getsize(in_parser_path)
+        in_parser_file = open(in_parser_path, "rb")
     except Exception as e:
         return {
             'success': False,
@@ -366,22 +803,11 @@ def execute_c_code(parser_path: Path, parser_format: str, runtime: bool = True,
             'stderr': f'Failed to read input file: {e}'
         }
 
-    c_parser_path = get_c_parser_path(parser_path)
-    o_parser_path = get_o_parser_path(parser_path, runtime)
+    sandbox = is_setting_enabled("SANDBOX_EXECUTION")
+    timeout = 60 * 5
+    if sandbox:
+        command, relayed, rlimits, limits, timeout = __get_sandbox(command, in_parser_size, runtime)
 
-    # Execution command building    
-    wsl = set_if_undefined("WSL")
-    if __check_if_wsl(wsl):
-        command = __get_wsl_cmd(wsl)
-        c_parser_path_str = c_parser_path.as_posix()
-        o_parser_path_str = o_parser_path.as_posix()
-        if wslpath:
-            c_parser_path_str = __to_wslpath(command, c_parser_path_str)
-            o_parser_path_str = __to_wslpath(command, o_parser_path_str)
-    else:
-        command = []
-        c_parser_path_str = str(c_parser_path)
-        o_parser_path_str = str(o_parser_path)
     if runtime:
         asan_options = [
             "detect_leaks=1",
@@ -390,24 +816,30 @@ def execute_c_code(parser_path: Path, parser_format: str, runtime: bool = True,
             "check_initialization_order=1",
             "strict_init_order=1"
         ]
-        command += ["env", f"ASAN_OPTIONS={":".join(asan_options)}"]
+        if sandbox:
+            asan_options += get_sandbox_asan_options(limits)
+        command = [*command, "env", f"ASAN_OPTIONS={":".join(asan_options)}"]
     
+    start = perf_counter()
     try:
-        # Run the executable with the raw-bytes file contents as stdin and with asan options (maybe)
-        # NB: no need for encoding because text is equal to False
-        result = run(
-            [*command, o_parser_path_str],
-            input = input_bytes,
-            capture_output = True,
-            text = False,
-            timeout = 60 * 5
-        )
+        # Run the executable with the raw-bytes file as stdin and with asan options (maybe)
+        # NB: raw bytes, decoded below
+        result = yield {
+            "args": [*command, o_parser_path_str],
+            "stdin": in_parser_file,
+            "timeout": timeout
+        }
     except TimeoutExpired as te:
         return {
             'success': False,  
             'stdout': '',
-            'stderr': f'Failed to execute the code, probably due to an infinite loop: {te}'
+            'stderr': (
+                f'Execution stopped: wall-clock time limit ({timeout} s) exceeded, probably due to an infinite loop or a blocking read' if sandbox
+                else f'Failed to execute the code, probably due to an infinite loop: {te}'
+            )
         }
+    finally:
+        in_parser_file.close()
 
     # Decode stdout/stderr only for human-readable messages
     def safe_decode(b: bytes) -> str:
@@ -418,7 +850,12 @@ def execute_c_code(parser_path: Path, parser_format: str, runtime: bool = True,
     
     execution_stdout = safe_decode(result.stdout)
     execution_stderr = safe_decode(result.stderr)
+    limit_hit = get_sandbox_limit_hit(result.returncode, execution_stderr, rlimits, limits["memory_mb"], relayed, perf_counter() - start) if sandbox else None
+    if is_setting_enabled("STRUCTURED_DIAGNOSTICS"):
+        execution_stderr = summarize_diagnostics(parse_sanitizer_report(execution_stderr, __get_c_name(c_parser_path_str)))
     execution_stderr = __get_stderr_beautified(execution_stderr, c_parser_path_str, o_parser_path_str)
+    if limit_hit:
+        execution_stderr = f"Execution stopped: {limit_hit}\n{execution_stderr}".rstrip()
 
     return {
         'success': (result.returncode == 0),
@@ -426,15 +863,119 @@ def execute_c_code(parser_path: Path, parser_format: str, runtime: bool = True,
         'stderr': execution_stderr
     }
 
+def save_testing_output(parser_path: Path, testing_result: dict[str, bool | str]) -> None:
+    """Save the testing result next to the parser."""
+    with open(parser_path / "output.txt", "w", encoding="utf-8") as f:
+        test_output = f"success: {"OK" if testing_result["success"] else "ERR"}\n"
+        test_output += f"stdout: {testing_result["stdout"]}\n"
+        test_output += f"stderr: {testing_result["stderr"]}"
+        f.write(test_output)
+
+def execute_c_code_suite(parser_path: Path, parser_format: str, runtime: bool = True, wslpath: bool = False) -> dict[str, bool | str]:
+    """Execute the compiled C program on all the test cases of the format, returning an aggregated report."""
+    c_parser_path = get_c_parser_path(parser_path)
+    o_parser_path = get_o_parser_path(parser_path, runtime)
+
+    # Execution command building
+    command, c_parser_path_str, o_parser_path_str = __get_command_paths(c_parser_path, o_parser_path, wslpath)
+
+    return __execute_c_code_suite(command, c_parser_path_str, o_parser_path_str, parser_format, runtime)
+
+async def aexecute_c_code_suite(parser_path: Path, parser_format: str, runtime: bool = True, wslpath: bool = False) -> dict[str, bool | str]:
+    """Execute the compiled C program on all the test cases of the format, returning an aggregated report (asynchronously)."""
+    c_parser_path = get_c_parser_path(parser_path)
+    o_parser_path = get_o_parser_path(parser_path, runtime)
+
+    # Execution command building
+    command, c_parser_path_str, o_parser_path_str = await asyncio.to_thread(__get_command_paths, c_parser_path, o_parser_path, wslpath)
+
+    return await __aexecute_c_code_suite(command, c_parser_path_str, o_parser_path_str, parser_format, runtime)
+
+def __check_case(case_type: str, result: dict[str, bool | str]) -> tuple[bool, str]:
+    if case_type != "invalid":
+        return bool(result["success"]), ""
+    
+    # invalid input must be rejected cleanly: error exit code, nothing on stdout and no sanitizer errors
+    if result["success"]:
+        return False, "invalid input accepted"
+    if result["stdout"]:
+        return False, "invalid input rejected but something printed on stdout"
+    if re.search(r"Sanitizer|runtime error", str(result["stderr"])):
+        return False, "invalid input rejected with runtime errors"
+    return True, ""
+
+def __get_suite_report(cases: list[tuple[str, Path]], outcomes: list[tuple[bool, str, dict[str, bool | str], float]]) -> dict[str, bool | str]:
+    report = []
+    errors = []
+    for (case_type, in_parser_path), (is_passed, reason, result, seconds) in zip(cases, outcomes):
+        case_name = f"{case_type} case {in_parser_path.name}"
+        report.append(f"{"✅" if is_passed else "❌"} {case_name} ({seconds * 1000:.1f} ms)")
+        if not is_passed:
+            error = f"{case_name} failed ({reason})" if reason else f"{case_name} failed"
+            if result["stderr"]:
+                error += f":\n{result["stderr"]}"
+            errors.append(error)
+    passed = sum(1 for outcome in outcomes if outcome[0])
+    report.insert(0, f"Test suite: {passed}/{len(cases)} cases passed")
+
+    return {
+        'success': (passed == len(cases)),
+        'stdout': "\n".join(report),
+        'stderr': "\n\n".join(errors)
+    }
+
+def __execute_c_code_suite(command: list[str], c_parser_path_str: str, o_parser_path_str: str, parser_format: str, runtime: bool) -> dict[str, bool | str]:
+    try:
+        cases = __get_in_parser_suite(parser_format)
+    except Exception as e:
+        return {
+            'success': False,
+            'stdout': '',
+            'stderr': f'Failed to read input files: {e}'
+        }
+
+    def execute_case(case: tuple[str, Path]) -> tuple[bool, str, dict[str, bool | str], float]:
+        case_type, in_parser_path = case
+        start = perf_counter()
+        result = __run_steps(__execute_c_code(command, c_parser_path_str, o_parser_path_str, parser_format, runtime, in_parser_path))
+        seconds = perf_counter() - start
+        return *__check_case(case_type, result), result, seconds
+
+    # All the test cases at the same time (each one is a different process)
+    with ThreadPoolExecutor(max_workers=min(len(cases), os.cpu_count() or 1)) as executor:
+        outcomes = list(executor.map(execute_case, cases))
+
+    return __get_suite_report(cases, outcomes)
+
+async def __aexecute_c_code_suite(command: list[str], c_parser_path_str: str, o_parser_path_str: str, parser_format: str, runtime: bool) -> dict[str, bool | str]:
+    try:
+        # NB: in a thread, the large case can be generated now
+        cases = await asyncio.to_thread(__get_in_parser_suite, parser_format)
+    except Exception as e:
+        return {
+            'success': False,
+            'stdout': '',
+            'stderr': f'Failed to read input files: {e}'
+        }
+
+    async def execute_case(case: tuple[str, Path]) -> tuple[bool, str, dict[str, bool | str], float]:
+        case_type, in_parser_path = case
+        start = perf_counter()
+        result = await __arun_steps(__execute_c_code(command, c_parser_path_str, o_parser_path_str, parser_format, runtime, in_parser_path))
+        seconds = perf_counter() - start
+        return *__check_case(case_type, result), result, seconds
+
+    # All the test cases at the same time (each one is a different process)
+    outcomes = list(await asyncio.gather(*[ execute_case(case) for case in cases ]))
+
+    return __get_suite_report(cases, outcomes)
+
 def analyze_c_code(parser_path: Path, parser_format: str) -> str:
     """Analyze the C code coverage."""
 
     try:
-        # NB: read bytes, not text (for a general approach that supports all input files)
-        # NB: with rb, no encoding must be specified
-        in_parser_path = __get_in_parser_path(parser_format)
-        with open(in_parser_path, "rb") as f:
-            input_bytes = f.read()
+        # NB: the file is given to the executable as stdin, without being read here
+        in_parser_path, in_parser_size = __get_in_parser_file(parser_format)
     except Exception as e:
         return f"Failed to read input file: {e}"
 
@@ -473,14 +1014,18 @@ def analyze_c_code(parser_path: Path, parser_format: str) -> str:
         if result.stderr:
             raise Exception(result.stderr)
         
-        # Execute
-        result = run(
-            [*command, o_parser_path_str],
-            input = input_bytes,
-            capture_output = True,
-            text = False,
-            timeout = timeout
-        )
+        # Execute (inside the resource limits, maybe)
+        execution_command, execution_timeout = command, timeout
+        if is_setting_enabled("SANDBOX_EXECUTION"):
+            execution_command, _, _, _, execution_timeout = __get_sandbox(command, in_parser_size, False)
+        with open(in_parser_path, "rb") as in_parser_file:
+            result = run(
+                [*execution_command, o_parser_path_str],
+                stdin = in_parser_file,
+                capture_output = True,
+                text = False,
+                timeout = execution_timeout
+            )
         if result.stderr:
             raise Exception(result.stderr)
 
@@ -499,17 +1044,163 @@ def analyze_c_code(parser_path: Path, parser_format: str) -> str:
     
     return result.stdout
 
+def __get_percentile(values: list[float], percentile: float) -> float:
+    # nearest-rank percentile
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percentile // 100))
+    return ordered[int(rank) - 1]
+
+@cache
+def __has_gnu_time(command: tuple[str, ...]) -> bool:
+    try:
+        return run([*command, "/usr/bin/time", "-f", "maxrss=%M", "true"], capture_output=True).returncode == 0
+    except OSError:
+        return False
+
+def __run_measured(command: list[str], o_parser_path_str: str, in_parser_path: Path) -> tuple[int, float, int | None]:
+    """Run the executable once on an input file (inside the resource limits), measuring wall-clock time and peak RSS (in KB)."""
+    # NB: always inside the limits, a parser that never ends must not stop the benchmarks
+    sandbox_command, _, _, _, timeout = __get_sandbox(command, os.path.getsize(in_parser_path), False)
+    limits_command = sandbox_command[len(command):]
+    # NB: GNU time forks the executable from a tiny process, so its peak RSS isn't inflated by the caller
+    # (with WSL the executable isn't a child process here, so without GNU time there is no peak RSS)
+    time_command = [ "/usr/bin/time", "-f", "maxrss=%M" ] if __has_gnu_time(tuple(command)) else []
+    with open(in_parser_path, "rb") as in_parser_file:
+        if time_command or command:
+            start = perf_counter()
+            result = run(
+                [*command, *time_command, *limits_command, o_parser_path_str],
+                stdin = in_parser_file,
+                stdout = DEVNULL,
+                stderr = PIPE,
+                timeout = timeout
+            )
+            seconds = perf_counter() - start
+            matches = re.findall(rb"maxrss=(\d+)", result.stderr) if time_command else []
+            return result.returncode, seconds, (int(matches[-1]) if matches else None)
+
+        # NB: rusage of the waited child (ru_maxrss is in KB on Linux), but the kernel keeps the peak RSS across exec,
+        # so it can't be lower than the RSS of this process when spawning
+        start = perf_counter()
+        process = Popen([*limits_command, o_parser_path_str], stdin=in_parser_file, stdout=DEVNULL, stderr=DEVNULL)
+        # NB: killed by a timer and not polled, so the measured time isn't rounded to the polling interval
+        kill_lock = Lock()
+        state = { "exited": False, "killed": False }
+        def kill() -> None:
+            with kill_lock:
+                if not state["exited"]:
+                    process.kill()
+                    state["killed"] = True
+        timer = Timer(timeout, kill)
+        timer.start()
+        # NB: waited without reaping first, so the timer can't kill another process with the same pid
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        seconds = perf_counter() - start
+        with kill_lock:
+            state["exited"] = True
+        timer.cancel()
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if state["killed"]:
+            raise TimeoutExpired(process.args, timeout)
+        return process.returncode, seconds, rusage.ru_maxrss
+
+def __get_benchmark_inputs(parser_format: str) -> list[Path]:
+    """Get the inputs of the performance benchmarks: the valid input scaled to the sizes of the settings (the valid cases, if it can't be scaled)."""
+    in_parser_path = __get_in_parser_path(parser_format)
+    sizes_mb = [ float(size) for size in get_setting("BENCHMARK_INPUT_MB", "1,10,100").split(",") if size.strip() ]
+    scaled_paths = [ get_scaled_input(in_parser_path, parser_format, size_mb) for size_mb in sizes_mb ]
+    if scaled_paths and None not in scaled_paths:
+        return scaled_paths
+    
+    # NB: only inputs that must be parsed successfully, the default one included
+    return [ in_parser_path for case_type, in_parser_path in __get_in_parser_suite(parser_format) if case_type != "invalid" ]
+
+def benchmark_c_code(parser_path: Path, parser_format: str, repetitions: int = 20) -> dict[str, float | None]:
+    """Benchmark the optimized (buildtime) C program on the valid input scaled to larger sizes: throughput, peak memory and latency."""
+    metrics = {
+        "throughput_mb_s": None,
+        "peak_rss_kb": None,
+        "latency_p50_ms": None,
+        "latency_p99_ms": None
+    }
+
+    try:
+        cases = __get_benchmark_inputs(parser_format)
+    except Exception:
+        return metrics
+
+    c_parser_path = get_c_parser_path(parser_path)
+    o_parser_path = get_o_parser_path(parser_path, False)
+    if not o_parser_path.exists():
+        # e.g. sessions with only the runtime profile
+        result = compile_c_code(parser_path, c_parser_path.read_text(encoding="utf-8"), runtime=False)
+        if not result["success"]:
+            return metrics
+    command, _, o_parser_path_str = __get_command_paths(c_parser_path, o_parser_path)
+
+    total_bytes = 0
+    total_seconds = 0.0
+    latencies = []
+    peak_rss = []
+    try:
+        for i, in_parser_path in enumerate(cases):
+            size = os.path.getsize(in_parser_path)
+            # warm-up (page cache and dynamic loader), not measured
+            __run_measured(command, o_parser_path_str, in_parser_path)
+            # NB: fewer repetitions for the inputs larger than 1 MB, their runtime is already stable
+            for _ in range(max(3, min(repetitions, ceil(repetitions * 2**20 / max(1, size))))):
+                returncode, seconds, rss = __run_measured(command, o_parser_path_str, in_parser_path)
+                if returncode != 0:
+                    # a parser failing on valid input has no meaningful performance
+                    return metrics
+                total_bytes += size
+                total_seconds += seconds
+                if i == 0:
+                    # NB: latency of the first (smallest) input only, the percentiles of different sizes aren't comparable
+                    latencies.append(seconds * 1000)
+                if rss is not None:
+                    peak_rss.append(rss)
+    except Exception:
+        return metrics
+
+    if latencies:
+        metrics["throughput_mb_s"] = (total_bytes / 2**20) / total_seconds
+        metrics["peak_rss_kb"] = max(peak_rss) if peak_rss else None
+        metrics["latency_p50_ms"] = __get_percentile(latencies, 50)
+        metrics["latency_p99_ms"] = __get_percentile(latencies, 99)
+
+    return metrics
+
+def __get_o_products_path(products_path: str, runtime: bool) -> str:
+    return f"{products_path}_{"runtime" if runtime else "buildtime"}"
+
+@cache
+def __get_workspace(command: tuple[str, ...]) -> Workspace:
+    return Workspace(list(command))
+
 def compilation_check(text: str) -> dict[str, bool | str]:
     """Function that checks if C code compiles correctly without warnings."""
     # extract the code
     code = extract_c_code(text)
+
+    if is_setting_enabled("IN_MEMORY_CHECKS"):
+        # pipe the code to the compiler, with build products on the workspace
+        command = __get_command()
+        with __get_workspace(tuple(command)).products() as products_path:
+            def compile_profile(runtime: bool) -> dict[str, bool | str]:
+                o_products_path = __get_o_products_path(products_path, runtime)
+                # NB: the cache needs a local output path (not available through WSL)
+                return __run_steps(__compile_c_code(command, code, None, o_products_path, runtime, None if command else Path(o_products_path)))
+            
+            result, _ = __compile_profiles(compile_profile)
+        
+        return result
     
     # create a temporary directory (NB: it needs wslpath)
     with TemporaryDirectory() as temp_dir:
         # compile the code
-        result = compile_c_code(Path(temp_dir), code, runtime=False, wslpath=True)
-        if result["success"]:
-            result = compile_c_code(Path(temp_dir), code, wslpath=True)
+        result, _ = compile_c_code_profiles(Path(temp_dir), code, wslpath=True)
 
     return result
 
@@ -518,6 +1209,20 @@ def execution_check(text: str, format: str) -> dict[str, bool | str]:
     # extract the code
     code = extract_c_code(text)
 
+    if is_setting_enabled("IN_MEMORY_CHECKS"):
+        # pipe the code to the compiler, with build products on the workspace
+        command = __get_command()
+        with __get_workspace(tuple(command)).products() as products_path:
+            o_products_path = __get_o_products_path(products_path, True)
+            result = __run_steps(__compile_c_code(command, code, None, o_products_path, True, None if command else Path(o_products_path)))
+            if result["success"]:
+                if is_setting_enabled("TEST_SUITE"):
+                    result = __execute_c_code_suite(command, "<stdin>", o_products_path, format, True)
+                else:
+                    result = __run_steps(__execute_c_code(command, "<stdin>", o_products_path, format, True))
+        
+        return result
+
     # create a temporary directory (NB: it needs wslpath)
     with TemporaryDirectory() as temp_dir:
         # compile the code
@@ -526,7 +1231,10 @@ def execution_check(text: str, format: str) -> dict[str, bool | str]:
         # prepare the result
         if result["success"]:
             # execute the code
-            result = execute_c_code(Path(temp_dir), format, wslpath=True)
+            if is_setting_enabled("TEST_SUITE"):
+                result = execute_c_code_suite(Path(temp_dir), format, wslpath=True)
+            else:
+                result = execute_c_code(Path(temp_dir), format, wslpath=True)
     
     return result
 
@@ -3,12 +3,12 @@ from typing import Any
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.graph import START, END, StateGraph
-from agents.supervisor.supervisor_agent import supervisor_node
+from agents.supervisor.supervisor_agent import supervisor_node, asupervisor_node
 from agents.orchestrator.orchestrator_agent import orchestrator_node
-from agents.generator.generator_agent import generator_node
-from agents.compiler.compiler_agent import compiler_node
-from agents.tester.tester_agent import tester_node
-from agents.assessor.assessor_agent import assessor_node
+from agents.generator.generator_agent import generator_node, agenerator_node
+from agents.compiler.compiler_agent import compiler_node, acompiler_node
+from agents.tester.tester_agent import tester_node, atester_node
+from agents.assessor.assessor_agent import assessor_node, aassessor_node
 from models import AgentType, AgentState, BenchmarkMetrics
 
 
@@ -17,17 +17,18 @@ def route_next(state: AgentState) -> AgentType:
     """Route to the next node based on the state."""
     return state["next_step"]
 
-def build_workflow():
-    """Build and return the workflow graph."""
+def build_workflow(asynchronous: bool = False):
+    """Build and return the workflow graph (with async nodes to run it with astart_workflow)."""
     workflow = StateGraph(AgentState)
     
     # Add nodes
-    workflow.add_node("Supervisor", supervisor_node)
+    # NB: the orchestrator only routes, so it stays sync (langgraph runs it in a thread)
+    workflow.add_node("Supervisor", asupervisor_node if asynchronous else supervisor_node)
     workflow.add_node("Orchestrator", orchestrator_node)
-    workflow.add_node("Generator", generator_node)
-    workflow.add_node("Compiler", compiler_node)
-    workflow.add_node("Tester", tester_node)
-    workflow.add_node("Assessor", assessor_node)
+    workflow.add_node("Generator", agenerator_node if asynchronous else generator_node)
+    workflow.add_node("Compiler", acompiler_node if asynchronous else compiler_node)
+    workflow.add_node("Tester", atester_node if asynchronous else tester_node)
+    workflow.add_node("Assessor", aassessor_node if asynchronous else assessor_node)
     
     # Set the entry point
     workflow.add_edge(START, "Supervisor")
@@ -94,6 +95,24 @@ def start_workflow(
         model_source: str, session_dir: Path, benchmark_metrics: BenchmarkMetrics, last_parser: dict[str, str] = {}
     ) -> dict[str, Any]:
     """Start the workflow graph."""
+    initial_state = __get_initial_state(user_action, user_request, file_format, round, max_iterations, model_source, session_dir, benchmark_metrics, last_parser)
+
+    return graph.invoke(initial_state, config)
+
+async def astart_workflow(
+        graph, config: RunnableConfig, 
+        user_action: str, user_request: str, file_format: str, round: int, max_iterations: int, 
+        model_source: str, session_dir: Path, benchmark_metrics: BenchmarkMetrics, last_parser: dict[str, str] = {}
+    ) -> dict[str, Any]:
+    """Start the workflow graph asynchronously (built with asynchronous=True)."""
+    initial_state = __get_initial_state(user_action, user_request, file_format, round, max_iterations, model_source, session_dir, benchmark_metrics, last_parser)
+
+    return await graph.ainvoke(initial_state, config)
+
+def __get_initial_state(
+        user_action: str, user_request: str, file_format: str, round: int, max_iterations: int, 
+        model_source: str, session_dir: Path, benchmark_metrics: BenchmarkMetrics, last_parser: dict[str, str]
+    ) -> AgentState:
     user_message = f"{user_action}: {user_request}"
     
     initial_state = {
@@ -115,4 +134,4 @@ def start_workflow(
         "benchmark_metrics": benchmark_metrics
     }
 
-    return graph.invoke(initial_state, config)
+    return initial_state
@@ -0,0 +1,75 @@
+import os, re
+from math import ceil
+from pathlib import Path
+from tempfile import mkstemp
+
+
+
+def get_scaled_inputs_dir() -> Path:
+    return Path("cache") / "inputs"
+
+def __scale_csv(data: bytes, count: int) -> bytes:
+    # header once, then the records
+    header, _, records = data.partition(b"\n")
+    records = records if records.endswith(b"\n") else records + b"\n"
+    return header + b"\n" + records * count
+
+def __scale_json(data: bytes, count: int) -> bytes:
+    # an array of documents
+    return b"[\n" + b",\n".join([data.strip()] * count) + b"\n]\n"
+
+def __scale_xml(data: bytes, count: int) -> bytes:
+    # the root elements inside a new root, after the prolog
+    match = re.match(rb"\s*(<\?xml[^>]*\?>)?\s*", data)
+    prolog = match.group(1) or b""
+    return prolog + b"\n<Scaled>\n" + (data[match.end():].rstrip() + b"\n") * count + b"</Scaled>\n"
+
+def __scale_html(data: bytes, count: int) -> bytes:
+    # the content of the body, inside the same document
+    match = re.search(rb"(<body[^>]*>)(.*)(</body>)", data, re.DOTALL | re.IGNORECASE)
+    if not match:
+        return data * count
+    return data[:match.start(2)] + match.group(2) * count + data[match.end(2):]
+
+def __scale_http(data: bytes, count: int) -> bytes:
+    # more requests, with the same separator of the file
+    return b"\n\n###\n\n".join([data.strip()] * count) + b"\n"
+
+SCALERS = {
+    "csv": __scale_csv,
+    "json": __scale_json,
+    "xml": __scale_xml,
+    "html": __scale_html,
+    "http": __scale_http
+}
+
+def scale_input(format: str, data: bytes, size: int) -> bytes | None:
+    """Get a valid input of about the size (in bytes) repeating the valid input data, None if the format can't be scaled (e.g. PDF)."""
+    scaler = SCALERS.get(format.lower())
+    if scaler is None or not data:
+        return None
+    # NB: the structure of the format adds (or removes) a few bytes
+    return scaler(data, max(1, ceil(size / len(data))))
+
+def get_scaled_input(in_parser_path: Path, format: str, size_mb: float) -> Path | None:
+    """Get the valid input scaled to the size (generated once, in the cache), None if the format can't be scaled."""
+    format = format.lower()
+    scaled_path = get_scaled_inputs_dir() / format / f"{in_parser_path.stem}_{size_mb:g}mb.{format}"
+    # NB: generated again if the valid input changed
+    if scaled_path.exists() and scaled_path.stat().st_mtime >= in_parser_path.stat().st_mtime:
+        return scaled_path
+
+    scaled = scale_input(format, in_parser_path.read_bytes(), int(size_mb * 2**20))
+    if scaled is None:
+        return None
+    scaled_path.parent.mkdir(parents=True, exist_ok=True)
+    # NB: written atomically, other processes and threads (benchmark workers, sessions) can read or write it meanwhile
+    tmp_fd, tmp_path = mkstemp(dir=scaled_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(tmp_fd, "wb") as f:
+            f.write(scaled)
+        os.replace(tmp_path, scaled_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return scaled_path
@@ -0,0 +1,134 @@
+import json, os, sqlite3
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import sha256
+from pathlib import Path
+from time import time
+from typing import Any, Iterator, Sequence
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+
+
+LLM_CACHE_MODES = ["off", "read-through", "replay"]
+
+class LLMCacheMiss(Exception):
+    """Exception for a prompt without a cached response in replay mode (retrying is pointless)."""
+    pass
+
+def get_llm_cache_path() -> Path:
+    return Path("cache") / "llm.sqlite"
+
+# NB: a context variable, so concurrent benchmarks (threads) can use different namespaces
+__llm_cache_namespace: ContextVar[str | None] = ContextVar("llm_cache_namespace", default=None)
+
+def set_llm_cache_namespace(namespace: str) -> None:
+    """Set the namespace of the cached responses for the current thread (or task)."""
+    __llm_cache_namespace.set(namespace)
+
+def get_llm_cache_namespace() -> str:
+    """Get the namespace of the cached responses: the one set, otherwise the LLM_CACHE_NAMESPACE setting."""
+    namespace = __llm_cache_namespace.get()
+    return namespace if namespace is not None else os.environ.get("LLM_CACHE_NAMESPACE", "")
+
+class LLMCache(BaseCache):
+    """Class for LLM responses persisted on a single SQLite file, with size and age eviction."""
+    def __init__(self, path: Path, mode: str = "read-through", max_mb: float = 512, max_age_days: float = 30):
+        if mode not in LLM_CACHE_MODES[1:]:
+            raise ValueError(f"Invalid LLM cache mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.max_bytes = int(max_mb * 2**20)
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.__connect() as connection:
+            # NB: WAL, so concurrent sessions can read while another one is writing
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    used REAL NOT NULL
+                )
+            """)
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+
+    @contextmanager
+    def __connect(self) -> Iterator[sqlite3.Connection]:
+        # NB: a connection for each operation, models are shared between threads
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def __get_key(self, prompt: str, llm_string: str) -> str:
+        # NB: llm_string has the model id and its parameters (temperature included), prompt is the rendered one
+        # NB: the namespace separates runs that must not share responses (e.g. benchmark repetitions)
+        key = json.dumps({
+            "llm": llm_string,
+            "prompt": prompt,
+            "namespace": get_llm_cache_namespace()
+        })
+        return sha256(key.encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Sequence[Generation] | None:
+        """Get the cached response of a prompt (if any)."""
+        key = self.__get_key(prompt, llm_string)
+        with self.__connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM responses WHERE key = ? AND created >= ?",
+                (key, time() - self.max_age_seconds)
+            ).fetchone()
+            if row and self.mode == "read-through":
+                # NB: least recently used responses are evicted first
+                connection.execute("UPDATE responses SET used = ? WHERE key = ?", (time(), key))
+
+        if row is None:
+            if self.mode == "replay":
+                raise LLMCacheMiss("No cached response for this prompt (LLM cache in replay mode)")
+            return None
+
+        try:
+            return [ loads(generation) for generation in json.loads(row[0]) ]
+        except Exception:
+            # broken entry (e.g. saved by another langchain version), just ask the model again
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        """Save the response of a prompt (not in replay mode)."""
+        if self.mode == "replay":
+            return
+
+        key = self.__get_key(prompt, llm_string)
+        value = json.dumps([ dumps(generation) for generation in return_val ])
+        now = time()
+        with self.__connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, used) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now)
+            )
+            self.__evict(connection, now)
+
+    def __evict(self, connection: sqlite3.Connection, now: float) -> None:
+        connection.execute("DELETE FROM responses WHERE created < ?", (now - self.max_age_seconds,))
+        total_bytes = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_bytes <= self.max_bytes:
+            return
+
+        # least recently used first, until the cache fits its size again
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY used").fetchall():
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total_bytes -= size
+            if total_bytes <= self.max_bytes:
+                break
+
+    def clear(self, **kwargs: Any) -> None:
+        """Remove all the cached responses."""
+        with self.__connect() as connection:
+            connection.execute("DELETE FROM responses")
@@ -1,4 +1,9 @@
-from time import sleep
+import asyncio, re
+from time import perf_counter, sleep
+from typing import Any, AsyncIterator, Iterator
+from utils.general import get_setting
+from utils.llm_cache import LLMCacheMiss
+from utils.rate_limit import is_retryable, get_retry_after, get_backoff, estimate_tokens
 
 
 
@@ -58,17 +63,145 @@ def get_request_from_action(action: str, file_format: str) -> str | None:
     
     return input("\nYou: ")
 
-def invoke_agent(agent, agent_input: dict[str, str]) -> tuple[bool, str]:
-    for i in range(3):
-        if i > 0:
-            print("Let's wait before restarting...")
-            sleep(60)
+def __get_retry_wait(error: Exception, attempt: int, attempts: int) -> float | None:
+    """Get the seconds to wait before asking again after an error (None if asking again is pointless)."""
+    # NB: replaying the cached responses, asking again gives the same miss
+    if isinstance(error, LLMCacheMiss) or not is_retryable(error) or attempt + 1 >= attempts:
+        return None
+    return get_backoff(attempt, float(get_setting("LLM_RETRY_BASE", "2")), float(get_setting("LLM_RETRY_MAX", "120")), get_retry_after(error))
+
+def __get_text(content: str | list[Any]) -> str:
+    # NB: some providers stream a list of content blocks
+    if isinstance(content, str):
+        return content
+    return "".join(block if isinstance(block, str) else block.get("text", "") for block in content if isinstance(block, (str, dict)))
+
+def __has_closed_code(response: str) -> bool:
+    # NB: fences pair up in order, so the closing fence of another block (e.g. a ```json sample input) never opens one
+    labels = re.findall(r"```([^`\n]*)", response)
+    # only a closed C block (```c, ```C or without language, the ones extract_c_code takes)
+    return any(opening.strip() in ["c", "C", ""] for opening, _ in zip(labels[::2], labels[1::2]))
+
+def __add_usage(usage: dict[str, int], message: Any) -> dict[str, int]:
+    """Add the tokens of a response (or a streamed chunk) to the usage."""
+    metadata = getattr(message, "usage_metadata", None) or {}
+    for key in ["input_tokens", "output_tokens"]:
+        if key in metadata:
+            usage[key] = usage.get(key, 0) + metadata[key]
+    return usage
+
+def __get_prompt_text(agent, agent_input: dict[str, str]) -> str:
+    # NB: the agents are a prompt and a model, the rendered prompt is what the model reads
+    try:
+        return agent.first.invoke(agent_input).to_string()
+    except Exception:
+        return "\n".join(str(value) for value in agent_input.values())
+
+def __estimate_cut_usage(agent, agent_input: dict[str, str], response: str, usage: dict[str, int]) -> None:
+    # NB: the usage comes with the last chunks (OpenAI) or the output tokens with the final delta (Anthropic), so a stream closed early has an estimate
+    if "input_tokens" not in usage:
+        usage["input_tokens"] = estimate_tokens(__get_prompt_text(agent, agent_input))
+    usage["output_tokens"] = max(usage.get("output_tokens", 0), estimate_tokens(response))
+
+def __stream_until_code(agent, agent_input: dict[str, str], usage: dict[str, int]) -> str:
+    """Collect a streamed response until its C code block is closed."""
+    response = ""
+    chunks = agent.stream(agent_input)
+    try:
+        for chunk in chunks:
+            text = __get_text(chunk.content)
+            response += text
+            __add_usage(usage, chunk)
+            if "`" in text and __has_closed_code(response):
+                # NB: the prose after the code is never used, closing the stream cancels the request
+                __estimate_cut_usage(agent, agent_input, response, usage)
+                break
+    finally:
+        chunks.close()
+    return response
+
+async def __astream_until_code(agent, agent_input: dict[str, str], usage: dict[str, int]) -> str:
+    """Same as __stream_until_code, for an async stream."""
+    response = ""
+    chunks = agent.astream(agent_input)
+    try:
+        async for chunk in chunks:
+            text = __get_text(chunk.content)
+            response += text
+            __add_usage(usage, chunk)
+            if "`" in text and __has_closed_code(response):
+                __estimate_cut_usage(agent, agent_input, response, usage)
+                break
+    finally:
+        await chunks.aclose()
+    return response
+
+def __get_event(start: float, retries: int, usage: dict[str, int]) -> dict[str, Any]:
+    return {
+        "seconds": perf_counter() - start,
+        "retries": retries,
+        "input_tokens": usage.get("input_tokens"),
+        "output_tokens": usage.get("output_tokens")
+    }
+
+def invoke_agent(agent, agent_input: dict[str, str], until_code: bool = False, event: dict[str, Any] | None = None) -> tuple[bool, str]:
+    """Invoke the agent, or stream its response until the C code block is closed.
+    The event (if given) is filled with wall time, retries and tokens of the request."""
+    # NB: the graph nodes ask their models without SDK retries, so this is the only retry policy
+    attempts = int(get_setting("LLM_RETRIES", "5"))
+    start = perf_counter()
+    for i in range(attempts):
+        # NB: only the tokens of the attempt that succeeds
+        usage = {}
+        try:
+            if until_code:
+                agent_response = __stream_until_code(agent, agent_input, usage)
+            else:
+                agent_result = agent.invoke(agent_input)
+                agent_response = str(agent_result.content)
+                __add_usage(usage, agent_result)
+            if event is not None:
+                event.update(__get_event(start, i, usage))
+            return True, agent_response
+        except Exception as e:
+            agent_response = str(e)
+            print(agent_response)
+            wait = __get_retry_wait(e, i, attempts)
+            if wait is None:
+                break
+            print(f"Let's wait {wait:.1f} seconds before restarting...")
+            sleep(wait)
+    
+    if event is not None:
+        event.update(__get_event(start, i, {}))
+    return False, f"Error occurred during agent response: {agent_response}\n\nPlease try again."
+
+async def ainvoke_agent(agent, agent_input: dict[str, str], until_code: bool = False, event: dict[str, Any] | None = None) -> tuple[bool, str]:
+    """Same as invoke_agent, but the event loop is free while waiting for the model."""
+    attempts = int(get_setting("LLM_RETRIES", "5"))
+    start = perf_counter()
+    for i in range(attempts):
+        # NB: only the tokens of the attempt that succeeds
+        usage = {}
         try:
-            agent_result = agent.invoke(agent_input)
-            agent_response = str(agent_result.content)
+            if until_code:
+                agent_response = await __astream_until_code(agent, agent_input, usage)
+            else:
+                agent_result = await agent.ainvoke(agent_input)
+                agent_response = str(agent_result.content)
+                __add_usage(usage, agent_result)
+            if event is not None:
+                event.update(__get_event(start, i, usage))
             return True, agent_response
         except Exception as e:
             agent_response = str(e)
             print(agent_response)
+            wait = __get_retry_wait(e, i, attempts)
+            if wait is None:
+                break
+            print(f"Let's wait {wait:.1f} seconds before restarting...")
+            await asyncio.sleep(wait)
     
-    return False, f"Error occurred during agent response: {agent_response}\n\nPlease try again."
\ No newline at end of file
+    if event is not None:
+        event.update(__get_event(start, i, {}))
+    return False, f"Error occurred during agent response: {agent_response}\n\nPlease try again."
@@ -0,0 +1,206 @@
+import asyncio, re, sqlite3
+from contextlib import contextmanager
+from math import ceil
+from pathlib import Path
+from random import uniform
+from threading import Lock
+from time import sleep, time
+from typing import Any, Iterator
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, get_buffer_string
+from langchain_core.outputs import LLMResult
+from langchain_core.rate_limiters import BaseRateLimiter
+
+
+
+# NB: 529 is "overloaded" for Anthropic
+RETRYABLE_STATUS_CODES = [408, 409, 429, 500, 502, 503, 504, 529]
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the tokens of a text (about 4 characters each), for the responses without usage."""
+    return ceil(len(text) / 4)
+
+def get_rate_limit_path() -> Path:
+    return Path("cache") / "rate_limit.sqlite"
+
+def __get_errors(error: BaseException) -> Iterator[BaseException]:
+    # NB: langchain wraps some SDK errors (e.g. google ones), the original is the cause
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+def get_status_code(error: BaseException) -> int | None:
+    """Get the HTTP status code of a provider error (if any)."""
+    for e in __get_errors(error):
+        # openai and anthropic (status_code), google api core (code)
+        for attribute in ["status_code", "code"]:
+            code = getattr(e, attribute, None)
+            if isinstance(code, int):
+                return code
+        response = getattr(e, "response", None)
+        if isinstance(getattr(response, "status_code", None), int):
+            return response.status_code
+    return None
+
+def get_retry_after(error: BaseException) -> float | None:
+    """Get the seconds to wait suggested by a provider error: Retry-After headers or google retry delay."""
+    for e in __get_errors(error):
+        headers = getattr(getattr(e, "response", None), "headers", None)
+        if headers:
+            try:
+                if headers.get("retry-after-ms"):
+                    return float(headers["retry-after-ms"]) / 1000
+                if headers.get("retry-after"):
+                    return float(headers["retry-after"])
+            except ValueError:
+                # NB: an HTTP date instead of seconds, let the backoff choose
+                pass
+        match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)|retry in ([\d.]+)\s*s", str(e), re.IGNORECASE)
+        if match:
+            return float(match.group(1) or match.group(2))
+    return None
+
+def is_retryable(error: BaseException) -> bool:
+    """Check if asking again can succeed: not for client errors (e.g. bad request, authentication, context too long)."""
+    code = get_status_code(error)
+    # NB: errors without status (timeouts, connection errors, parsing errors, ...) are retried as before
+    return code is None or code in RETRYABLE_STATUS_CODES
+
+def get_backoff(attempt: int, base: float, cap: float, retry_after: float | None = None) -> float:
+    """Get the seconds to wait before an attempt: exponential backoff with full jitter, never less than Retry-After."""
+    delay = uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        # NB: a bit of jitter anyway, so the workers waiting on the same limit don't stampede
+        delay = min(max(cap, retry_after), retry_after + delay / 4)
+    return delay
+
+class TokenBucketRateLimiter(BaseRateLimiter):
+    """Class for requests and tokens per minute of a provider, shared by threads and processes through a SQLite file."""
+    def __init__(self, path: Path, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0, check_every: float = 0.5):
+        self.path = path
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.check_every = check_every
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.__connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def __connect(self) -> Iterator[sqlite3.Connection]:
+        # NB: a connection for each operation (models are shared between threads), autocommit to take the lock explicitly
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def __take(self, connection: sqlite3.Connection, bucket: str, per_minute: float, amount: float, needed: float) -> float:
+        """Refill a bucket and take the amount if at least the needed tokens are there, otherwise get the seconds to wait."""
+        now = time()
+        row = connection.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (bucket,)).fetchone()
+        # NB: a full minute of burst at most, the tokens bucket can go in debit after a large response
+        tokens = per_minute if row is None else min(per_minute, row[0] + (now - row[1]) * per_minute / 60)
+        if tokens < needed:
+            connection.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", (bucket, tokens, now))
+            return (needed - tokens) * 60 / per_minute
+        connection.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)", (bucket, tokens - amount, now))
+        return 0
+
+    def __try_acquire(self) -> float:
+        """Take a request if both buckets allow it, otherwise get the seconds to wait."""
+        with self.__connect() as connection:
+            # NB: immediate, so the other processes wait for the lock instead of reading stale buckets
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                wait = 0.0
+                if self.tokens_per_minute > 0:
+                    # NB: the tokens of a request are known only after it, so it just must not be in debit
+                    wait = self.__take(connection, f"{self.name}:tokens", self.tokens_per_minute, 0, 0)
+                if wait == 0 and self.requests_per_minute > 0:
+                    wait = self.__take(connection, f"{self.name}:requests", self.requests_per_minute, 1, 1)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return wait
+
+    def consume_tokens(self, tokens: int) -> None:
+        """Take the tokens used by a request from the tokens bucket."""
+        if self.tokens_per_minute <= 0 or tokens <= 0:
+            return
+        with self.__connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.__take(connection, f"{self.name}:tokens", self.tokens_per_minute, tokens, float("-inf"))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Wait for a request to be allowed (or check it, when not blocking)."""
+        while True:
+            wait = self.__try_acquire()
+            if wait == 0:
+                return True
+            if not blocking:
+                return False
+            sleep(min(wait, self.check_every))
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Same as acquire, but the event loop is free while waiting."""
+        while True:
+            wait = self.__try_acquire()
+            if wait == 0:
+                return True
+            if not blocking:
+                return False
+            await asyncio.sleep(min(wait, self.check_every))
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """Class for the callback that takes the tokens used by each response from the limiter of its model."""
+    def __init__(self, rate_limiter: TokenBucketRateLimiter):
+        self.rate_limiter = rate_limiter
+        # requests running: run id -> (estimated tokens of the prompt, text received)
+        self.__runs: dict[UUID, tuple[int, str]] = {}
+        self.__lock = Lock()
+
+    def on_chat_model_start(self, serialized: dict[str, Any], messages: list[list[BaseMessage]], *, run_id: UUID, **kwargs: Any) -> None:
+        with self.__lock:
+            self.__runs[run_id] = (sum(estimate_tokens(get_buffer_string(prompt)) for prompt in messages), "")
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self.__lock:
+            if run_id in self.__runs:
+                prompt_tokens, text = self.__runs[run_id]
+                self.__runs[run_id] = (prompt_tokens, text + token)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self.__lock:
+            run = self.__runs.pop(run_id, None)
+        # NB: a stream closed early (at the end of the C code) ends as an error without usage, its tokens are estimated
+        if run and run[1]:
+            self.rate_limiter.consume_tokens(run[0] + estimate_tokens(run[1]))
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self.__lock:
+            self.__runs.pop(run_id, None)
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    tokens += usage.get("total_tokens", 0)
+        self.rate_limiter.consume_tokens(tokens)
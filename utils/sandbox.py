@@ -0,0 +1,56 @@
+from math import ceil
+
+
+
+# Linux signal numbers (NB: not from the signal module, the host can be Windows with programs running in WSL)
+SIGKILL = 9
+SIGXCPU = 24
+SIGXFSZ = 25
+
+def get_sandbox_time(limits: dict[str, float], input_size: int) -> float:
+    """Time budget of an execution, scaled on the input size (in seconds)."""
+    return limits["time_seconds"] + limits["time_seconds_per_mb"] * (input_size / 2**20)
+
+def get_sandbox_rlimits(limits: dict[str, float], time_budget: float, address_space: bool = True) -> dict[str, int]:
+    """Resource limits of an execution (NB: no address space limit with sanitizers, they reserve terabytes of virtual memory)."""
+    rlimits = {
+        "cpu": ceil(time_budget),
+        "fsize": int(limits["file_mb"] * 2**20),
+        "nofile": int(limits["open_files"])
+    }
+    if address_space:
+        rlimits["as"] = int(limits["memory_mb"] * 2**20)
+
+    return rlimits
+
+def get_sandbox_command(rlimits: dict[str, int]) -> list[str]:
+    """Command prefix that applies the resource limits (prlimit of util-linux, also inside WSL)."""
+    return ["prlimit", *[ (f"--{name}={value}:{value + 1}" if name == "cpu" else f"--{name}={value}") for name, value in rlimits.items() ]]
+
+def get_sandbox_asan_options(limits: dict[str, float]) -> list[str]:
+    """Sanitizer options that apply the memory limit (instead of the address space limit)."""
+    memory_mb = int(limits["memory_mb"])
+    return [ f"hard_rss_limit_mb={memory_mb}", f"malloc_limit_mb={memory_mb}" ]
+
+def get_sandbox_limit_hit(
+        returncode: int, stderr: str, rlimits: dict[str, int], memory_mb: float, relayed: bool = False, seconds: float | None = None
+    ) -> str | None:
+    """Get why the execution has been stopped (if by a limit or killed), relayed if the exit status comes through WSL,
+    seconds is its wall time (NB: the CPU time of a single thread can't be more)."""
+    # NB: killed by a signal gives a negative return code (prlimit execs the program), through WSL 128 + signal
+    # (only there, a program can exit with a status above 128 by itself)
+    signum = -returncode if returncode < 0 else (returncode - 128 if relayed and returncode > 128 else 0)
+    # NB: SIGKILL comes from the hard CPU limit only if SIGXCPU has been ignored, so after the CPU time reached the limit
+    if signum == SIGXCPU or (signum == SIGKILL and seconds is not None and seconds >= rlimits["cpu"]):
+        return f"CPU time limit ({rlimits["cpu"]} s) exceeded"
+    if signum == SIGXFSZ:
+        return f"file size limit ({rlimits["fsize"] // 2**20} MB) exceeded"
+    if ("rss limit exhausted" in stderr) or ("malloc limit" in stderr) or ("out of memory" in stderr.lower()) or ("Cannot allocate memory" in stderr):
+        return f"memory limit ({memory_mb:.0f} MB) exceeded"
+    if "Too many open files" in stderr:
+        return f"open files limit ({rlimits["nofile"]}) exceeded"
+    if signum == SIGKILL:
+        # e.g. the out-of-memory killer, or killed from outside
+        return "killed (SIGKILL)"
+
+    return None
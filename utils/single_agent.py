@@ -2,11 +2,11 @@ from traceback import format_exc
 from langchain.prompts import PromptTemplate
 from langchain.agents import AgentExecutor, create_react_agent
 from langchain.memory import ConversationBufferMemory
-from models import CompilationCheck, ExecutionCheck, BenchmarkMetrics
+from models import CompilationCheck, ExecutionCheck, BenchmarkMetrics, BenchmarkEventsHandler
 from utils import colors
 from utils.general import (
     create_session, initialize_llm, get_parser_dir,
-    extract_c_code, compile_c_code, execute_c_code, 
+    extract_c_code, compile_c_code, compile_c_code_profiles, execute_c_code, 
     print_colored, log, get_parser_requirements
 )
 
@@ -162,6 +162,8 @@ def start_chat(source: str, file_format: str, few_shot: bool = False, n: int = 1
 
     # initialize metrics
     benchmark_metrics = BenchmarkMetrics(n, type, file_format, source)
+    # NB: LLM requests and tool runs of all the rounds (each request is a ReAct loop)
+    benchmark_events_handler = BenchmarkEventsHandler(benchmark_metrics)
 
     # initialize model
     llm = initialize_llm(source)
@@ -228,7 +230,7 @@ def start_chat(source: str, file_format: str, few_shot: bool = False, n: int = 1
                 "requirements": get_parser_requirements(),
                 "examples": __get_examples() if few_shot else ""
             }
-            agent_response = agent_executor.invoke(agent_input)
+            agent_response = agent_executor.invoke(agent_input, config={ "callbacks": [ benchmark_events_handler ] })
             agent_output = str(agent_response["output"])
 
             # log the intermediate steps
@@ -263,14 +265,14 @@ def start_chat(source: str, file_format: str, few_shot: bool = False, n: int = 1
                         if action_tool == "compilation_check":
                             if benchmark_metrics.record_parser_compilation(i, parser_dir):
                                 parser_dir.mkdir()
-                                compile_c_code(parser_dir, code, runtime=False)
-                                compile_c_code(parser_dir, code)
+                                compile_c_code_profiles(parser_dir, code)
                         elif action_tool == "execution_check":
                             if benchmark_metrics.record_parser_testing(i, parser_dir):
                                 parser_dir.mkdir()
-                                compile_c_code(parser_dir, code, runtime=False)
-                                compile_c_code(parser_dir, code)
-                                execute_c_code(parser_dir, file_format)
+                                # NB: both profiles, even if the buildtime one fails (the tool tested only the runtime one, which must be there to execute)
+                                compile_c_code(parser_dir, code, False)
+                                if compile_c_code(parser_dir, code)["success"]:
+                                    execute_c_code(parser_dir, file_format)
                         else:
                             raise Exception(f"Cannot recognized {action_tool} tool")
                     else:
@@ -309,11 +311,8 @@ def start_chat(source: str, file_format: str, few_shot: bool = False, n: int = 1
 
             # compile the C code
             print("Compiling...")
-            compilation_result = compile_c_code(parser_dir, code, runtime=False)
+            compilation_result, _ = compile_c_code_profiles(parser_dir, code)
             is_compilation_ok = compilation_result["success"]
-            if is_compilation_ok:
-                compilation_result = compile_c_code(parser_dir, code)
-                is_compilation_ok = compilation_result["success"]
 
             if is_compilation_ok:
                 # testing the C code
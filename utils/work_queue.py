@@ -0,0 +1,150 @@
+import json, sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from time import time
+from typing import Iterator
+
+
+
+WORK_QUEUE_STATUSES = ["pending", "leased", "done", "failed"]
+
+def get_work_queue_path() -> Path:
+    return Path("benchmark") / "queue.sqlite"
+
+class WorkQueue:
+    """Class for the benchmarks to run, leased by workers (also on other machines) through a shared SQLite file."""
+    def __init__(self, path: Path, lease_seconds: float = 300, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.__connect() as connection:
+            # NB: no WAL, it needs shared memory and doesn't work on network file systems
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS cells (
+                    key TEXT PRIMARY KEY,
+                    n INTEGER NOT NULL,
+                    type TEXT NOT NULL,
+                    file_format TEXT NOT NULL,
+                    llm TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    worker TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    updated REAL NOT NULL
+                )
+            """)
+            # where the results of each worker are, for the merge
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker TEXT PRIMARY KEY,
+                    results TEXT NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def __connect(self) -> Iterator[sqlite3.Connection]:
+        # NB: a connection for each operation (workers are threads and processes), autocommit to take the lock explicitly
+        connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        finally:
+            connection.close()
+
+    @staticmethod
+    def get_key(n: int, type: str, file_format: str, llm: str) -> str:
+        return json.dumps([n, type, file_format, llm])
+
+    def add(self, cells: list[tuple[int, str, str, str]]) -> int:
+        """Queue the benchmarks (repetition, type, format, source) not queued yet, returning how many."""
+        now = time()
+        with self.__connect() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO cells (key, n, type, file_format, llm, status, updated) VALUES (?, ?, ?, ?, ?, 'pending', ?)",
+                [ (self.get_key(*cell), *cell, now) for cell in cells ]
+            )
+            return connection.total_changes - before
+
+    def lease(self, worker: str, llm: str | None = None) -> tuple[int, str, str, str] | None:
+        """Lease the next pending benchmark (of a source, if given) to a worker, None if there are no more."""
+        now = time()
+        with self.__connect() as connection:
+            # NB: leases not renewed in time belong to dead workers, their benchmarks are queued again
+            connection.execute(
+                "UPDATE cells SET status = 'pending', worker = NULL, lease_expires = NULL, updated = ? WHERE status = 'leased' AND lease_expires < ?",
+                (now, now)
+            )
+            query = "SELECT key, n, type, file_format, llm FROM cells WHERE status = 'pending'"
+            params = []
+            if llm:
+                query += " AND llm = ?"
+                params.append(llm)
+            row = connection.execute(query + " ORDER BY rowid LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE cells SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1, updated = ? WHERE key = ?",
+                (worker, now + self.lease_seconds, now, row[0])
+            )
+        return row[1], row[2], row[3], row[4]
+
+    def heartbeat(self, cell: tuple[int, str, str, str], worker: str) -> bool:
+        """Renew the lease of a benchmark, False if the worker lost it."""
+        now = time()
+        with self.__connect() as connection:
+            cursor = connection.execute(
+                "UPDATE cells SET lease_expires = ?, updated = ? WHERE key = ? AND status = 'leased' AND worker = ?",
+                (now + self.lease_seconds, now, self.get_key(*cell), worker)
+            )
+            return cursor.rowcount > 0
+
+    def complete(self, cell: tuple[int, str, str, str], worker: str) -> None:
+        """Mark a benchmark as done (even if the lease was lost meanwhile, the results are the same)."""
+        with self.__connect() as connection:
+            connection.execute(
+                "UPDATE cells SET status = 'done', worker = ?, lease_expires = NULL, updated = ? WHERE key = ?",
+                (worker, time(), self.get_key(*cell))
+            )
+
+    def release(self, cell: tuple[int, str, str, str], worker: str) -> None:
+        """Give back a benchmark that failed, it is queued again until its attempts are over."""
+        with self.__connect() as connection:
+            connection.execute(
+                """UPDATE cells SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, worker = NULL, lease_expires = NULL, updated = ?
+                WHERE key = ? AND status = 'leased' AND worker = ?""",
+                (self.max_attempts, time(), self.get_key(*cell), worker)
+            )
+
+    def register_worker(self, worker: str, results_dir: Path) -> None:
+        """Record the directory of the results of a worker."""
+        with self.__connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO workers (worker, results, updated) VALUES (?, ?, ?)",
+                (worker, str(results_dir), time())
+            )
+
+    def get_workers(self) -> dict[str, Path]:
+        """Get the directory of the results of each worker."""
+        with self.__connect() as connection:
+            rows = connection.execute("SELECT worker, results FROM workers ORDER BY worker").fetchall()
+        return { worker: Path(results) for worker, results in rows }
+
+    def get_counts(self, llm: str | None = None) -> dict[str, int]:
+        """Get how many benchmarks (of a source, if given) there are in each status."""
+        query = "SELECT status, COUNT(*) FROM cells"
+        params = []
+        if llm:
+            query += " WHERE llm = ?"
+            params.append(llm)
+        with self.__connect() as connection:
+            counts = dict(connection.execute(query + " GROUP BY status", params).fetchall())
+        return { status: counts.get(status, 0) for status in WORK_QUEUE_STATUSES }
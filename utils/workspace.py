@@ -0,0 +1,71 @@
+import atexit, os
+from contextlib import contextmanager
+from shutil import rmtree
+from subprocess import run
+from tempfile import gettempdir
+from threading import Lock
+from typing import Iterator
+from uuid import uuid4
+
+
+
+class Workspace:
+    """Class for build products of the checks kept in memory (tmpfs) and removed in bulk."""
+    def __init__(self, command: list[str], batch_size: int = 64):
+        # NB: with WSL, files live inside the distro, so they're managed through the command
+        self.command = command
+        self.batch_size = batch_size
+        self.lock = Lock()
+        self.batch = None
+        self.batch_products = 0
+        self.batch_users = {}
+
+        root = "/dev/shm" if (command or os.path.isdir("/dev/shm")) else gettempdir()
+        self.root = f"{root}/c_parser_{os.getpid()}_{uuid4().hex[:8]}"
+        atexit.register(self.__remove, self.root)
+
+    def __make(self, path: str) -> None:
+        if self.command:
+            run([*self.command, "mkdir", "-p", path], check=True)
+        else:
+            os.makedirs(path)
+
+    def __remove(self, path: str) -> None:
+        if self.command:
+            run([*self.command, "rm", "-rf", path])
+        else:
+            rmtree(path, ignore_errors=True)
+
+    @contextmanager
+    def products(self) -> Iterator[str]:
+        """Get a unique path prefix for the build products of a check."""
+        old_batch = None
+        with self.lock:
+            # NB: products are grouped in batches, so there is a single directory every batch_size checks
+            if (self.batch is None) or (self.batch_products >= self.batch_size):
+                if (self.batch is not None) and (self.batch_users[self.batch] == 0):
+                    old_batch = self.batch
+                    del self.batch_users[old_batch]
+                self.batch = f"{self.root}/batch_{uuid4().hex[:8]}"
+                self.__make(self.batch)
+                self.batch_products = 0
+                self.batch_users[self.batch] = 0
+            batch = self.batch
+            self.batch_products += 1
+            self.batch_users[batch] += 1
+
+        if old_batch:
+            self.__remove(old_batch)
+
+        try:
+            yield f"{batch}/{uuid4().hex}"
+        finally:
+            with self.lock:
+                self.batch_users[batch] -= 1
+                # remove a batch only when it is full and nobody is using it anymore
+                is_removable = (batch != self.batch) and (self.batch_users[batch] == 0)
+                if is_removable:
+                    del self.batch_users[batch]
+
+            if is_removable:
+                self.__remove(batch)